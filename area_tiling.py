@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import math
+from typing import Any
+
+
+# 区域外接矩形的经度或纬度跨度超过该度数时拆分为网格瓦片并发查询；0 表示不拆分
+DEFAULT_AREA_TILE_DEGREES = 5.0
+# 单次区域查询最多拆分的瓦片数；超出时自动放大瓦片边长
+MAX_AREA_TILES = 64
+
+Point = tuple[float, float]
+
+
+def parse_region(region: str) -> list[Point] | None:
+    """解析 lng,lat-lng,lat-... 格式的区域字符串；格式不合法时返回 None。"""
+    points: list[Point] = []
+    for item in str(region).split("-"):
+        if not item:
+            continue
+        parts = item.split(",")
+        if len(parts) != 2:
+            return None
+        try:
+            points.append((float(parts[0]), float(parts[1])))
+        except ValueError:
+            return None
+    if len(points) > 1 and points[0] == points[-1]:
+        points.pop()
+    return points if len(points) >= 3 else None
+
+
+def format_region(polygon: list[Point]) -> str:
+    return "-".join(f"{round(lng, 6):g},{round(lat, 6):g}" for lng, lat in polygon)
+
+
+def bounding_box(polygon: list[Point]) -> tuple[float, float, float, float]:
+    """返回 (min_lng, min_lat, max_lng, max_lat)。"""
+    lngs = [lng for lng, _ in polygon]
+    lats = [lat for _, lat in polygon]
+    return min(lngs), min(lats), max(lngs), max(lats)
+
+
+def polygon_area(polygon: list[Point]) -> float:
+    """鞋带公式计算的面积（平方度），只用于判断退化多边形。"""
+    return abs(sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(polygon, polygon[1:] + polygon[:1]))) / 2
+
+
+def point_in_polygon(lng: float, lat: float, polygon: list[Point]) -> bool:
+    """射线法判断点是否在多边形内；落在边上的点视为在内。"""
+    inside = False
+    for (x1, y1), (x2, y2) in zip(polygon, polygon[1:] + polygon[:1]):
+        if min(y1, y2) <= lat <= max(y1, y2) and min(x1, x2) <= lng <= max(x1, x2):
+            if math.isclose((x2 - x1) * (lat - y1), (y2 - y1) * (lng - x1), abs_tol=1e-12):
+                return True
+        if (y1 > lat) != (y2 > lat):
+            crossing = x1 + (lat - y1) * (x2 - x1) / (y2 - y1)
+            if lng < crossing:
+                inside = not inside
+    return inside
+
+
+def clip_to_box(polygon: list[Point], box: tuple[float, float, float, float]) -> list[Point]:
+    """Sutherland–Hodgman 算法把多边形裁剪到矩形内；凹多边形可能产生沿矩形边的退化边，不影响查询范围。"""
+    min_lng, min_lat, max_lng, max_lat = box
+    edges = (
+        (lambda p: p[0] >= min_lng, lambda a, b: _cross_lng(a, b, min_lng)),
+        (lambda p: p[0] <= max_lng, lambda a, b: _cross_lng(a, b, max_lng)),
+        (lambda p: p[1] >= min_lat, lambda a, b: _cross_lat(a, b, min_lat)),
+        (lambda p: p[1] <= max_lat, lambda a, b: _cross_lat(a, b, max_lat)),
+    )
+    output = list(polygon)
+    for inside, intersect in edges:
+        points, output = output, []
+        for index, current in enumerate(points):
+            previous = points[index - 1]
+            if inside(current):
+                if not inside(previous):
+                    output.append(intersect(previous, current))
+                output.append(current)
+            elif inside(previous):
+                output.append(intersect(previous, current))
+        if not output:
+            break
+    return output
+
+
+def _cross_lng(a: Point, b: Point, lng: float) -> Point:
+    return lng, a[1] + (b[1] - a[1]) * (lng - a[0]) / (b[0] - a[0])
+
+
+def _cross_lat(a: Point, b: Point, lat: float) -> Point:
+    return a[0] + (b[0] - a[0]) * (lat - a[1]) / (b[1] - a[1]), lat
+
+
+def tile_polygon(polygon: list[Point], tile_degrees: float = DEFAULT_AREA_TILE_DEGREES, max_tiles: int = MAX_AREA_TILES) -> list[list[Point]]:
+    """
+    按经纬度网格把多边形拆分为若干子多边形，每个子多边形是原多边形与一个网格单元的交集。
+    外接矩形不超过一个网格单元时原样返回；与多边形不相交的网格单元被跳过。
+    """
+    min_lng, min_lat, max_lng, max_lat = bounding_box(polygon)
+    width, height = max_lng - min_lng, max_lat - min_lat
+    if tile_degrees <= 0 or (width <= tile_degrees and height <= tile_degrees):
+        return [polygon]
+
+    size = tile_degrees
+    while math.ceil(width / size) * math.ceil(height / size) > max_tiles:
+        size *= 1.25
+    columns, rows = max(1, math.ceil(width / size)), max(1, math.ceil(height / size))
+    step_lng, step_lat = width / columns, height / rows
+
+    tiles: list[list[Point]] = []
+    for column in range(columns):
+        for row in range(rows):
+            box = (
+                min_lng + column * step_lng,
+                min_lat + row * step_lat,
+                max_lng if column == columns - 1 else min_lng + (column + 1) * step_lng,
+                max_lat if row == rows - 1 else min_lat + (row + 1) * step_lat,
+            )
+            tile = clip_to_box(polygon, box)
+            if len(tile) >= 3 and polygon_area(tile) > 0:
+                tiles.append(tile)
+    return tiles
+
+
+def merge_tile_ships(polygon: list[Point], ship_lists: list[list[dict[str, Any]]]) -> list[dict[str, Any]]:
+    """
+    合并各瓦片返回的船舶：丢弃落在原多边形外的船舶（瓦片边界附近上游可能多返回），
+    同一 MMSI 只保留 last_time_utc 最新的一条，按首次出现顺序返回。
+    """
+    ships: dict[Any, dict[str, Any]] = {}
+    for ship_list in ship_lists:
+        for ship in ship_list:
+            if not isinstance(ship, dict):
+                continue
+            lng, lat = ship.get("lng"), ship.get("lat")
+            if isinstance(lng, (int, float)) and isinstance(lat, (int, float)) and not point_in_polygon(lng, lat, polygon):
+                continue
+            mmsi = ship.get("mmsi")
+            current = ships.get(mmsi)
+            if current is None or (ship.get("last_time_utc") or 0) > (current.get("last_time_utc") or 0):
+                ships[mmsi] = ship
+    return list(ships.values())
@@ -3,13 +3,15 @@ import importlib.metadata
 import json
 import os
 import sys
-from collections.abc import Sequence
-from typing import Any
+from collections.abc import Iterator, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, TextIO
 
 from dotenv import dotenv_values, load_dotenv
 
-from ship_service import ShipxyAPI
-from tool_registry import TOOLS, all_schemas, get_tool, invoke_tool, model_to_data, parse_value
+from domain_catalog import error_fix
+from ship_service import DEFAULT_POOL_MAXSIZE, ShipxyAPI, create_response_cache
+from tool_registry import DEFAULT_BATCH_CONCURRENCY, TOOLS, all_schemas, get_tool, invoke_tool, model_to_data, parse_value
 
 
 EXIT_USAGE = 1
@@ -44,8 +46,11 @@ def get_api_key(args: argparse.Namespace | None = None) -> str:
     return api_key
 
 
-def create_api(args: argparse.Namespace) -> ShipxyAPI:
-    return ShipxyAPI(api_key=get_api_key(args))
+def create_api(args: argparse.Namespace, *, memory_cache: bool = False, pool_maxsize: int = DEFAULT_POOL_MAXSIZE) -> ShipxyAPI:
+    """memory_cache 为 True 时即使没有磁盘缓存目录也启用内存缓存，供同一进程内的多次调用复用。"""
+    cache_dir = getattr(args, "cache_dir", None) or os.getenv("SHIPXY_CACHE_DIR")
+    cache = create_response_cache(cache_dir=cache_dir) if cache_dir or memory_cache else None
+    return ShipxyAPI(api_key=get_api_key(args), cache=cache, pool_maxsize=pool_maxsize)
 
 
 def format_error(error: Exception) -> dict[str, Any]:
@@ -127,18 +132,107 @@ def collect_values(args: argparse.Namespace, tool_name: str) -> dict[str, Any]:
 
 
 def run_tool(args: argparse.Namespace) -> int:
-    api = create_api(args)
-    result = invoke_tool(api, args.tool_name, collect_values(args, args.tool_name))
+    with create_api(args) as api:
+        result = invoke_tool(api, args.tool_name, collect_values(args, args.tool_name), deadline=args.deadline)
     data = model_to_data(result)
     if isinstance(data, dict) and "ok" in data:
         payload = {"tool": args.tool_name, **data}
     else:
         payload = {"ok": True, "tool": args.tool_name, "data": data}
     render_result(payload, args.format)
-    if payload.get("ok") is False:
-        error_type = payload.get("error", {}).get("type")
-        return EXIT_USAGE if error_type == "invalid_request" else EXIT_API_ERROR
-    return 0
+    return exit_code_for(payload)
+
+
+def exit_code_for(payload: Any) -> int:
+    if not isinstance(payload, dict) or payload.get("ok") is not False:
+        return 0
+    error_type = (payload.get("error") or {}).get("type")
+    return EXIT_USAGE if error_type == "invalid_request" else EXIT_API_ERROR
+
+
+def read_batch_lines(stream: TextIO) -> Iterator[tuple[int, str]]:
+    """逐行读取 NDJSON 输入，跳过空行，返回 (行号, 内容)；行号从 1 开始。"""
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if line:
+            yield line_number, line
+
+
+def _batch_error(call_id: Any, tool_name: Any, message: str) -> dict[str, Any]:
+    return {
+        "id": call_id,
+        "ok": False,
+        "tool": tool_name,
+        "error": {"type": "invalid_request", "message": message, "fix": error_fix("invalid_request")},
+    }
+
+
+def run_batch_line(api: ShipxyAPI, line_number: int, line: str, deadline: float | None) -> dict[str, Any]:
+    """
+    执行一行批量调用：{"id": 可选, "tool": 工具名, "arguments": {...}}。
+    id 缺省时使用行号；工具名也可写作 tool_name，接受 CLI 的短横线形式。
+    """
+    try:
+        call = json.loads(line)
+    except json.JSONDecodeError as exc:
+        return _batch_error(line_number, None, f"第 {line_number} 行不是合法 JSON：{exc}")
+    if not isinstance(call, dict):
+        return _batch_error(line_number, None, f"第 {line_number} 行必须是 JSON 对象。")
+
+    call_id = call.get("id", line_number)
+    tool_name = call.get("tool") or call.get("tool_name")
+    arguments = call.get("arguments") or {}
+    if not isinstance(tool_name, str) or not isinstance(arguments, dict):
+        return _batch_error(call_id, tool_name, "每行需包含字符串 tool 和对象 arguments。")
+    try:
+        tool = get_tool(tool_name)
+    except KeyError as exc:
+        return _batch_error(call_id, tool_name, str(exc.args[0]))
+
+    try:
+        data = model_to_data(invoke_tool(api, tool.name, arguments, deadline=deadline))
+    except Exception as error:
+        return {"id": call_id, "ok": False, "tool": tool.name, "error": {"type": "shipxy_error", "message": str(error)}}
+    if isinstance(data, dict) and "ok" in data:
+        return {"id": call_id, "tool": tool.name, **data}
+    return {"id": call_id, "ok": True, "tool": tool.name, "data": data}
+
+
+def command_batch(args: argparse.Namespace) -> int:
+    """
+    从文件或标准输入读取 NDJSON 工具调用，在同一个客户端上并发执行，并按完成顺序逐行输出 NDJSON 结果。
+    进行中的调用数不超过 --concurrency，输入可以是持续写入的管道。
+    """
+    concurrency = max(1, args.concurrency)
+    stream = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    exit_code = 0
+
+    def emit(future: Future) -> None:
+        nonlocal exit_code
+        payload = future.result()
+        compact_json_print(payload)
+        sys.stdout.flush()
+        exit_code = max(exit_code, exit_code_for(payload))
+
+    try:
+        with create_api(args, memory_cache=True, pool_maxsize=max(concurrency, DEFAULT_POOL_MAXSIZE)) as api, ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="shipxy-batch"
+        ) as executor:
+            pending: set[Future] = set()
+            for line_number, line in read_batch_lines(stream):
+                if len(pending) >= concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        emit(future)
+                pending.add(executor.submit(run_batch_line, api, line_number, line, args.deadline))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    emit(future)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return exit_code
 
 
 def command_tools(args: argparse.Namespace) -> int:
@@ -217,6 +311,13 @@ def command_doctor(args: argparse.Namespace) -> int:
 def command_mcp_start(args: argparse.Namespace) -> int:
     import server
 
+    server.configure_concurrency(args.max_concurrency)
+    if args.tool_deadline is not None:
+        server.tool_deadline = args.tool_deadline
+    if args.rate_limit is not None or args.rate_burst is not None:
+        server.configure_rate_limit(args.rate_limit, args.rate_burst)
+    if args.cache_max_mb is not None or args.cache_dir is not None:
+        server.configure_cache(args.cache_max_mb, args.cache_dir)
     if args.transport == "sse":
         server.run_sse_server(args.host, args.port, debug=args.debug)
         return 0
@@ -240,6 +341,8 @@ def add_global_options(parser: argparse.ArgumentParser) -> None:
 def add_tool_parser(subparsers: argparse._SubParsersAction, tool) -> None:
     parser = subparsers.add_parser(tool.cli_name, help=tool.summary, description=tool.summary)
     add_global_options(parser)
+    parser.add_argument("--deadline", type=float, default=None, help="整个调用允许的最长秒数，超出时返回 timeout 错误。")
+    parser.add_argument("--cache-dir", default=None, help="磁盘缓存目录，潮汐站、港口和船舶档案查询跨进程复用；默认读取 SHIPXY_CACHE_DIR。")
     for param in tool.params:
         arg_type = str
         if param.type == "int":
@@ -287,6 +390,18 @@ def build_parser() -> argparse.ArgumentParser:
     add_global_options(doctor_parser)
     doctor_parser.set_defaults(func=command_doctor)
 
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help="批量执行 NDJSON 工具调用。",
+        description='从文件或标准输入逐行读取 {"id": ..., "tool": "get_single_ship", "arguments": {...}}，并发执行并按完成顺序输出 NDJSON 结果。',
+    )
+    batch_parser.add_argument("input", nargs="?", default="-", help="NDJSON 输入文件；不传或为 - 时读取标准输入。")
+    batch_parser.add_argument("--api-key", help="Shipxy API Key。会覆盖 SHIPXY_API_KEY。")
+    batch_parser.add_argument("--concurrency", type=int, default=DEFAULT_BATCH_CONCURRENCY, help=f"同时执行的调用数，默认 {DEFAULT_BATCH_CONCURRENCY}。")
+    batch_parser.add_argument("--deadline", type=float, default=None, help="单个调用允许的最长秒数，超出时该行返回 timeout 错误。")
+    batch_parser.add_argument("--cache-dir", default=None, help="磁盘缓存目录，潮汐站、港口和船舶档案查询跨进程复用；默认读取 SHIPXY_CACHE_DIR。")
+    batch_parser.set_defaults(func=command_batch, format="ndjson")
+
     mcp_parser = subparsers.add_parser("mcp", help="MCP 服务相关辅助命令。")
     mcp_subparsers = mcp_parser.add_subparsers(dest="mcp_command", required=True)
     mcp_start_parser = mcp_subparsers.add_parser("start", help="启动 MCP 服务。")
@@ -295,6 +410,12 @@ def build_parser() -> argparse.ArgumentParser:
     mcp_start_parser.add_argument("--port", type=int, default=8000)
     mcp_start_parser.add_argument("--mount-path", default=None)
     mcp_start_parser.add_argument("--debug", action="store_true")
+    mcp_start_parser.add_argument("--max-concurrency", type=int, default=None, help="同时执行的 Shipxy 工具调用数上限；默认读取 SHIPXY_MAX_CONCURRENCY 或 32。")
+    mcp_start_parser.add_argument("--tool-deadline", type=float, default=None, help="单次工具调用的整体截止秒数；默认读取 SHIPXY_TOOL_DEADLINE。")
+    mcp_start_parser.add_argument("--rate-limit", type=float, default=None, help="每个 API Key 每秒请求数上限；默认读取 SHIPXY_RATE_LIMIT，不设置时不限流。")
+    mcp_start_parser.add_argument("--rate-burst", type=int, default=None, help="限流允许的突发请求数；默认读取 SHIPXY_RATE_BURST。")
+    mcp_start_parser.add_argument("--cache-max-mb", type=float, default=None, help="响应缓存上限（MB）；默认读取 SHIPXY_CACHE_MAX_MB 或 64，0 表示关闭。")
+    mcp_start_parser.add_argument("--cache-dir", default=None, help="磁盘缓存目录，潮汐站、港口和船舶档案查询跨进程复用；默认读取 SHIPXY_CACHE_DIR。")
     mcp_start_parser.set_defaults(func=command_mcp_start)
 
     for tool in TOOLS:
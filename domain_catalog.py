@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from copy import deepcopy
+from functools import lru_cache
 from typing import Any
 
 from ship_service import (
@@ -44,6 +45,12 @@ FIELD_GLOSSARY: dict[str, str] = {
     "data": "接口载荷，具体结构由 returns 和 object_refs 描述。",
     "raw": "当本地 schema 未完全匹配时保留的 Shipxy 原始响应。",
     "warning": "非致命适配层警告；数据已返回，但本地 schema 未完全匹配。",
+    "chunk_errors": "分组并发查询时失败的分组及其错误；其余分组的数据仍在 data 中返回。",
+    "page_errors": "自动翻页时失败的页码及其错误；此前各页的数据仍在 data 中返回。",
+    "section_errors": "组合查询中失败的分项名及其错误；其余分项的结果仍在 data 中返回。",
+    "tile_errors": "大区域拆分查询时失败或翻页达到上限仍未取完（type 为 truncated）的瓦片区域及其错误；其余瓦片的船舶仍在 data 中返回。",
+    "truncated": "为 true 时表示结果不完整：部分瓦片翻页达到上限后仍有未取回的船舶。",
+    "meta": "客户端调用元数据，例如 rate_limit_wait_ms 表示本地限流排队的毫秒数，coalesced 表示结果与同时进行的相同请求共享，cache 为 hit/miss/stale/partial 表示是否来自响应缓存（partial 表示部分时间段补查上游，补查区间见 fetched_ranges；分组并发查询时表示部分分组命中缓存），cache_age 为缓存数据的秒龄，revalidating 表示已返回旧数据并在后台刷新，cached 表示 not_found 错误来自短期负缓存，track_windows 为长轨迹拆分并发查询的子窗口数，pages 为区域查询自动翻页的页数，tiles 为大区域拆分查询的瓦片数，elapsed_ms 为组合查询中各分项的耗时毫秒数。",
     "mmsi": "水上移动业务标识码，9 位船舶识别码。",
     "imo": "国际海事组织船舶编号，通常为 7 位数字。",
     "call_sign": "船舶无线电呼号。",
@@ -260,6 +267,7 @@ CAPABILITY_CATALOG: dict[str, dict[str, Any]] = {
         "returns": "list[VesselPosition]",
         "object_refs": ["VesselPosition"],
         "when_to_use": "按已知 MMSI 列表批量查询最新 AIS 位置。",
+        "parameter_notes": {"mmsis": "默认最多 50000 个（SHIPXY_MAX_MANY_SHIP_MMSIS 可调）；超过 100 个时自动去重、每 100 个一组并发查询并合并，失败的分组列在 chunk_errors 中。"},
     },
     "get_fleet_ship": {
         "category": "船舶",
@@ -278,6 +286,29 @@ CAPABILITY_CATALOG: dict[str, dict[str, Any]] = {
         "returns": "list[VesselPosition]",
         "object_refs": ["VesselPosition"],
         "when_to_use": "查询多边形区域内的船舶。",
+        "parameter_notes": {
+            "region": "外接矩形经度或纬度跨度超过 5° 时自动按网格拆分为最多 64 个瓦片并发查询，每个瓦片自动翻页，船舶裁剪回原多边形并按 MMSI 去重（保留 last_time_utc 最新的一条），失败的瓦片列在 tile_errors 中；翻页达到上限仍未取完时 data.continue 为 1、truncated 为 true，对应瓦片以 truncated 类型列在 tile_errors 中。",
+            "max_pages": "上游返回 continue 时按 scode 自动翻页，最多 50 页，各页 ship_list 合并返回；后续页失败时已取得的船舶照常返回，失败页列在 page_errors 中。",
+        },
+    },
+    "ship_dossier": {
+        "category": "船舶",
+        "returns": "ShipDossier",
+        "object_refs": ["VesselPosition", "ShipParticular", "ShipStatus", "ShipRegistry", "SingleETAPrecise"],
+        "when_to_use": "需要一艘船的完整画像（实时位置、档案、挂靠状态、船籍和 ETA）时一次调用，替代依次调用 get_single_ship、search_ship_particular、get_ship_status、get_ship_registry 和 get_single_eta_precise。",
+        "return_description": "data 中 position、particulars、status、registry、eta 各为对应工具的完整结果（含 ok、data、error 和 meta.elapsed_ms）；失败的分项同时列在 section_errors 中，其余分项照常返回。",
+        "parameter_notes": {"port_code": "只影响 eta 分项；船舶没有上报目的港时 eta 分项可能失败，其余分项不受影响。"},
+    },
+    "invoke_batch": {
+        "category": "批量",
+        "returns": "BatchResult",
+        "object_refs": [],
+        "when_to_use": "需要同时查询多条船、多个港口等相互独立的数据时一次提交多个工具调用，替代逐个串行调用。",
+        "return_description": "total、succeeded、failed 为调用统计；results 与 calls 顺序一一对应，每条为对应工具的完整结果（含 ok、data、error），单条失败不影响其他调用。任一条入参不合法时整批返回 invalid_request，details 中的 index 指出出错的调用。",
+        "parameter_notes": {
+            "calls": "最多 50 条，每条为 {\"tool_name\": 工具名, \"arguments\": 参数}；不能嵌套 invoke_batch。",
+            "max_concurrency": "1 到 16，默认 8；批次内各调用自身的拆分查询（分块、分页、瓦片）在所属调用的线程内顺序执行。",
+        },
     },
     "get_ship_registry": {
         "category": "船舶",
@@ -315,6 +346,14 @@ CAPABILITY_CATALOG: dict[str, dict[str, Any]] = {
         "object_refs": ["ETAShip"],
         "when_to_use": "按港口五位码和 Unix 时间戳范围查询预计到港船舶。",
     },
+    "port_snapshot": {
+        "category": "港口",
+        "returns": "PortSnapshot",
+        "object_refs": ["BerthShip", "AnchorShip", "ETAShip", "PortCallByPort"],
+        "when_to_use": "需要了解某个港口整体情况（靠泊、锚地等待、预抵港和近期到港）时一次调用，替代依次调用 get_berth_ships、get_anchor_ships、get_eta_ships 和 get_port_of_call_by_port。",
+        "return_description": "data 中 berth_ships、anchor_ships、eta_ships、port_calls 各为对应工具的完整结果（含 ok、data、error 和 meta.elapsed_ms）；失败的分项同时列在 section_errors 中，其余分项照常返回。",
+        "parameter_notes": {"window_hours": "1 到 168；预抵港查询 [现在, 现在+window_hours]，靠港记录查询 [现在-window_hours, 现在]。"},
+    },
     "get_ship_track": {
         "category": "轨迹",
         "returns": "list[ShipTrackPoint]",
@@ -491,7 +530,7 @@ ERROR_CATALOG: dict[str, dict[str, Any]] = {
     },
     "not_found": {
         "meaning": "请求的 Shipxy 实体不存在，或当前 API Key 无权查看。",
-        "fix": "先使用搜索类工具查询实体，再用返回的 id/code 重试。",
+        "fix": "先使用搜索类工具查询实体，再用返回的 id/code 重试；meta.cached=true 表示该结果来自一分钟内的负缓存，原样重试不会得到不同结果。",
     },
     "response_validation_failed": {
         "meaning": "Shipxy 返回数据与本地 Pydantic 模型不完全一致。",
@@ -499,16 +538,24 @@ ERROR_CATALOG: dict[str, dict[str, Any]] = {
     },
     "http_error": {
         "meaning": "Shipxy 返回了非 200 HTTP 响应。",
-        "fix": "稍后重试或检查 status_code；持续失败可能表示接口地址或网络异常。",
+        "fix": "5xx 已由客户端自动退避重试；仍失败时稍后再试或检查 status_code，持续失败可能表示接口地址或网络异常。",
     },
     "network_error": {
         "meaning": "当前服务无法连接 Shipxy。",
-        "fix": "检查网络连通性后重试。",
+        "fix": "客户端已自动退避重试；仍失败时检查网络连通性后再试。",
     },
     "timeout": {
         "meaning": "Shipxy 请求超时。",
         "fix": "缩小查询范围或缩短时间窗口后重试。",
     },
+    "upstream_unavailable": {
+        "meaning": "该 Shipxy 接口连续失败已被熔断，本次请求未发往上游。",
+        "fix": "读取 error.circuit.retry_after，等待熔断恢复后再重试；不要立即重复调用。",
+    },
+    "rate_limited": {
+        "meaning": "本地限流排队时间超过了调用截止时间，本次请求未发往上游。",
+        "fix": "降低调用频率，或放宽截止时间后重试。",
+    },
     "shipxy_error": {
         "meaning": "Shipxy 返回了尚未映射到更具体类型的业务错误。",
         "fix": "读取 Shipxy 返回消息，并据此调整入参或服务权限。",
@@ -548,7 +595,43 @@ def _with_field_descriptions(schema: dict[str, Any]) -> dict[str, Any]:
     return result
 
 
+class _ReadOnlyDict(dict):
+    """缓存的目录结果：读取和 JSON 序列化与普通 dict 相同，任何原地修改都抛出 TypeError，避免调用方改坏共享缓存。"""
+
+    def _read_only(self, *args: Any, **kwargs: Any) -> None:
+        raise TypeError("目录结果是共享的只读缓存，需要修改时请先 copy.deepcopy 得到可变副本。")
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self) -> dict[str, Any]:
+        return dict(self)
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> dict[str, Any]:
+        return {key: _thaw(value, memo) for key, value in self.items()}
+
+
+def _thaw(value: Any, memo: dict[int, Any]) -> Any:
+    if isinstance(value, tuple):
+        return [_thaw(item, memo) for item in value]
+    return deepcopy(value, memo)
+
+
+def freeze_catalog(value: Any) -> Any:
+    """把目录结果转换为只读结构：dict 转为只读 dict，list 转为 tuple；只在缓存时转换一次，之后直接共享。"""
+    if isinstance(value, dict):
+        return _ReadOnlyDict({key: freeze_catalog(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_catalog(item) for item in value)
+    return value
+
+
+@lru_cache(maxsize=256)
 def describe_object(object_name: str | None = None) -> dict[str, Any]:
+    """返回对象目录或单个对象 schema。结果只依赖静态模型定义，按对象名缓存；返回共享的只读结构，修改时抛出 TypeError。"""
+    return freeze_catalog(_build_object_description(object_name))
+
+
+def _build_object_description(object_name: str | None) -> dict[str, Any]:
     if object_name:
         model = OBJECT_MODELS.get(object_name)
         if model is None:
@@ -625,13 +708,14 @@ def describe_capability(tool_schema: dict[str, Any]) -> dict[str, Any]:
                 "capability_ref": metadata["capability_ref"],
                 "object_refs": metadata["object_refs"],
                 "data": "与 returns/object_refs 对应的业务数据。",
+                "meta": "可选。客户端调用元数据，例如 rate_limit_wait_ms、coalesced、cache、cache_age、revalidating、cached。",
             },
             "error": {
                 "ok": False,
                 "tool": name,
                 "capability_ref": metadata["capability_ref"],
                 "error": {
-                    "type": "invalid_request | permission_denied | not_found | response_validation_failed | http_error | network_error | timeout | shipxy_error",
+                    "type": "invalid_request | permission_denied | not_found | response_validation_failed | http_error | network_error | timeout | upstream_unavailable | rate_limited | shipxy_error",
                     "message": "中文错误说明。",
                     "details": "可用时返回字段级错误详情。",
                     "fix": "可用时返回可执行的修复建议。",
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+DEFAULT_RETRY_ATTEMPTS = 3
+DEFAULT_RETRY_BASE_DELAY = 0.2
+DEFAULT_RETRY_MAX_DELAY = 2.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RECOVERY_TIMEOUT = 30.0
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """瞬时错误的重试策略：指数退避 + 全抖动（full jitter）。"""
+
+    max_attempts: int = DEFAULT_RETRY_ATTEMPTS
+    base_delay: float = DEFAULT_RETRY_BASE_DELAY
+    max_delay: float = DEFAULT_RETRY_MAX_DELAY
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次失败后、下一次重试前的等待秒数。"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+
+class CircuitBreaker:
+    """
+    单个 Shipxy 接口的熔断器。
+
+    连续 failure_threshold 次瞬时失败后打开，打开期间直接拒绝请求；recovery_timeout 秒后进入
+    半开状态，只放行一个探测请求，探测成功则关闭，失败则重新打开。线程安全。
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, recovery_timeout: float = DEFAULT_RECOVERY_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._state = CIRCUIT_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """是否放行本次请求；半开状态下只有第一个调用方获得探测机会。"""
+        with self._lock:
+            if self._state == CIRCUIT_CLOSED:
+                return True
+            if self._state == CIRCUIT_OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_timeout:
+                    return False
+                self._state = CIRCUIT_HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        """上游给出了响应（含业务错误），视为接口可用。"""
+        with self._lock:
+            self._state = CIRCUIT_CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def release(self) -> None:
+        """结果无法说明上游健康状况（例如调用方截止时间已到）时，只归还半开探测名额。"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """记录一次瞬时失败（网络错误、超时或 5xx）。"""
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == CIRCUIT_HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = CIRCUIT_OPEN
+                self._opened_at = time.monotonic()
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            state = self._state
+            retry_after = None
+            if state == CIRCUIT_OPEN:
+                retry_after = round(max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at)), 3)
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "retry_after": retry_after,
+            }
+
+
+class CircuitBreakerRegistry:
+    """按 Shipxy 接口名惰性创建熔断器；可在多个客户端之间共享，使同一接口的健康状态全局可见。"""
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, recovery_timeout: float = DEFAULT_RECOVERY_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.recovery_timeout)
+                self._breakers[endpoint] = breaker
+            return breaker
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {endpoint: breaker.snapshot() for endpoint, breaker in sorted(breakers.items())}
+
+
+class RateLimiter:
+    """
+    客户端令牌桶限流器，按 API key（可选再按接口）分桶。
+
+    每个桶以 rate 次/秒补充令牌，最多累积 burst 个。令牌不足时调用方预约下一个令牌并
+    等待相应时间，而不是直接被 Shipxy 配额拒绝；多个客户端共享同一个实例即可共享配额。
+    """
+
+    def __init__(self, rate: float, burst: int | None = None, *, per_endpoint: bool = False):
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.per_endpoint = per_endpoint
+        self._buckets: dict[tuple[str | None, str | None], tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, api_key: str | None, endpoint: str, max_wait: float | None = None) -> float | None:
+        """
+        预约一个令牌。
+        返回：
+            发起请求前需要等待的秒数；等待时间超过 max_wait 时不消耗令牌并返回 None
+        """
+        key = (api_key, endpoint if self.per_endpoint else None)
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated = self._buckets.get(key, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+            if max_wait is not None and wait > max_wait:
+                self._buckets[key] = (tokens, now)
+                return None
+            self._buckets[key] = (tokens - 1, now)
+            return wait
+
+
+def _follower_error(error: BaseException) -> BaseException:
+    """
+    跟随者抛出的异常：每个跟随者一个独立副本，避免多线程同时改写同一个 traceback；副本带 coalesced=True。
+    异常无法复制时退回原异常。
+    """
+    try:
+        follower = copy.copy(error)
+        follower.coalesced = True
+    except Exception:
+        return error
+    return follower
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    合并相同键的并发调用：同一时刻只有第一个调用方真正执行，其余调用方等待并共享其结果或异常。
+    跟随者收到的异常是领头调用异常的副本，并带 coalesced=True 属性。
+
+    调用结束后立即移除记录，不做缓存；线程安全。
+    """
+
+    def __init__(self):
+        self._flights: dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], T], timeout: float | None = None) -> tuple[T, bool]:
+        """
+        执行或加入 key 对应的调用。
+        参数：
+            timeout: 跟随者最多等待的秒数，超时抛出 TimeoutError；不影响正在执行的调用
+        返回：
+            (结果, 是否共享了其他调用方的结果)
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            if not flight.done.wait(timeout):
+                raise TimeoutError("等待相同请求的结果超时")
+            if flight.error is not None:
+                raise _follower_error(flight.error)
+            return flight.result, True
+        try:
+            flight.result = fn()
+            return flight.result, False
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight 的 asyncio 版本。
+
+    实际调用在独立 Task 中执行，发起者被取消不会中断其他正在等待的调用方。
+    只能在同一个事件循环内使用。
+    """
+
+    def __init__(self):
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]], timeout: float | None = None) -> tuple[T, bool]:
+        task = self._tasks.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        try:
+            if shared and timeout is not None:
+                return await asyncio.wait_for(asyncio.shield(task), timeout), True
+            return await asyncio.shield(task), shared
+        except Exception as exc:
+            if shared and task.done() and not task.cancelled() and task.exception() is exc:
+                raise _follower_error(exc) from None
+            raise
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # 所有调用方都已取消时，避免 "exception was never retrieved" 警告
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._tasks)
@@ -0,0 +1,623 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Hashable
+
+from pydantic import BaseModel
+
+
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# 上游失败时，过期不超过该秒数的缓存仍可作为降级结果返回
+DEFAULT_STALE_IF_ERROR = 300.0
+
+# 各接口的缓存新鲜期（秒）；0 表示不缓存。
+# 实时船位按 AIS 刷新节奏只缓存数秒，档案、港口、潮汐站等静态数据缓存一天。
+ENDPOINT_CACHE_TTLS: dict[str, float] = {
+    "SearchShip": 300,
+    "GetSingleShip": 10,
+    "GetManyShip": 10,
+    "GetFleetShip": 10,
+    "GetSurRoundingShip": 10,
+    "GetAreaShip": 0,
+    "GetShipRegistry": 86400,
+    "SearchShipParticular": 86400,
+    "SearchPort": 86400,
+    "GetBerthShips": 60,
+    "GetAnchorShips": 60,
+    "GetETAShips": 60,
+    "GetShipTrack": 60,
+    "SearchshipApproach": 300,
+    "GetPortofCallByShip": 300,
+    "GetPortofCallByShipPort": 300,
+    "GetShipStatus": 60,
+    "GetPortofCallByPort": 300,
+    "PlanRouteByPoint": 3600,
+    "PlanRouteByPort": 3600,
+    "GetSingleETAPrecise": 60,
+    "GetWeather": 600,
+    "GetAllTyphoon": 300,
+    "GetSingleTyphoon": 300,
+    "GetTides": 86400,
+    "GetTideData": 3600,
+    "GetWeatherByPoint": 600,
+    "GetGlobalTides": 86400,
+    "GetGlobalTideData": 3600,
+    "CurrentWeather": 600,
+    "FutureWeather": 1800,
+    "HistoryWeather": 86400,
+    "GetNavWarning": 600,
+}
+
+# 过期后可先返回旧数据、同时在后台刷新的窗口（秒）。
+# 台风、气象和航行警告每次调用都较慢，且短时间内的旧数据仍有参考价值。
+ENDPOINT_STALE_WHILE_REVALIDATE: dict[str, float] = {
+    "GetAllTyphoon": 1800,
+    "GetWeather": 3600,
+    "CurrentWeather": 1800,
+    "GetNavWarning": 3600,
+}
+
+# 轨迹缓存最多保留的轨迹点数，超出时按船淘汰最久未使用的轨迹
+DEFAULT_TRACK_CACHE_POINTS = 200_000
+# 距今不足该秒数的时间段视为尚未稳定（AIS 点可能延迟入库），不记为已覆盖
+TRACK_SETTLE_SECONDS = 600
+
+# 潮汐缓存最多保留的站点日数
+DEFAULT_TIDE_CACHE_DAYS = 50_000
+# 潮汐是天文推算数据，单日数据缓存一天后重新获取
+TIDE_DAY_TTL = 86400
+
+# not_found 结果的负缓存秒数：短时间内重复查询不存在的实体时直接返回，不再请求上游
+NEGATIVE_CACHE_TTL = 60.0
+DEFAULT_NEGATIVE_CACHE_ENTRIES = 10_000
+
+# 靠港记录和搭靠事件属于历史数据：结束时间早于该秒数之前的查询窗口视为已定稿，缓存永不过期；
+# 窗口触及最近时间段时仍按普通新鲜期刷新
+HISTORY_ENDPOINTS = frozenset({"GetPortofCallByShip", "GetPortofCallByShipPort", "GetPortofCallByPort", "SearchshipApproach"})
+HISTORY_SETTLE_SECONDS = 86400
+
+# 点位气象按网格缓存：同一网格内的点共享缓存，缓存在响应 publish_time 之后的下一个发布周期过期；
+# 响应缺少 publish_time 时退化为在下一个整点周期过期
+WEATHER_GRID_ENDPOINTS = frozenset({"GetWeatherByPoint", "CurrentWeather", "FutureWeather"})
+WEATHER_GRID_DEGREES = 0.1
+WEATHER_PUBLISH_CYCLE = 3600
+# 船讯网返回的文本时间（如 publish_time）为北京时间
+SHIPXY_TIMEZONE = timezone(timedelta(hours=8))
+
+PERSISTENT_CACHE_FILENAME = "shipxy_cache.sqlite3"
+# 持久化缓存的表结构版本；修改表结构时递增，旧文件会被重建
+PERSISTENT_CACHE_FORMAT = 1
+
+CACHE_HIT = "hit"
+CACHE_MISS = "miss"
+CACHE_STALE = "stale"
+# 部分时间段来自缓存、其余时间段补查上游
+CACHE_PARTIAL = "partial"
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """一次缓存查询的结果；value 是独立解码的副本，调用方可以随意修改。"""
+
+    value: dict[str, Any]
+    age: float
+    fresh: bool
+    # 已过期但仍处于 stale-while-revalidate 窗口内，可以先返回再后台刷新
+    revalidate: bool = False
+
+
+class ResponseCache:
+    """
+    Shipxy 成功响应的 TTL + LRU 内存缓存。
+
+    响应以紧凑 JSON 字节保存，按字节数计算内存占用，超过 max_bytes 时淘汰最久未使用的条目。
+    过期条目在 stale_if_error 秒内保留，供上游失败时降级返回。线程安全，可在多个客户端之间共享。
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        ttls: dict[str, float] | None = None,
+        stale_if_error: float = DEFAULT_STALE_IF_ERROR,
+        persistent: PersistentCache | None = None,
+        revalidate_windows: dict[str, float] | None = None,
+        track_points: int = DEFAULT_TRACK_CACHE_POINTS,
+        tide_days: int = DEFAULT_TIDE_CACHE_DAYS,
+        weather_grid: float = WEATHER_GRID_DEGREES,
+        weather_cycle: float = WEATHER_PUBLISH_CYCLE,
+        negative_ttl: float = NEGATIVE_CACHE_TTL,
+    ):
+        """
+        参数：
+            max_bytes: 内存缓存上限（字节）
+            ttls: 按接口名覆盖默认新鲜期，参见 ENDPOINT_CACHE_TTLS
+            stale_if_error: 过期后仍可降级返回的秒数
+            persistent: 可选的磁盘缓存；内存未命中时回查，写入时同步落盘，进程重启后仍然有效
+            revalidate_windows: 按接口名覆盖 stale-while-revalidate 窗口，参见 ENDPOINT_STALE_WHILE_REVALIDATE
+            track_points: 轨迹区间缓存最多保留的轨迹点数，0 表示不缓存轨迹
+            tide_days: 潮汐按日缓存最多保留的站点日数，0 表示不按日缓存潮汐
+            weather_grid: 点位气象缓存的网格边长（度），0 表示按精确坐标缓存
+            weather_cycle: 气象数据发布周期（秒），缓存在响应 publish_time 之后的下一个发布时刻过期
+            negative_ttl: not_found 结果的缓存秒数，0 表示不缓存
+        """
+        self.max_bytes = max_bytes
+        self.ttls = {**ENDPOINT_CACHE_TTLS, **(ttls or {})}
+        self.stale_if_error = stale_if_error
+        self.persistent = persistent
+        self.revalidate_windows = {**ENDPOINT_STALE_WHILE_REVALIDATE, **(revalidate_windows or {})}
+        self.tracks = TrackCache(track_points) if track_points > 0 else None
+        self.tides = TideCache(tide_days) if tide_days > 0 else None
+        self.weather_grid = weather_grid
+        self.weather_cycle = weather_cycle
+        self.negative_ttl = negative_ttl
+        # key -> (过期时间, 错误消息, Shipxy 状态码)
+        self._negative: OrderedDict[Hashable, tuple[float, str, Any]] = OrderedDict()
+        # key -> (JSON 字节, 写入时间, 新鲜截止时间, 可先返回再刷新的截止时间)
+        self._entries: OrderedDict[Hashable, tuple[bytes, float, float, float]] = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def ttl_for(self, endpoint: str) -> float:
+        return self.ttls.get(endpoint, 0)
+
+    def key_params(self, endpoint: str, params: dict[str, Any]) -> dict[str, Any]:
+        """缓存键使用的参数：点位气象的经纬度换成所在网格编号，网格内的点共享缓存。"""
+        if endpoint not in WEATHER_GRID_ENDPOINTS or self.weather_grid <= 0:
+            return params
+        normalized = dict(params)
+        for name in ("lng", "lat"):
+            try:
+                normalized[name] = f"cell:{round(float(params[name]) / self.weather_grid)}"
+            except (KeyError, TypeError, ValueError):
+                pass
+        return normalized
+
+    def _fresh_for(self, endpoint: str, params: dict[str, Any] | None, value: dict[str, Any] | None = None) -> float:
+        ttl = self.ttl_for(endpoint)
+        if endpoint in HISTORY_ENDPOINTS and params is not None:
+            try:
+                if float(params["end_time"]) < time.time() - HISTORY_SETTLE_SECONDS:
+                    return math.inf
+            except (KeyError, TypeError, ValueError):
+                pass
+        if endpoint in WEATHER_GRID_ENDPOINTS and self.weather_cycle > 0:
+            now = time.time()
+            published = _latest_publish_time(value)
+            if published is None:
+                next_publish = (now // self.weather_cycle + 1) * self.weather_cycle
+            else:
+                # 上游迟迟未发布新一期时，按同样的周期顺延，而不是每次请求都回源
+                cycles = max(1, math.ceil((now - published) / self.weather_cycle))
+                next_publish = published + cycles * self.weather_cycle
+            ttl = min(ttl, max(0.0, next_publish - now))
+        return ttl
+
+    def revalidate_window(self, endpoint: str) -> float:
+        return self.revalidate_windows.get(endpoint, 0)
+
+    def get(self, key: Hashable) -> CachedResponse | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now > max(entry[2] + self.stale_if_error, entry[3]):
+                self._discard(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            entry = self._load_persistent(key, now)
+            if entry is None:
+                return None
+        data, stored_at, fresh_until, revalidate_until = entry
+        fresh = now <= fresh_until
+        return CachedResponse(json.loads(data), now - stored_at, fresh, not fresh and now <= revalidate_until)
+
+    def _load_persistent(self, key: Hashable, now: float) -> tuple[bytes, float, float, float] | None:
+        """从磁盘缓存回填内存缓存；磁盘上的墙钟时间换算为本进程的单调时钟。只查询持久化的接口。"""
+        if self.persistent is None or not self.persistent.handles(key[0]):
+            return None
+        row = self.persistent.get(key)
+        if row is None:
+            return None
+        data, stored_wall, expires_wall = row
+        offset = now - time.time()
+        entry = (data, stored_wall + offset, expires_wall + offset, expires_wall + offset)
+        if now > entry[2] + self.stale_if_error:
+            return None
+        self._put(key, entry)
+        return entry
+
+    def set(self, endpoint: str, key: Hashable, value: dict[str, Any], params: dict[str, Any] | None = None) -> None:
+        """
+        写入成功响应。
+        参数：
+            params: 原始请求参数，用于判断历史查询窗口是否已定稿
+        """
+        ttl = self.ttl_for(endpoint)
+        if ttl <= 0:
+            return
+        data = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+        now = time.monotonic()
+        fresh = self._fresh_for(endpoint, params, value)
+        self._put(key, (data, now, now + fresh, now + fresh + self.revalidate_window(endpoint)))
+        if self.persistent is not None and self.persistent.handles(endpoint):
+            self.persistent.set(endpoint, key, data, fresh)
+
+    def get_negative(self, key: Hashable) -> tuple[str, Any] | None:
+        """返回仍在负缓存期内的 (错误消息, Shipxy 状态码)。"""
+        with self._lock:
+            entry = self._negative.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() > entry[0]:
+                del self._negative[key]
+                return None
+            return entry[1], entry[2]
+
+    def set_negative(self, key: Hashable, message: str, status: Any) -> None:
+        if self.negative_ttl <= 0:
+            return
+        with self._lock:
+            self._negative.pop(key, None)
+            self._negative[key] = (time.monotonic() + self.negative_ttl, message, status)
+            while len(self._negative) > DEFAULT_NEGATIVE_CACHE_ENTRIES:
+                self._negative.popitem(last=False)
+
+    def _put(self, key: Hashable, entry: tuple[bytes, float, float, float]) -> None:
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = entry
+            self._nbytes += len(entry[0])
+            while self._nbytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._negative.clear()
+            self._nbytes = 0
+        if self.tracks is not None:
+            self.tracks.clear()
+        if self.tides is not None:
+            self.tides.clear()
+
+    def _discard(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._nbytes -= len(entry[0])
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _parse_publish_time(value: Any) -> float | None:
+    """把 publish_time 转换为 UTC 时间戳：数字按秒（或毫秒）时间戳处理，文本按北京时间解析；无法识别时返回 None。"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.strip().isdigit()):
+        timestamp = float(value)
+        return timestamp / 1000 if timestamp > 1e12 else timestamp
+    if not isinstance(value, str):
+        return None
+    for pattern in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M:%S"):
+        try:
+            parsed = datetime.strptime(value.strip(), pattern)
+        except ValueError:
+            continue
+        return parsed.replace(tzinfo=SHIPXY_TIMEZONE).timestamp()
+    return None
+
+
+def _latest_publish_time(value: dict[str, Any] | None) -> float | None:
+    """响应 data 中最新的 publish_time；data 可以是单个对象、对象列表，或把逐时预报列表放在字段中的对象。"""
+    data = value.get("data") if isinstance(value, dict) else None
+    items = list(data) if isinstance(data, list) else [data]
+    if isinstance(data, dict):
+        items += [item for field in data.values() if isinstance(field, list) for item in field]
+    times = [_parse_publish_time(item.get("publish_time")) for item in items if isinstance(item, dict)]
+    times = [published for published in times if published is not None]
+    return max(times) if times else None
+
+
+def _merge_intervals(intervals: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """合并重叠或首尾相接的闭区间（整数秒）。"""
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class _Track:
+    __slots__ = ("intervals", "points")
+
+    def __init__(self):
+        self.intervals: list[tuple[int, int]] = []
+        self.points: dict[int, dict[str, Any]] = {}
+
+
+class TrackCache:
+    """
+    按船（API key + MMSI）缓存轨迹点及其已覆盖的时间区间。
+
+    查询时只需向上游补查未覆盖的时间段，结果按 utc 合并去重。距今 TRACK_SETTLE_SECONDS 以内的
+    时间段不记为已覆盖，下次查询会重新补查，避免漏掉延迟入库的 AIS 点。线程安全。
+    """
+
+    def __init__(self, max_points: int = DEFAULT_TRACK_CACHE_POINTS, settle_seconds: float = TRACK_SETTLE_SECONDS):
+        self.max_points = max_points
+        self.settle_seconds = settle_seconds
+        self._tracks: OrderedDict[Hashable, _Track] = OrderedDict()
+        self._npoints = 0
+        self._lock = threading.Lock()
+
+    def missing(self, key: Hashable, start: int, end: int) -> list[tuple[int, int]]:
+        """返回 [start, end] 内尚未覆盖的时间段（闭区间，按时间排序）。"""
+        with self._lock:
+            track = self._tracks.get(key)
+            intervals = list(track.intervals) if track is not None else []
+        gaps: list[tuple[int, int]] = []
+        cursor = start
+        for covered_start, covered_end in intervals:
+            if covered_end < cursor:
+                continue
+            if covered_start > end:
+                break
+            if covered_start > cursor:
+                gaps.append((cursor, covered_start - 1))
+            cursor = max(cursor, covered_end + 1)
+        if cursor <= end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def add(self, key: Hashable, start: int, end: int, points: list[dict[str, Any]]) -> None:
+        """记录上游返回的 [start, end] 时间段轨迹点。"""
+        settled_end = min(end, int(time.time() - self.settle_seconds))
+        with self._lock:
+            track = self._tracks.get(key)
+            if track is None:
+                track = self._tracks[key] = _Track()
+            self._tracks.move_to_end(key)
+            before = len(track.points)
+            for point in points:
+                if isinstance(point, dict) and "utc" in point:
+                    track.points[point["utc"]] = point
+            self._npoints += len(track.points) - before
+            if settled_end >= start:
+                track.intervals = _merge_intervals([*track.intervals, (start, settled_end)])
+            while self._npoints > self.max_points and len(self._tracks) > 1:
+                _, evicted = self._tracks.popitem(last=False)
+                self._npoints -= len(evicted.points)
+
+    def points(self, key: Hashable, start: int, end: int) -> list[dict[str, Any]]:
+        """按 utc 升序返回 [start, end] 内的轨迹点。"""
+        with self._lock:
+            track = self._tracks.get(key)
+            if track is None:
+                return []
+            self._tracks.move_to_end(key)
+            selected = [point for utc, point in track.points.items() if start <= utc <= end]
+        return sorted(selected, key=lambda point: point["utc"])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tracks.clear()
+            self._npoints = 0
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+
+def _tide_day(item: Any) -> str | None:
+    if isinstance(item, dict) and isinstance(item.get("tide_date"), str):
+        return item["tide_date"][:10]
+    return None
+
+
+class TideCache:
+    """
+    按潮汐站、按天缓存潮汐数据。
+
+    潮汐响应的 data 中每个列表（如 overview、detail）的元素都带 tide_date，缓存按天拆分保存；
+    查询跨多天时只向上游补查缺失的连续日期段，再按列表和日期顺序重新拼装。线程安全。
+    """
+
+    def __init__(self, max_days: int = DEFAULT_TIDE_CACHE_DAYS, ttl: float = TIDE_DAY_TTL):
+        self.max_days = max_days
+        self.ttl = ttl
+        # 站点键 -> (列表字段名, {日期: (过期时间, {字段名: 当日元素})})
+        self._stations: OrderedDict[Hashable, tuple[tuple[str, ...], dict[str, tuple[float, dict[str, list[Any]]]]]] = OrderedDict()
+        self._ndays = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _days(start: date, end: date) -> list[str]:
+        return [(start + timedelta(days=offset)).isoformat() for offset in range((end - start).days + 1)]
+
+    def missing(self, key: Hashable, start: date, end: date) -> list[tuple[date, date]]:
+        """返回 [start, end] 内缺失的连续日期段。"""
+        now = time.monotonic()
+        with self._lock:
+            station = self._stations.get(key)
+            days = station[1] if station is not None else {}
+            present = {day for day, (expires, _) in days.items() if expires >= now}
+        runs: list[tuple[date, date]] = []
+        for day in self._days(start, end):
+            if day in present:
+                continue
+            current = date.fromisoformat(day)
+            if runs and runs[-1][1] + timedelta(days=1) == current:
+                runs[-1] = (runs[-1][0], current)
+            else:
+                runs.append((current, current))
+        return runs
+
+    def add(self, key: Hashable, start: date, end: date, data: Any) -> bool:
+        """
+        按天保存上游返回的 [start, end] 潮汐数据。
+        返回：
+            data 不是可按 tide_date 拆分的结构时返回 False，不做缓存；
+            data 含有非列表字段（如站点信息）时同样返回 False，避免拼装结果丢失这些字段
+        """
+        if not isinstance(data, dict):
+            return False
+        fields = tuple(name for name, value in data.items() if isinstance(value, list))
+        if not fields or len(fields) != len(data) or any(_tide_day(item) is None for name in fields for item in data[name]):
+            return False
+        by_day: dict[str, dict[str, list[Any]]] = {day: {name: [] for name in fields} for day in self._days(start, end)}
+        for name in fields:
+            for item in data[name]:
+                by_day.setdefault(_tide_day(item), {field: [] for field in fields})[name].append(item)
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            station = self._stations.get(key)
+            if station is None or station[0] != fields:
+                if station is not None:
+                    self._ndays -= len(station[1])
+                station = self._stations[key] = (fields, {})
+            self._stations.move_to_end(key)
+            days = station[1]
+            before = len(days)
+            for day, items in by_day.items():
+                days[day] = (expires, items)
+            self._ndays += len(days) - before
+            while self._ndays > self.max_days and len(self._stations) > 1:
+                _, (_, evicted) = self._stations.popitem(last=False)
+                self._ndays -= len(evicted)
+        return True
+
+    def assemble(self, key: Hashable, start: date, end: date) -> dict[str, list[Any]]:
+        """按列表字段和日期顺序拼装 [start, end] 的潮汐数据。"""
+        with self._lock:
+            station = self._stations.get(key)
+            if station is None:
+                return {}
+            self._stations.move_to_end(key)
+            fields, days = station
+            result: dict[str, list[Any]] = {name: [] for name in fields}
+            for day in self._days(start, end):
+                entry = days.get(day)
+                if entry is None:
+                    continue
+                for name in fields:
+                    result[name].extend(entry[1].get(name, []))
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stations.clear()
+            self._ndays = 0
+
+    def __len__(self) -> int:
+        return len(self._stations)
+
+
+def model_schema_version(model_cls: type[BaseModel]) -> str:
+    """由 Pydantic 模型的 JSON schema 计算版本号；模型字段变化后旧缓存自动失效。"""
+    schema = json.dumps(model_cls.model_json_schema(), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(schema.encode("utf-8")).hexdigest()[:16]
+
+
+class PersistentCache:
+    """
+    基于 SQLite 的磁盘响应缓存，用于港口、潮汐站、船舶档案等变化缓慢的数据。
+
+    数据库使用 WAL 模式，多个线程和进程可以同时读取；每个线程持有独立连接。
+    每条记录带有对应响应模型的 schema 版本，模型变化后旧记录在打开时被清除。
+    缓存键经过哈希后存储，磁盘上不保留 API Key 明文。
+    """
+
+    def __init__(self, cache_dir: str, models: dict[str, type[BaseModel]], stale_if_error: float = DEFAULT_STALE_IF_ERROR):
+        """
+        参数：
+            cache_dir: 缓存目录，不存在时自动创建
+            models: 需要持久化的接口名到响应模型的映射
+            stale_if_error: 过期后继续保留的秒数，与内存缓存的降级窗口一致
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, PERSISTENT_CACHE_FILENAME)
+        self.schema_versions = {endpoint: model_schema_version(model) for endpoint, model in models.items()}
+        self.stale_if_error = stale_if_error
+        self._local = threading.local()
+        self._initialize()
+
+    def handles(self, endpoint: str) -> bool:
+        return endpoint in self.schema_versions
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _initialize(self) -> None:
+        conn = self._connection()
+        if conn.execute("PRAGMA user_version").fetchone()[0] != PERSISTENT_CACHE_FORMAT:
+            conn.execute("DROP TABLE IF EXISTS responses")
+            conn.execute(f"PRAGMA user_version={PERSISTENT_CACHE_FORMAT}")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, endpoint TEXT NOT NULL, schema_version TEXT NOT NULL, "
+            "stored_at REAL NOT NULL, expires_at REAL NOT NULL, body BLOB NOT NULL)"
+        )
+        with conn:
+            conn.execute("DELETE FROM responses WHERE expires_at < ?", (time.time() - self.stale_if_error,))
+            rows = conn.execute("SELECT DISTINCT endpoint, schema_version FROM responses").fetchall()
+            for endpoint, version in rows:
+                if self.schema_versions.get(endpoint) != version:
+                    conn.execute("DELETE FROM responses WHERE endpoint = ? AND schema_version = ?", (endpoint, version))
+
+    @staticmethod
+    def _digest(key: Hashable) -> str:
+        return hashlib.sha256(json.dumps(key, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+    def get(self, key: Hashable) -> tuple[bytes, float, float] | None:
+        """返回 (JSON 字节, 写入墙钟时间, 过期墙钟时间)；不存在、schema 版本不符或数据库暂不可读时返回 None。"""
+        try:
+            row = self._connection().execute(
+                "SELECT endpoint, schema_version, stored_at, expires_at, body FROM responses WHERE key = ?",
+                (self._digest(key),),
+            ).fetchone()
+        except sqlite3.OperationalError:
+            # 与 set 一致：锁竞争或磁盘问题按未命中处理，由上游请求兜底
+            return None
+        if row is None or self.schema_versions.get(row[0]) != row[1]:
+            return None
+        return row[4], row[2], row[3]
+
+    def set(self, endpoint: str, key: Hashable, data: bytes, ttl: float) -> None:
+        now = time.time()
+        try:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO responses (key, endpoint, schema_version, stored_at, expires_at, body) VALUES (?, ?, ?, ?, ?, ?)",
+                (self._digest(key), endpoint, self.schema_versions[endpoint], now, now + ttl, data),
+            )
+        except sqlite3.OperationalError:
+            # 磁盘缓存只是加速层，写锁竞争或磁盘问题不影响本次调用
+            pass
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -1,8 +1,10 @@
 # server.py
 import argparse
+import asyncio
 import contextvars
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 from dotenv import load_dotenv
@@ -14,10 +16,11 @@ from starlette.requests import Request
 from starlette.responses import JSONResponse, PlainTextResponse
 from starlette.routing import Mount, Route
 
-from domain_catalog import describe_capabilities as catalog_describe_capabilities
 from domain_catalog import describe_object as catalog_describe_object
-from ship_service import ShipxyAPI
-from tool_registry import all_schemas, invoke_tool
+from resilience import CircuitBreakerRegistry, RateLimiter
+from response_cache import DEFAULT_CACHE_MAX_BYTES
+from ship_service import DEFAULT_CLIENT_IDLE_TIMEOUT, DEFAULT_MAX_CLIENTS, DEFAULT_POOL_MAXSIZE, ShipxyAPI, ShipxyClientRegistry, create_response_cache
+from tool_registry import describe_tool_capabilities, invoke_batch as registry_invoke_batch, invoke_tool
 from validation import validate_tool_input as validate_shipxy_tool_input
 
 load_dotenv()
@@ -26,6 +29,65 @@ api_key = os.getenv('SHIPXY_API_KEY')
 logger = logging.getLogger(__name__)
 current_api_key: contextvars.ContextVar[str | None] = contextvars.ContextVar("shipxy_api_key", default=None)
 
+# 同一进程内所有会话共享的工具执行线程数上限
+DEFAULT_MAX_CONCURRENCY = 32
+_tool_executor: ThreadPoolExecutor | None = None
+# 单次工具调用的整体截止秒数；未设置时只受各接口自身超时限制
+tool_deadline: float | None = float(os.getenv("SHIPXY_TOOL_DEADLINE")) if os.getenv("SHIPXY_TOOL_DEADLINE") else None
+
+# 按 API key 复用客户端及其连接池，同一 SSE 会话内的调用共享热连接
+# 熔断状态描述的是上游接口健康度，所有 API key 共享
+client_registry = ShipxyClientRegistry(
+    max_clients=int(os.getenv("SHIPXY_MAX_CLIENTS") or DEFAULT_MAX_CLIENTS),
+    idle_timeout=float(os.getenv("SHIPXY_CLIENT_IDLE_TIMEOUT") or DEFAULT_CLIENT_IDLE_TIMEOUT),
+    breakers=CircuitBreakerRegistry(),
+)
+
+
+def configure_rate_limit(rate: float | None = None, burst: int | None = None, per_endpoint: bool | None = None) -> None:
+    """
+    设置客户端令牌桶限流；所有客户端共享同一个限流器，按 API key 分别计数。
+    参数：
+        rate: 每个 API key 每秒允许的请求数；不传时读取 SHIPXY_RATE_LIMIT，未设置或为 0 时不限流。
+        burst: 允许的突发请求数；不传时读取 SHIPXY_RATE_BURST，默认与 rate 相同。
+        per_endpoint: 是否再按接口分别计数；不传时读取 SHIPXY_RATE_LIMIT_PER_ENDPOINT。
+    新配置只作用于之后创建的客户端，应在服务启动时调用。
+    """
+    if rate is None:
+        rate = float(os.getenv("SHIPXY_RATE_LIMIT") or 0)
+    if burst is None and os.getenv("SHIPXY_RATE_BURST"):
+        burst = int(os.getenv("SHIPXY_RATE_BURST"))
+    if per_endpoint is None:
+        per_endpoint = os.getenv("SHIPXY_RATE_LIMIT_PER_ENDPOINT", "").lower() in ("1", "true", "yes")
+    if rate > 0:
+        client_registry.client_kwargs["rate_limiter"] = RateLimiter(rate, burst, per_endpoint=per_endpoint)
+    else:
+        client_registry.client_kwargs.pop("rate_limiter", None)
+
+
+configure_rate_limit()
+
+
+def configure_cache(max_mb: float | None = None, cache_dir: str | None = None) -> None:
+    """
+    设置所有客户端共享的响应缓存。
+    参数：
+        max_mb: 内存缓存上限（MB）；不传时读取 SHIPXY_CACHE_MAX_MB，默认 64，0 表示关闭缓存。
+        cache_dir: 磁盘缓存目录；不传时读取 SHIPXY_CACHE_DIR，未设置时只使用内存缓存。
+    新配置只作用于之后创建的客户端，应在服务启动时调用。
+    """
+    if max_mb is None:
+        max_mb = float(os.getenv("SHIPXY_CACHE_MAX_MB") or DEFAULT_CACHE_MAX_BYTES / 1024 / 1024)
+    if cache_dir is None:
+        cache_dir = os.getenv("SHIPXY_CACHE_DIR")
+    if max_mb > 0:
+        client_registry.client_kwargs["cache"] = create_response_cache(int(max_mb * 1024 * 1024), cache_dir)
+    else:
+        client_registry.client_kwargs.pop("cache", None)
+
+
+configure_cache()
+
 MCP_INSTRUCTIONS = """
 Shipxy MCP 是面向海事场景的 Shipxy API 工具服务，适合给大模型、Agent、自动化工作流和 MCP 客户端调用。
 
@@ -43,12 +105,16 @@ Shipxy MCP 是面向海事场景的 Shipxy API 工具服务，适合给大模型
 2. 如果不确定参数格式，先调用 validate_tool_input，在真正请求 Shipxy 前获取字段级错误和修复建议。
 3. 如果不理解返回 JSON 字段含义，调用 describe_object 查看返回对象 schema 和中文字段解释。
 4. 如果用户只给了船名、港口名等模糊信息，先调用搜索类工具获取 MMSI、IMO、port_code 或 tide station id，再调用详情类工具。
-5. 对时间范围、区域范围、港口范围较大的查询，应尽量缩小范围，避免 Shipxy 请求超时或返回过大。
+5. 了解港口整体情况时优先调用 port_snapshot，了解单艘船完整画像时优先调用 ship_dossier，一次并发取得多个分项，不要逐个串行调用。
+6. 需要同时查询多条船、多个港口等相互独立的数据时，使用 invoke_batch 一次提交多个调用，不要逐个串行调用。
+7. 对时间范围、区域范围、港口范围较大的查询，应尽量缩小范围，避免 Shipxy 请求超时或返回过大。
 
 统一返回约定：
 1. 成功时返回 ok=true，并包含 tool、capability_ref、returns、object_refs 和 data；部分列表接口还会返回 total。
 2. 失败时返回 ok=false，并包含 error.type、error.message、endpoint、shipxy_status 和可用时的 fix 修复建议。
-3. 常见 error.type 包括 invalid_request、permission_denied、not_found、response_validation_failed、http_error、network_error、timeout、shipxy_error。
+3. 常见 error.type 包括 invalid_request、permission_denied、not_found、response_validation_failed、http_error、network_error、timeout、upstream_unavailable、rate_limited、shipxy_error。
+   网络错误、超时和 5xx 已在服务端自动退避重试；upstream_unavailable 表示该接口已熔断，应按 error.circuit.retry_after 等待后再试，不要立即重复调用。
+   rate_limited 表示本地限流排队超过了调用截止时间，应降低调用频率后再试。
 4. response_validation_failed 表示 Shipxy 实际返回和本地 schema 不完全一致；raw/data 仍会尽量保留原始数据，Agent 应优先向用户说明 schema 漂移，而不是直接丢弃结果。
 
 使用要求：
@@ -72,8 +138,53 @@ mcp = FastMCP(
 
 
 def create_shipxy_api() -> ShipxyAPI:
-    """创建ShipxyAPI实例"""
-    return ShipxyAPI(api_key=current_api_key.get() or api_key)
+    """获取当前 API key 对应的 ShipxyAPI 实例，同一 key 复用同一个客户端。"""
+    return client_registry.get(current_api_key.get() or api_key)
+
+
+def configure_concurrency(max_workers: int | None = None) -> None:
+    """
+    设置本进程同时执行 Shipxy 工具调用的最大线程数。
+    参数：
+        max_workers: 最大并发数；不传时读取 SHIPXY_MAX_CONCURRENCY，默认 32。
+    """
+    global _tool_executor
+    if max_workers is None:
+        max_workers = int(os.getenv("SHIPXY_MAX_CONCURRENCY") or DEFAULT_MAX_CONCURRENCY)
+    if max_workers < 1:
+        raise ValueError("max_workers 必须大于 0")
+    previous = _tool_executor
+    _tool_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shipxy-tool")
+    # 连接池不小于并发数，避免并发调用同一个 key 时连接被丢弃重建
+    client_registry.client_kwargs["pool_maxsize"] = max(max_workers, DEFAULT_POOL_MAXSIZE)
+    if previous is not None:
+        previous.shutdown(wait=False)
+
+
+def _get_tool_executor() -> ThreadPoolExecutor:
+    if _tool_executor is None:
+        configure_concurrency()
+    return _tool_executor
+
+
+def _invoke_shipxy_tool(tool_name: str, values: dict[str, Any]) -> dict[str, Any]:
+    # 借出期间客户端即使被注册表移除也不会被关闭
+    with client_registry.lease(current_api_key.get() or api_key) as client:
+        return invoke_tool(client, tool_name, values, deadline=tool_deadline)
+
+
+def _invoke_shipxy_batch(calls: list[dict[str, Any]], max_concurrency: int | None) -> dict[str, Any]:
+    kwargs = {"max_concurrency": max_concurrency} if max_concurrency else {}
+    with client_registry.lease(current_api_key.get() or api_key) as client:
+        return registry_invoke_batch(client, calls, deadline=tool_deadline, **kwargs)
+
+
+async def run_shipxy_tool(tool_name: str, values: dict[str, Any]) -> dict[str, Any]:
+    """在有界线程池中执行阻塞的 Shipxy 调用，避免慢请求阻塞事件循环上的其他会话。"""
+    # 复制当前上下文，使 SSE 连接设置的 current_api_key 在工作线程中同样可见
+    context = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_tool_executor(), context.run, _invoke_shipxy_tool, tool_name, values)
 
 
 def _mask_api_key(value: str) -> str:
@@ -109,6 +220,8 @@ def create_starlette_app(mcp_server: Server, *, debug: bool = False) -> Starlett
             )
 
         logger.info("SSE connection authenticated with Shipxy API key %s", _mask_api_key(connection_api_key))
+        # 提前取出客户端，整个会话复用同一个连接池
+        client_registry.get(connection_api_key)
         token = current_api_key.set(connection_api_key)
         try:
             async with sse.connect_sse(
@@ -155,7 +268,7 @@ def describe_capabilities(tool_name: str = None) -> dict[str, Any]:
     参数：
         tool_name: 可选工具名；不传则返回全部能力目录。
     """
-    return catalog_describe_capabilities(all_schemas(), tool_name)
+    return describe_tool_capabilities(tool_name)
 
 
 @mcp.tool()
@@ -178,9 +291,23 @@ def validate_tool_input(tool_name: str, arguments: dict[str, Any]) -> dict[str,
     """
     return validate_shipxy_tool_input(tool_name, arguments)
 
+
+@mcp.tool()
+async def invoke_batch(calls: list[dict[str, Any]], max_concurrency: int = None) -> dict[str, Any]:
+    """
+    在一次 MCP 调用中批量执行多个 Shipxy 工具，适合一次查询多条船、多个港口等相互独立的请求。
+    先校验全部调用，任一条入参不合法时整批返回 invalid_request 且不会请求 Shipxy；results 与 calls 顺序一一对应，单条失败不影响其他调用。
+    参数：
+        calls: 调用列表，每条为 {"tool_name": "get_single_ship", "arguments": {"mmsi": 413000000}}，最多 50 条。
+        max_concurrency: 可选，本批次最大并发数，默认 8，最大 16。
+    """
+    context = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_tool_executor(), context.run, _invoke_shipxy_batch, calls, max_concurrency)
+
 # ShipxyAPI工具封装
 @mcp.tool()
-def search_ship(keywords: str, max_results: int = None) -> dict[str, Any]:
+async def search_ship(keywords: str, max_results: int = None) -> dict[str, Any]:
     """
     船舶模糊查询服务，是使用关键字（mmsi、imo、船名、呼号等）作为查询条件，模糊查询出所有符合条件的船舶静态信息；当使用imo作为输入时，可以查询该imo编号下，曾经使用的所有mmsi记录；当使用船名作为查询输入时，可以查询该船名所有历史使用船舶的信息。
     注：MMSI 中文称为水上移动业务标识码，是一种九位数字码，用于船舶无线电通信系统中，能够独特识别各类台站和成组呼叫台站。MMSI具有唯一性，每条船都有一个对应的MMSI码，通常被称为“一船一码”或“九位码”‌，同一条船舶mmsi编号有可能在售卖后变更，mmsi前三位代表国家和地区。
@@ -193,10 +320,10 @@ def search_ship(keywords: str, max_results: int = None) -> dict[str, Any]:
     异常：
         请求失败或返回错误码。
     """
-    return invoke_tool(create_shipxy_api(), "search_ship", locals())
+    return await run_shipxy_tool("search_ship", locals())
 
 @mcp.tool()
-def get_single_ship(mmsi: int) -> dict[str, Any]:
+async def get_single_ship(mmsi: int) -> dict[str, Any]:
     """
     单船位置查询
     根据船舶mmsi编码查询船舶的基础静态信息以及船舶的实时动态信息，包括船舶imo编号、呼号、船舶中英文名称、船舶类型、长度宽度以及AIS最新更新上报的船舶实时位置、航行状态、船舶目的港口、船舶实时速度、预计到达目的港的时间、航首向航迹向等。
@@ -205,22 +332,35 @@ def get_single_ship(mmsi: int) -> dict[str, Any]:
     返回：
         SingleShipResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "get_single_ship", locals())
+    return await run_shipxy_tool("get_single_ship", locals())
+
+@mcp.tool()
+async def ship_dossier(mmsi: int, port_code: str = None) -> dict[str, Any]:
+    """
+    船舶档案汇总
+    并发查询船舶实时位置、船舶档案、挂靠状态、船籍和精准 ETA，合并为一个结果，耗时约等于最慢的单个查询；各分项与单独调用对应工具共用缓存。
+    参数：
+        mmsi: 船舶mmsi编号
+        port_code: 可选，精准 ETA 的目的港五位码；不传时使用船舶上报的目的港
+    返回：
+        data.position、data.particulars、data.status、data.registry、data.eta 为各分项的完整结果（含 meta.elapsed_ms）；失败分项列在 section_errors 中，不影响其他分项
+    """
+    return await run_shipxy_tool("ship_dossier", locals())
 
 @mcp.tool()
-def get_many_ship(mmsis: list[int]) -> dict[str, Any]:
+async def get_many_ship(mmsis: list[int]) -> dict[str, Any]:
     """
     多船位置查询
     根据多个船舶船舶mmsi编码查询船舶的基础静态信息以及船舶的实时动态信息，包括船舶imo编号、呼号、船舶中英文名称、船舶类型、长度宽度以及AIS最新更新上报的船舶实时位置、航行状态、船舶目的港口、船舶实时速度、预计到达目的港的时间、航首向航迹向等。
     参数：
-        mmsis: 船舶mmsi编号列表（最多100个）
+        mmsis: 船舶mmsi编号列表（默认最多50000个；超过100个时自动去重、分组并发查询，部分分组失败时返回 chunk_errors）
     返回：
         ManyShipResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "get_many_ship", locals())
+    return await run_shipxy_tool("get_many_ship", locals())
 
 @mcp.tool()
-def get_fleet_ship(fleet_id: str) -> dict[str, Any]:
+async def get_fleet_ship(fleet_id: str) -> dict[str, Any]:
     """
     船队船位置查询
     控制台中维护的船队id，查询船队下所有船舶数据。
@@ -229,10 +369,10 @@ def get_fleet_ship(fleet_id: str) -> dict[str, Any]:
     返回：
         FleetShipResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "get_fleet_ship", locals())
+    return await run_shipxy_tool("get_fleet_ship", locals())
 
 @mcp.tool()
-def get_surrounding_ship(mmsi: int) -> dict[str, Any]:
+async def get_surrounding_ship(mmsi: int) -> dict[str, Any]:
     """
     周边船舶查询
     通过船舶的 MMSI进行查询，获取以当前船舶位置为圆心以 10 海里为半径的圆形区域内的船舶数据。返回的船舶数据列表按照由近及远进行排序，返回的数据包括船舶imo编号、呼号、船舶中英文名称、船舶类型、长度宽度以及AIS最新更新上报的船舶实时位置、航行状态、船舶目的港口、船舶实时速度、预计到达目的港的时间、航首向航迹向等。 
@@ -241,10 +381,10 @@ def get_surrounding_ship(mmsi: int) -> dict[str, Any]:
     返回：
         SurRoundingShipResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "get_surrounding_ship", locals())
+    return await run_shipxy_tool("get_surrounding_ship", locals())
 
 @mcp.tool()
-def get_area_ship(region: str, output: int = 1, scode: int = None) -> dict[str, Any]:
+async def get_area_ship(region: str, output: int = 1, scode: int = None, max_pages: int = None) -> dict[str, Any]:
     """
     区域船舶查询
     通过船舶的 MMSI进行查询，获取以当前船舶位置为圆心以 10 海里为半径的圆形区域内的船舶数据。返回的船舶数据列表按照由近及远进行排序，返回的数据包括船舶imo编号、呼号、船舶中英文名称、船舶类型、长度宽度以及AIS最新更新上报的船舶实时位置、航行状态、船舶目的港口、船舶实时速度、预计到达目的港的时间、航首向航迹向等。 
@@ -252,13 +392,14 @@ def get_area_ship(region: str, output: int = 1, scode: int = None) -> dict[str,
         region: 区域字符串（lng,lat-lng,lat-...）
         output: 输出格式，1为json，0为base64
         scode: 会话令牌（可选）
+        max_pages: 可选，上游返回 continue 时自动翻页的最大页数（最多 50），各页船舶合并返回；不传时只返回一页
     返回：
         AreaShipResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "get_area_ship", locals())
+    return await run_shipxy_tool("get_area_ship", locals())
 
 @mcp.tool()
-def get_ship_registry(mmsi: int) -> dict[str, Any]:
+async def get_ship_registry(mmsi: int) -> dict[str, Any]:
     """
     船籍信息查询
     通过船舶的mmsi编号来查询匹配船舶的船籍国家或地区信息。
@@ -267,10 +408,10 @@ def get_ship_registry(mmsi: int) -> dict[str, Any]:
     返回：
         ShipRegistryResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "get_ship_registry", locals())
+    return await run_shipxy_tool("get_ship_registry", locals())
 
 @mcp.tool()
-def search_ship_particular(mmsi: int = None, imo: int = None, call_sign: str = None, ship_name: str = None) -> dict[str, Any]:
+async def search_ship_particular(mmsi: int = None, imo: int = None, call_sign: str = None, ship_name: str = None) -> dict[str, Any]:
     """
     船舶档案查询
     通过船舶的mmsi编号、imo编号、呼号或者船舶的英文名称来查询船舶的劳式档案数据。注：只有具备imo编号的船舶有档案记录
@@ -282,10 +423,10 @@ def search_ship_particular(mmsi: int = None, imo: int = None, call_sign: str = N
     返回：
         SearchShipParticularResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "search_ship_particular", locals())
+    return await run_shipxy_tool("search_ship_particular", locals())
 
 @mcp.tool()
-def search_port(keywords: str, max_results: int = None) -> dict[str, Any]:
+async def search_port(keywords: str, max_results: int = None) -> dict[str, Any]:
     """
     港口查询
     对全球港口数据进行模糊查询，支持通过港口的中英文名称和五位码模糊检索获取港口的基本信息，包括港口中英文名称、港口五位码、港口所在时区等。返回结果中获取的五位码是船讯网以港口维度查询数据的唯一标识。
@@ -295,10 +436,10 @@ def search_port(keywords: str, max_results: int = None) -> dict[str, Any]:
     返回：
         SearchPortResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "search_port", locals())
+    return await run_shipxy_tool("search_port", locals())
 
 @mcp.tool()
-def get_berth_ships(port_code: str, ship_type: int = None) -> dict[str, Any]:
+async def get_berth_ships(port_code: str, ship_type: int = None) -> dict[str, Any]:
     """
     港口靠泊船舶查询
     使用港口五位码查询当前港口正在靠泊的全部船舶信息，包括当前靠泊船的总数量、船舶类型、船舶基础信息、船舶到达港口时间和停留时间。
@@ -308,10 +449,10 @@ def get_berth_ships(port_code: str, ship_type: int = None) -> dict[str, Any]:
     返回：
         GetBerthShipsResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "get_berth_ships", locals())
+    return await run_shipxy_tool("get_berth_ships", locals())
 
 @mcp.tool()
-def get_anchor_ships(port_code: str, ship_type: int = None) -> dict[str, Any]:
+async def get_anchor_ships(port_code: str, ship_type: int = None) -> dict[str, Any]:
     """
     港口锚地船舶查询
     使用港口五位码查询当前港口正在锚地的全部船舶信息，包括当前港口锚地等待船舶的总数量、船舶类型、船舶基础信息、船舶到达港口时间和停留时间。
@@ -321,10 +462,10 @@ def get_anchor_ships(port_code: str, ship_type: int = None) -> dict[str, Any]:
     返回：
         GetAnchorShipsResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "get_anchor_ships", locals())
+    return await run_shipxy_tool("get_anchor_ships", locals())
 
 @mcp.tool()
-def get_eta_ships(port_code: str, start_time: int, end_time: int, ship_type: int = None) -> dict[str, Any]:
+async def get_eta_ships(port_code: str, start_time: int, end_time: int, ship_type: int = None) -> dict[str, Any]:
     """
     预抵港船舶查询
     使用港口五位码和时间周期查询在未来某一时间段预计到达该港口的船舶列表和船舶信息。
@@ -336,10 +477,24 @@ def get_eta_ships(port_code: str, start_time: int, end_time: int, ship_type: int
     返回：
         GetETAShipsResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "get_eta_ships", locals())
+    return await run_shipxy_tool("get_eta_ships", locals())
 
 @mcp.tool()
-def get_ship_track(mmsi: int, start_time: int, end_time: int, output: int = 1) -> dict[str, Any]:
+async def port_snapshot(port_code: str, window_hours: int = 24, ship_type: int = None) -> dict[str, Any]:
+    """
+    港口概览
+    并发查询港口当前靠泊船舶、锚地船舶、未来 window_hours 小时的预抵港船舶和过去 window_hours 小时的靠港记录，合并为一个结果，耗时约等于最慢的单个查询。
+    参数：
+        port_code: 港口标准五位码
+        window_hours: 预抵港和靠港记录的查询小时数，默认 24，最大 168
+        ship_type: 船舶类型（可选）
+    返回：
+        data.berth_ships、data.anchor_ships、data.eta_ships、data.port_calls 为各分项的完整结果；失败分项列在 section_errors 中，不影响其他分项
+    """
+    return await run_shipxy_tool("port_snapshot", locals())
+
+@mcp.tool()
+async def get_ship_track(mmsi: int, start_time: int, end_time: int, output: int = 1) -> dict[str, Any]:
     """
     船舶轨迹查询
     通过船舶的mmsi编号和时间段，查询船舶历史经过的轨迹点。
@@ -351,10 +506,10 @@ def get_ship_track(mmsi: int, start_time: int, end_time: int, output: int = 1) -
     返回：
         GetShipTrackResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "get_ship_track", locals())
+    return await run_shipxy_tool("get_ship_track", locals())
 
 @mcp.tool()
-def search_ship_approach(mmsi: int, start_time: int, end_time: int, approach_zone: int = None) -> dict[str, Any]:
+async def search_ship_approach(mmsi: int, start_time: int, end_time: int, approach_zone: int = None) -> dict[str, Any]:
     """
     船舶搭靠事件查询
     查询指定船舶在一段时间内是否有搭靠行为，如果有搭靠行为则列出搭靠的船舶详细信息以及搭靠的位置、坐标、搭靠开始时间、结束时间等。根据全球船舶实时位置监控，测算两船贴近停靠或并排行驶超过5分钟，则判定为船舶搭靠。
@@ -366,10 +521,10 @@ def search_ship_approach(mmsi: int, start_time: int, end_time: int, approach_zon
     返回：
         SearchShipApproachResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "search_ship_approach", locals())
+    return await run_shipxy_tool("search_ship_approach", locals())
 
 @mcp.tool()
-def get_port_of_call_by_ship(mmsi: int, start_time: int, end_time: int, imo: int = None, ship_name: str = None, call_sign: str = None, time_zone: int = 2) -> dict[str, Any]:
+async def get_port_of_call_by_ship(mmsi: int, start_time: int, end_time: int, imo: int = None, ship_name: str = None, call_sign: str = None, time_zone: int = 2) -> dict[str, Any]:
     """
     船舶靠港记录查询
     查询船舶在一段时间以内的历史靠港记录，可以获得船舶到达锚地的时间、到达港口范围以及停靠到泊位的时间，以及船舶在港口停留的时长，进出港的吃水情况等。
@@ -384,10 +539,10 @@ def get_port_of_call_by_ship(mmsi: int, start_time: int, end_time: int, imo: int
     返回：
         GetPortOfCallByShipResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "get_port_of_call_by_ship", locals())
+    return await run_shipxy_tool("get_port_of_call_by_ship", locals())
 
 @mcp.tool()
-def get_port_of_call_by_ship_port(mmsi: int, port_code: str, start_time: int, end_time: int, imo: int = None, ship_name: str = None, call_sign: str = None, time_zone: int = 2) -> dict[str, Any]:
+async def get_port_of_call_by_ship_port(mmsi: int, port_code: str, start_time: int, end_time: int, imo: int = None, ship_name: str = None, call_sign: str = None, time_zone: int = 2) -> dict[str, Any]:
     """
     船舶在指定港口的靠港记录查询
     查询船舶在一段时间以内的在某一具体港口靠港的记录，可以获得船舶到达锚地的时间、到达港口范围以及停靠到泊位的时间，以及船舶在港口停留的时长，进出港的吃水情况等。
@@ -403,10 +558,10 @@ def get_port_of_call_by_ship_port(mmsi: int, port_code: str, start_time: int, en
     返回：
         GetPortOfCallByShipPortResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "get_port_of_call_by_ship_port", locals())
+    return await run_shipxy_tool("get_port_of_call_by_ship_port", locals())
 
 @mcp.tool()
-def get_ship_status(mmsi: int, imo: int = None, ship_name: str = None, call_sign: str = None, time_zone: int = 2) -> dict[str, Any]:
+async def get_ship_status(mmsi: int, imo: int = None, ship_name: str = None, call_sign: str = None, time_zone: int = 2) -> dict[str, Any]:
     """
     船舶当前挂靠信息查询
     查询船舶当前时间点是否挂靠了港口，如果当前正在某一港口挂靠，则可以获得当前挂靠港口的信息以及入港时间。
@@ -419,10 +574,10 @@ def get_ship_status(mmsi: int, imo: int = None, ship_name: str = None, call_sign
     返回：
         GetShipStatusResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "get_ship_status", locals())
+    return await run_shipxy_tool("get_ship_status", locals())
 
 @mcp.tool()
-def get_port_of_call_by_port(port_code: str, start_time: int, end_time: int, type_: int = 1, time_zone: int = 2) -> dict[str, Any]:
+async def get_port_of_call_by_port(port_code: str, start_time: int, end_time: int, type_: int = 1, time_zone: int = 2) -> dict[str, Any]:
     """
     港口靠港记录查询
     使用港口五位码查询港口在某一时间周期内历史靠泊的所有船舶信息。包括船舶基础信息、船舶在该港口的靠港记录以及船舶在上一个港口和下一个港口的靠港记录信息。
@@ -435,10 +590,10 @@ def get_port_of_call_by_port(port_code: str, start_time: int, end_time: int, typ
     返回：
         GetPortOfCallByPortResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "get_port_of_call_by_port", locals())
+    return await run_shipxy_tool("get_port_of_call_by_port", locals())
 
 @mcp.tool()
-def plan_route_by_point(start_point: str, end_point: str = None, end_port_code: str = None, avoid: str = None, through: str = None) -> dict[str, Any]:
+async def plan_route_by_point(start_point: str, end_point: str = None, end_port_code: str = None, avoid: str = None, through: str = None) -> dict[str, Any]:
     """
     点到点/点到港航线规划
     查询起点坐标到终点坐标或终点港口之间的航线规划，获取航线的总里程以及航线经过的点位坐标经纬度。
@@ -451,10 +606,10 @@ def plan_route_by_point(start_point: str, end_point: str = None, end_port_code:
     返回：
         PlanRouteByPointResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "plan_route_by_point", locals())
+    return await run_shipxy_tool("plan_route_by_point", locals())
 
 @mcp.tool()
-def plan_route_by_port(start_port_code: str, end_port_code: str, avoid: str = None, through: str = None) -> dict[str, Any]:
+async def plan_route_by_port(start_port_code: str, end_port_code: str, avoid: str = None, through: str = None) -> dict[str, Any]:
     """
     港口到港口航线规划
     查询两个港口之间的航线规划，获取航线的总里程以及航线经过的点位坐标经纬度。
@@ -466,10 +621,10 @@ def plan_route_by_port(start_port_code: str, end_port_code: str, avoid: str = No
     返回：
         PlanRouteByPortResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "plan_route_by_port", locals())
+    return await run_shipxy_tool("plan_route_by_port", locals())
 
 @mcp.tool()
-def get_single_eta_precise(mmsi: int, port_code: str = None, speed: float = None) -> dict[str, Any]:
+async def get_single_eta_precise(mmsi: int, port_code: str = None, speed: float = None) -> dict[str, Any]:
     """
     预计到达时间(ETA)查询
     查询船舶在出发港的靠泊信息实际离港时间以及去往下一个目的港的总航程、已行驶航程和预计到达时间的预估。
@@ -480,10 +635,10 @@ def get_single_eta_precise(mmsi: int, port_code: str = None, speed: float = None
     返回：
         GetSingleETAPreciseResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "get_single_eta_precise", locals())
+    return await run_shipxy_tool("get_single_eta_precise", locals())
 
 @mcp.tool()
-def get_weather_by_point(lng: float, lat: float, weather_time: int = None) -> dict[str, Any]:
+async def get_weather_by_point(lng: float, lat: float, weather_time: int = None) -> dict[str, Any]:
     """
     单点海洋气象查询
     根据位置坐标查询全球的海洋气象数据，包括气压、气压流向、风向、风速、浪高、可见度等航海场景常用的气象信息。
@@ -494,10 +649,10 @@ def get_weather_by_point(lng: float, lat: float, weather_time: int = None) -> di
     返回：
         GetWeatherByPointResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "get_weather_by_point", locals())
+    return await run_shipxy_tool("get_weather_by_point", locals())
 
 @mcp.tool()
-def get_weather(weather_type: int) -> dict[str, Any]:
+async def get_weather(weather_type: int) -> dict[str, Any]:
     """
     海区气象查询
     获取全球海区未来72小时以内的气象数据，以整个海区范围作为预报维度，数据不如单点海洋气象精准。
@@ -506,20 +661,20 @@ def get_weather(weather_type: int) -> dict[str, Any]:
     返回：
         GetWeatherResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "get_weather", locals())
+    return await run_shipxy_tool("get_weather", locals())
 
 @mcp.tool()
-def get_all_typhoon() -> dict[str, Any]:
+async def get_all_typhoon() -> dict[str, Any]:
     """
     获取全球台风列表
     查询近三年全球的台风数据，包括台风的位置、走向、风速、风级、半径等信息。请求数据时，需要先获取全球台风列表，再根据返回的台风信息中的台风id，查询单个台风的数据详情。
     返回：
         GetAllTyphoonResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "get_all_typhoon", locals())
+    return await run_shipxy_tool("get_all_typhoon", locals())
 
 @mcp.tool()
-def get_single_typhoon(typhoon_id: int) -> dict[str, Any]:
+async def get_single_typhoon(typhoon_id: int) -> dict[str, Any]:
     """
     获取单个台风信息，包括台风的位置、走向、风速、风级、半径等信息。请求数据时，需要先获取全球台风列表，再根据返回的台风信息中的台风id，查询单个台风的数据详情。
     
@@ -528,20 +683,20 @@ def get_single_typhoon(typhoon_id: int) -> dict[str, Any]:
     返回：
         GetSingleTyphoonResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "get_single_typhoon", locals())
+    return await run_shipxy_tool("get_single_typhoon", locals())
 
 @mcp.tool()
-def get_tides() -> dict[str, Any]:
+async def get_tides() -> dict[str, Any]:
     """
     查询国内潮汐观测站列表
     查询国内潮汐观测站每天24小时潮汐变化数据。其中潮汐高度是根据每个港口的潮汐基准面计算的高度数据，不同港口的潮汐基准面不同，需要在请求并计算数据时注意。
     返回：
         GetTidesResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "get_tides", locals())
+    return await run_shipxy_tool("get_tides", locals())
 
 @mcp.tool()
-def get_tide_data(port_code: int, start_date: str, end_date: str) -> dict[str, Any]:
+async def get_tide_data(port_code: int, start_date: str, end_date: str) -> dict[str, Any]:
     """
     查询单个港口潮汐观测站详情
     查询国内潮汐观测站每天24小时潮汐变化数据。其中潮汐高度是根据每个港口的潮汐基准面计算的高度数据，不同港口的潮汐基准面不同，需要在请求并计算数据时注意。
@@ -552,21 +707,21 @@ def get_tide_data(port_code: int, start_date: str, end_date: str) -> dict[str, A
     返回：
         GetTideDataResponse: 查询结果，强类型返回
     """
-    return invoke_tool(create_shipxy_api(), "get_tide_data", locals())
+    return await run_shipxy_tool("get_tide_data", locals())
 
 
 @mcp.tool()
-def get_global_tides() -> dict[str, Any]:
+async def get_global_tides() -> dict[str, Any]:
     """
     查询全球潮汐观测站列表。
     返回：
         全球潮汐观测站列表；返回的 port_code 是潮汐站 id，不是港口五位码。
     """
-    return invoke_tool(create_shipxy_api(), "get_global_tides", locals())
+    return await run_shipxy_tool("get_global_tides", locals())
 
 
 @mcp.tool()
-def get_global_tide_data(port_code: int, start_date: str, end_date: str) -> dict[str, Any]:
+async def get_global_tide_data(port_code: int, start_date: str, end_date: str) -> dict[str, Any]:
     """
     查询单个全球潮汐观测站详情。
     参数：
@@ -576,11 +731,11 @@ def get_global_tide_data(port_code: int, start_date: str, end_date: str) -> dict
     返回：
         全球潮汐概览和逐小时潮高数据。
     """
-    return invoke_tool(create_shipxy_api(), "get_global_tide_data", locals())
+    return await run_shipxy_tool("get_global_tide_data", locals())
 
 
 @mcp.tool()
-def current_weather(lng: float, lat: float) -> dict[str, Any]:
+async def current_weather(lng: float, lat: float) -> dict[str, Any]:
     """
     新全球实时气象查询。
     参数：
@@ -589,11 +744,11 @@ def current_weather(lng: float, lat: float) -> dict[str, Any]:
     返回：
         实时大气气象和海洋气象数据。
     """
-    return invoke_tool(create_shipxy_api(), "current_weather", locals())
+    return await run_shipxy_tool("current_weather", locals())
 
 
 @mcp.tool()
-def future_weather(lng: float, lat: float) -> dict[str, Any]:
+async def future_weather(lng: float, lat: float) -> dict[str, Any]:
     """
     新全球未来气象预报查询。
     参数：
@@ -602,11 +757,11 @@ def future_weather(lng: float, lat: float) -> dict[str, Any]:
     返回：
         未来大气气象和海洋气象预报数据。
     """
-    return invoke_tool(create_shipxy_api(), "future_weather", locals())
+    return await run_shipxy_tool("future_weather", locals())
 
 
 @mcp.tool()
-def history_weather(lng: float, lat: float, start_time: str, end_time: str) -> dict[str, Any]:
+async def history_weather(lng: float, lat: float, start_time: str, end_time: str) -> dict[str, Any]:
     """
     历史气象记录查询。
     参数：
@@ -617,11 +772,11 @@ def history_weather(lng: float, lat: float, start_time: str, end_time: str) -> d
     返回：
         指定日期的大气气象和海洋气象历史数据。
     """
-    return invoke_tool(create_shipxy_api(), "history_weather", locals())
+    return await run_shipxy_tool("history_weather", locals())
 
 
 @mcp.tool()
-def get_nav_warning(start_time: str, end_time: str) -> dict[str, Any]:
+async def get_nav_warning(start_time: str, end_time: str) -> dict[str, Any]:
     """
     航行警告查询。
     参数：
@@ -630,7 +785,7 @@ def get_nav_warning(start_time: str, end_time: str) -> dict[str, Any]:
     返回：
         中国海事局航行警告列表。
     """
-    return invoke_tool(create_shipxy_api(), "get_nav_warning", locals())
+    return await run_shipxy_tool("get_nav_warning", locals())
 
 
 if __name__ == "__main__":
@@ -639,8 +794,22 @@ if __name__ == "__main__":
     parser.add_argument("--host", help="SSE 绑定主机；传入该参数时默认启动 SSE。")
     parser.add_argument("--port", type=int, help="SSE 监听端口；传入该参数时默认启动 SSE。")
     parser.add_argument("--debug", action="store_true", help="启用 Starlette debug 模式。")
+    parser.add_argument("--max-concurrency", type=int, help="同时执行的 Shipxy 工具调用数上限；默认读取 SHIPXY_MAX_CONCURRENCY 或 32。")
+    parser.add_argument("--tool-deadline", type=float, help="单次工具调用的整体截止秒数；默认读取 SHIPXY_TOOL_DEADLINE。")
+    parser.add_argument("--rate-limit", type=float, help="每个 API Key 每秒请求数上限；默认读取 SHIPXY_RATE_LIMIT，不设置时不限流。")
+    parser.add_argument("--rate-burst", type=int, help="限流允许的突发请求数；默认读取 SHIPXY_RATE_BURST。")
+    parser.add_argument("--cache-max-mb", type=float, help="响应缓存上限（MB）；默认读取 SHIPXY_CACHE_MAX_MB 或 64，0 表示关闭。")
+    parser.add_argument("--cache-dir", help="磁盘缓存目录，潮汐站、港口和船舶档案查询跨进程复用；默认读取 SHIPXY_CACHE_DIR。")
     args = parser.parse_args()
 
+    configure_concurrency(args.max_concurrency)
+    if args.cache_max_mb is not None or args.cache_dir is not None:
+        configure_cache(args.cache_max_mb, args.cache_dir)
+    if args.rate_limit is not None or args.rate_burst is not None:
+        configure_rate_limit(args.rate_limit, args.rate_burst)
+    if args.tool_deadline is not None:
+        tool_deadline = args.tool_deadline
+
     transport = args.transport or ("sse" if args.host or args.port else "stdio")
     if transport == "sse":
         run_sse_server(host=args.host or "0.0.0.0", port=args.port or 18081, debug=args.debug)
@@ -1,15 +1,244 @@
+import asyncio
+import contextvars
+import inspect
 import requests
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
+import httpx
 from dotenv import load_dotenv
-from typing import Optional, Dict, List, Any, Tuple
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator
+from contextlib import contextmanager
+from typing import Optional, Dict, List, Any, Tuple, Awaitable, Callable, TypeVar
 import requests
 import time
-from datetime import datetime
+from datetime import date, datetime
 from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from requests.adapters import HTTPAdapter
+
+from area_tiling import DEFAULT_AREA_TILE_DEGREES, format_region, merge_tile_ships, parse_region, tile_polygon
+from resilience import AsyncSingleFlight, CircuitBreaker, CircuitBreakerRegistry, RateLimiter, RetryPolicy, SingleFlight
+from response_cache import CACHE_HIT, CACHE_MISS, CACHE_PARTIAL, CACHE_STALE, DEFAULT_CACHE_MAX_BYTES, CachedResponse, PersistentCache, ResponseCache, TideCache, TrackCache
 
 
 DEFAULT_TIMEOUT = 30
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_ASYNC_MAX_CONNECTIONS = 100
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+DEFAULT_MAX_CLIENTS = 256
+DEFAULT_CLIENT_IDLE_TIMEOUT = 600.0
+# 同步客户端内部并发拆分请求（分块、分时段、分区域）时单次调用的最大并发数，实际速率仍受限流器约束
+DEFAULT_FANOUT_WORKERS = 8
+# 进程内所有 fan_out 共享的线程池大小；嵌套的 fan_out 在当前线程内顺序执行，线程总数不随嵌套层数增长
+FANOUT_POOL_SIZE = int(os.getenv("SHIPXY_FANOUT_POOL_SIZE") or 32)
+# GetManyShip 单次请求最多 100 个 MMSI；更多时自动去重分块并发查询
+MANY_SHIP_CHUNK_SIZE = 100
+# 单次 get_many_ship 接受的 MMSI 上限，只为防止失控输入（每 100 个 MMSI 一次上游请求，默认上限对应 500 次请求），
+# 数千条船的关注列表可以一次查询；可用 SHIPXY_MAX_MANY_SHIP_MMSIS 调整
+MAX_MANY_SHIP_MMSIS = int(os.getenv("SHIPXY_MAX_MANY_SHIP_MMSIS") or 50000)
+# GetShipTrack 时间范围超过该秒数时按子窗口拆分并发查询，避免单次请求超时或响应过大；0 表示不拆分
+DEFAULT_TRACK_WINDOW_SECONDS = 3 * 86400
+# GetAreaShip 自动翻页时最多跟随的页数，防止上游持续返回 continue 时无限翻页
+MAX_AREA_SHIP_PAGES = 50
+# port_snapshot 的预抵港与历史靠港查询窗口（小时）
+DEFAULT_SNAPSHOT_WINDOW_HOURS = 24
+MAX_SNAPSHOT_WINDOW_HOURS = 168
+
+
+# 各接口的 (连接超时, 读取超时)，单位秒：轻量查询快速失败，历史/区域类重查询给足时间
+ENDPOINT_TIMEOUTS: dict[str, tuple[float, float]] = {
+    "SearchShip": (3.05, 10),
+    "GetSingleShip": (3.05, 10),
+    "GetManyShip": (3.05, 20),
+    "GetFleetShip": (3.05, 20),
+    "GetSurRoundingShip": (3.05, 15),
+    "GetAreaShip": (DEFAULT_CONNECT_TIMEOUT, 60),
+    "GetShipRegistry": (3.05, 10),
+    "SearchShipParticular": (3.05, 15),
+    "SearchPort": (3.05, 10),
+    "GetBerthShips": (3.05, 20),
+    "GetAnchorShips": (3.05, 20),
+    "GetETAShips": (3.05, 30),
+    "GetShipTrack": (DEFAULT_CONNECT_TIMEOUT, 90),
+    "SearchshipApproach": (DEFAULT_CONNECT_TIMEOUT, 60),
+    "GetPortofCallByShip": (DEFAULT_CONNECT_TIMEOUT, 60),
+    "GetPortofCallByShipPort": (DEFAULT_CONNECT_TIMEOUT, 60),
+    "GetShipStatus": (3.05, 15),
+    "GetPortofCallByPort": (DEFAULT_CONNECT_TIMEOUT, 90),
+    "PlanRouteByPoint": (DEFAULT_CONNECT_TIMEOUT, 30),
+    "PlanRouteByPort": (DEFAULT_CONNECT_TIMEOUT, 30),
+    "GetSingleETAPrecise": (3.05, 20),
+    "GetWeather": (3.05, 20),
+    "GetAllTyphoon": (3.05, 15),
+    "GetSingleTyphoon": (3.05, 15),
+    "GetTides": (3.05, 30),
+    "GetTideData": (3.05, 15),
+    "GetWeatherByPoint": (3.05, 15),
+    "GetGlobalTides": (3.05, 60),
+    "GetGlobalTideData": (3.05, 20),
+    "CurrentWeather": (3.05, 15),
+    "FutureWeather": (3.05, 20),
+    "HistoryWeather": (DEFAULT_CONNECT_TIMEOUT, 60),
+    "GetNavWarning": (3.05, 20),
+}
+
+# 当前调用链的整体截止时间（time.monotonic() 绝对值），由 request_deadline 设置
+_request_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("shipxy_request_deadline", default=None)
+
+
+# 当前 Shipxy 方法调用的客户端元数据（限流等待、缓存命中等），由方法包装器附加到返回的 meta 字段
+_call_metadata: contextvars.ContextVar[dict[str, Any] | None] = contextvars.ContextVar("shipxy_call_metadata", default=None)
+
+
+def _record_call_meta(key: str, value: Any, *, accumulate: bool = False) -> None:
+    meta = _call_metadata.get()
+    if meta is None:
+        return
+    if accumulate:
+        meta[key] = round(meta.get(key, 0) + value, 3)
+    else:
+        meta[key] = value
+
+
+def _merge_call_meta(metas: list[dict[str, Any]]) -> None:
+    """
+    把并发子调用各自记录的 meta 汇总进当前调用的 meta：
+    cache 各子调用一致时沿用，不一致时为 partial；cache_age 与 rate_limit_wait_ms 取最大值（子调用并行执行）；
+    coalesced、revalidating 任一子调用为真即为真；fetched_ranges 合并；其余字段取最后一个非空值。
+    """
+    caches = {meta["cache"] for meta in metas if "cache" in meta}
+    if caches:
+        _record_call_meta("cache", caches.pop() if len(caches) == 1 else CACHE_PARTIAL)
+    for key in ("cache_age", "rate_limit_wait_ms"):
+        values = [meta[key] for meta in metas if key in meta]
+        if values:
+            _record_call_meta(key, max(values))
+    for key in ("coalesced", "revalidating"):
+        if any(meta.get(key) for meta in metas):
+            _record_call_meta(key, True)
+    ranges = [bounds for meta in metas for bounds in meta.get("fetched_ranges", [])]
+    if ranges:
+        _record_call_meta("fetched_ranges", ranges)
+    handled = {"cache", "cache_age", "rate_limit_wait_ms", "coalesced", "revalidating", "fetched_ranges"}
+    for meta in metas:
+        for key, value in meta.items():
+            if key not in handled and value is not None:
+                _record_call_meta(key, value)
+
+
+# 当前线程是否正在执行 fan_out 的子调用
+_in_fan_out: contextvars.ContextVar[bool] = contextvars.ContextVar("shipxy_in_fan_out", default=False)
+_fan_out_pool: ThreadPoolExecutor | None = None
+_fan_out_pool_lock = threading.Lock()
+
+
+def _get_fan_out_pool() -> ThreadPoolExecutor:
+    global _fan_out_pool
+    with _fan_out_pool_lock:
+        if _fan_out_pool is None:
+            _fan_out_pool = ThreadPoolExecutor(max_workers=FANOUT_POOL_SIZE, thread_name_prefix="shipxy-fanout")
+        return _fan_out_pool
+
+
+T = TypeVar("T")
+
+
+def fan_out(calls: list[Callable[[], T]], max_workers: int = DEFAULT_FANOUT_WORKERS) -> list[T | Exception]:
+    """
+    在进程共享的线程池中并发执行多个调用，同时进行的调用不超过 max_workers 个，按输入顺序返回结果；
+    失败的调用返回其异常而不是抛出。每个调用运行在调用方上下文的副本中，继承截止时间；
+    各调用记录独立的 meta，全部完成后汇总进调用方的 meta。
+    已在 fan_out 子调用中时（例如 invoke_batch 中的 get_many_ship 分块）在当前线程内顺序执行，
+    避免嵌套调用成倍占用线程或因等待同一线程池而死锁。
+    """
+    if len(calls) <= 1 or _in_fan_out.get():
+        outcomes: list[T | Exception] = []
+        for call in calls:
+            try:
+                outcomes.append(call())
+            except Exception as exc:
+                outcomes.append(exc)
+        return outcomes
+
+    metas: list[dict[str, Any]] = [{} for _ in calls]
+    slots = threading.BoundedSemaphore(max(1, max_workers))
+
+    def run(call: Callable[[], T], meta: dict[str, Any]) -> T | Exception:
+        _in_fan_out.set(True)
+        _call_metadata.set(meta)
+        try:
+            return call()
+        except Exception as exc:
+            return exc
+        finally:
+            slots.release()
+
+    pool = _get_fan_out_pool()
+    futures = []
+    try:
+        for call, meta in zip(calls, metas):
+            slots.acquire()
+            futures.append(pool.submit(contextvars.copy_context().run, run, call, meta))
+        return [future.result() for future in futures]
+    finally:
+        for future in futures:
+            future.exception()
+        _merge_call_meta(metas)
+
+
+async def _gather(*awaitables: Awaitable[T], return_exceptions: bool = False, max_concurrency: int = DEFAULT_FANOUT_WORKERS) -> list[T | BaseException]:
+    """
+    asyncio.gather 的包装：同时进行的子任务不超过 max_concurrency 个，与同步客户端 fan_out 的单次调用并发上限一致；
+    每个子任务记录独立的 meta，全部完成后汇总进调用方的 meta，参见 fan_out。
+    return_exceptions 为 False 时第一个失败立即抛出，其余未完成的子任务被取消并等待结束，不会在后台继续请求上游。
+    """
+    metas: list[dict[str, Any]] = [{} for _ in awaitables]
+    slots = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(awaitable: Awaitable[T], meta: dict[str, Any]) -> T:
+        # 每个子任务运行在各自的上下文副本中，这里的设置不会影响调用方
+        _call_metadata.set(meta)
+        async with slots:
+            return await awaitable
+
+    tasks = [asyncio.ensure_future(run(awaitable, meta)) for awaitable, meta in zip(awaitables, metas)]
+    try:
+        return list(await asyncio.gather(*tasks, return_exceptions=return_exceptions))
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for awaitable in awaitables:
+            # 在排队时被取消的子任务从未开始执行，关闭对应协程以免告警
+            if inspect.iscoroutine(awaitable):
+                awaitable.close()
+        _merge_call_meta(metas)
+
+
+@contextmanager
+def request_deadline(seconds: float | None) -> Iterator[None]:
+    """
+    为代码块内的所有 Shipxy 请求设置整体截止时间。
+
+    嵌套使用时取更早的截止时间；seconds 为 None 时不做限制。同步代码、线程池
+    （配合 contextvars.copy_context）和 asyncio 任务中均可使用。
+    """
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _request_deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    token = _request_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _request_deadline.reset(token)
 
 
 class ShipxyAPIError(Exception):
@@ -18,6 +247,21 @@ class ShipxyAPIError(Exception):
         self.status = status
 
 
+class ShipxyTransportError(Exception):
+    """HTTP 层失败：网络错误、超时、非 200 响应或熔断拒绝。"""
+    def __init__(self, error_type: str, message: str, *, status_code: int | None = None, retryable: bool = False):
+        super().__init__(message)
+        self.error_type = error_type
+        self.status_code = status_code
+        self.retryable = retryable
+        self.attempts = 1
+        self.circuit: dict[str, Any] | None = None
+
+    def __reduce__(self):
+        # args 只含 message，按构造参数重建，其余属性由 __dict__ 恢复，保证 copy/pickle 可用
+        return self.__class__, (self.error_type, str(self)), self.__dict__
+
+
 class SearchShipResult(BaseModel):
     match_type: int
     mmsi: int
@@ -738,19 +982,32 @@ class GetNavWarningResponse(BaseModel):
     total: int = 0
     data: list[NavWarningData] = []
 
-class ShipxyAPI:
-    """船讯网API封装"""
-    def __init__(self, api_key: str, base_url: str = "http://api.shipxy.com/apicall"):
-        """
-        初始化船讯网API客户端
-        
-        参数：
-            api_key: 船讯网提供的API key
-            base_url: API基础URL
-        """
+class _ShipxyAPIBase:
+    """同步与异步客户端共享的船舶类型映射和统一结果封装。"""
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        timeouts: dict[str, tuple[float, float]] | None = None,
+        retry_policy: RetryPolicy | None = None,
+        breakers: CircuitBreakerRegistry | None = None,
+        rate_limiter: RateLimiter | None = None,
+        cache: ResponseCache | None = None,
+        track_window: int = DEFAULT_TRACK_WINDOW_SECONDS,
+        area_tile_degrees: float = DEFAULT_AREA_TILE_DEGREES,
+    ):
         self.api_key = api_key
         self.base_url = base_url
-        
+        self.timeouts = {**ENDPOINT_TIMEOUTS, **(timeouts or {})}
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breakers = breakers or CircuitBreakerRegistry()
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.track_window = track_window
+        self.area_tile_degrees = area_tile_degrees
+        self._revalidating: set[tuple[Any, ...]] = set()
+        self._revalidating_lock = threading.Lock()
+
         # 船舶类型映射字典
         self.ship_types = {
             50: "引航船",
@@ -788,6 +1045,333 @@ class ShipxyAPI:
             100: "集装箱"
         }
 
+    def _timeout_for(self, endpoint: str) -> tuple[float, float]:
+        """返回接口的 (连接超时, 读取超时)，并按当前截止时间收紧；已超时则直接抛出。"""
+        connect, read = self.timeouts.get(endpoint, (DEFAULT_CONNECT_TIMEOUT, DEFAULT_TIMEOUT))
+        deadline = _request_deadline.get()
+        if deadline is None:
+            return connect, read
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise ShipxyTransportError("timeout", "请求船讯网超时: 已超过调用截止时间")
+        return min(connect, remaining), min(read, remaining)
+
+    def _reserve_rate_limit(self, endpoint: str) -> float:
+        """向限流器预约令牌，返回需要等待的秒数；排队会超过截止时间时抛出 rate_limited。"""
+        if self.rate_limiter is None:
+            return 0.0
+        deadline = _request_deadline.get()
+        max_wait = None if deadline is None else deadline - time.monotonic()
+        wait = self.rate_limiter.reserve(self.api_key, endpoint, max_wait=max_wait)
+        if wait is None:
+            raise ShipxyTransportError("rate_limited", f"本地限流排队时间超过调用截止时间，{endpoint} 请求未发出。")
+        _record_call_meta("rate_limit_wait_ms", wait * 1000, accumulate=True)
+        return wait
+
+    def _request_key(self, endpoint: str, params: dict[str, Any]) -> tuple[Any, ...]:
+        """
+        并发合并和缓存的键：接口名 + 规范化后的参数（含 key，因此天然按 API key 隔离）。
+        配置了缓存时点位气象按网格归并，同一网格内的并发请求也会合并。
+        """
+        if self.cache is not None:
+            params = self.cache.key_params(endpoint, params)
+        return (endpoint, tuple(sorted((name, str(value)) for name, value in params.items())))
+
+    def _cache_lookup(self, endpoint: str, key: tuple[Any, ...]) -> CachedResponse | None:
+        """读取缓存；命中新鲜条目时记录 meta.cache=hit。不缓存的接口直接返回 None。"""
+        if self.cache is None or self.cache.ttl_for(endpoint) <= 0:
+            return None
+        cached = self.cache.get(key)
+        if cached is not None and cached.fresh:
+            _record_call_meta("cache", CACHE_HIT)
+            _record_call_meta("cache_age", round(cached.age, 3))
+        return cached
+
+    def _check_negative_cache(self, endpoint: str, key: tuple[Any, ...]) -> None:
+        """近期已确认不存在的查询直接抛出原 not_found 错误，并记录 meta.cached=true。"""
+        if self.cache is None or self.cache.ttl_for(endpoint) <= 0:
+            return
+        negative = self.cache.get_negative(key)
+        if negative is not None:
+            _record_call_meta("cached", True)
+            raise ShipxyAPIError(*negative)
+
+    def _remember_not_found(self, endpoint: str, key: tuple[Any, ...], exc: ShipxyAPIError) -> None:
+        if self.cache is None or self.cache.ttl_for(endpoint) <= 0:
+            return
+        if self._classify_error(str(exc)) == "not_found":
+            self.cache.set_negative(key, str(exc), exc.status)
+
+    def _cache_store(self, endpoint: str, key: tuple[Any, ...], resp_json: dict[str, Any], params: dict[str, Any]) -> None:
+        if self.cache is None or self.cache.ttl_for(endpoint) <= 0:
+            return
+        self.cache.set(endpoint, key, resp_json, params)
+        _record_call_meta("cache", CACHE_MISS)
+
+    @staticmethod
+    def _stale_response(cached: CachedResponse, revalidating: bool = False) -> dict[str, Any]:
+        """返回过期缓存（上游暂不可用，或处于 stale-while-revalidate 窗口），并在 meta 中标明数据年龄。"""
+        _record_call_meta("cache", CACHE_STALE)
+        _record_call_meta("cache_age", round(cached.age, 3))
+        if revalidating:
+            _record_call_meta("revalidating", True)
+        return cached.value
+
+    def _track_cache(self, start_time: int, end_time: int, output: int) -> TrackCache | None:
+        """JSON 格式、时间范围合法的轨迹查询才走轨迹区间缓存。"""
+        if self.cache is None or self.cache.tracks is None or output != 1 or start_time > end_time:
+            return None
+        return self.cache.tracks
+
+    def _track_params(self, mmsi: int, start_time: int, end_time: int) -> dict[str, Any]:
+        return {"key": self.api_key, "mmsi": mmsi, "start_time": start_time, "end_time": end_time, "output": 1}
+
+    @staticmethod
+    def _record_gap_meta(gaps: list[tuple[Any, Any]], full_range: tuple[Any, Any]) -> None:
+        """区间类缓存的命中情况：全部命中为 hit，全部补查为 miss，否则为 partial 并列出补查区间。"""
+        if not gaps:
+            _record_call_meta("cache", CACHE_HIT)
+            return
+        _record_call_meta("cache", CACHE_MISS if gaps == [full_range] else CACHE_PARTIAL)
+        _record_call_meta("fetched_ranges", [[str(bound) if isinstance(bound, date) else bound for bound in gap] for gap in gaps])
+
+    def _track_windows(self, start_time: int, end_time: int) -> list[tuple[int, int]]:
+        """把 [start_time, end_time] 按 track_window 切成首尾相接的闭区间；未开启拆分或不足一个窗口时原样返回。"""
+        window = int(self.track_window or 0)
+        if window <= 0 or end_time - start_time < window:
+            return [(start_time, end_time)]
+        return [(bound, min(bound + window - 1, end_time)) for bound in range(start_time, end_time + 1, window)]
+
+    @staticmethod
+    def _merge_track_windows(responses: list[dict[str, Any]]) -> dict[str, Any]:
+        """合并各子窗口的轨迹响应，轨迹点按 utc 去重并升序排列。"""
+        points: dict[Any, dict[str, Any]] = {}
+        for resp_json in responses:
+            for point in resp_json.get("data") or []:
+                if isinstance(point, dict) and "utc" in point:
+                    points[point["utc"]] = point
+        _record_call_meta("track_windows", len(responses))
+        msg = responses[-1].get("msg", "") if responses else ""
+        return {"status": 0, "msg": msg, "data": sorted(points.values(), key=lambda point: point["utc"])}
+
+    def _assemble_track(self, tracks: TrackCache, key: tuple[Any, ...], start_time: int, end_time: int, gaps: list[tuple[int, int]], msg: str) -> dict[str, Any]:
+        """用缓存中的轨迹点拼出完整响应，并在 meta 中记录补查的时间段。"""
+        self._record_gap_meta(gaps, (start_time, end_time))
+        return {"status": 0, "msg": msg, "data": tracks.points(key, start_time, end_time)}
+
+    def _tide_cache(self, start_date: str, end_date: str) -> tuple[TideCache, date, date] | None:
+        """日期格式合法的潮汐查询才走按日缓存，格式错误交给上游返回原有错误。"""
+        if self.cache is None or self.cache.tides is None:
+            return None
+        try:
+            start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+        except (TypeError, ValueError):
+            return None
+        if start > end:
+            return None
+        return self.cache.tides, start, end
+
+    def _tide_params(self, port_code: int, start: date | str, end: date | str) -> dict[str, Any]:
+        return {"key": self.api_key, "port_code": port_code, "start_date": str(start), "end_date": str(end)}
+
+    def _assemble_tides(self, tides: TideCache, key: tuple[Any, ...], start: date, end: date, runs: list[tuple[date, date]], msg: str) -> dict[str, Any]:
+        self._record_gap_meta(runs, (start, end))
+        return {"status": 0, "msg": msg, "data": tides.assemble(key, start, end)}
+
+    @staticmethod
+    def _mmsi_chunks(mmsis: list[int]) -> list[list[str]]:
+        """按出现顺序去重后，按 GetManyShip 单次上限分块。"""
+        unique = list(dict.fromkeys(str(mmsi).strip() for mmsi in mmsis))
+        return [unique[index:index + MANY_SHIP_CHUNK_SIZE] for index in range(0, len(unique), MANY_SHIP_CHUNK_SIZE)]
+
+    def _merge_many_ship(self, chunks: list[list[str]], outcomes: list[dict[str, Any] | Exception]) -> dict[str, Any]:
+        """
+        合并各分块的 GetManyShip 结果。部分分块失败时返回成功分块的船舶，并在 chunk_errors 中列出失败分块；
+        全部失败时抛出第一个分块的异常。
+        """
+        failures = [(index, outcome) for index, outcome in enumerate(outcomes) if isinstance(outcome, Exception)]
+        if len(failures) == len(outcomes):
+            raise failures[0][1]
+        ships = [ship for outcome in outcomes if isinstance(outcome, dict) for ship in outcome.get("data") or []]
+        msg = next(outcome.get("msg", "") for outcome in outcomes if isinstance(outcome, dict))
+        result = self._success_result("GetManyShip", {"status": 0, "msg": msg, "data": ships}, ManyShipResponse)
+        if failures:
+            result["chunk_errors"] = [
+                {"chunk": index, "mmsis": chunks[index], "error": self._exception_result("get_many_ship", exc)["error"]}
+                for index, exc in failures
+            ]
+        return result
+
+    @staticmethod
+    def _next_area_scode(page: dict[str, Any]) -> int | None:
+        """GetAreaShip 分页结果还有下一页时返回下一页的 scode，否则返回 None。"""
+        data = page.get("data") if page.get("ok") is True else None
+        if not isinstance(data, dict) or not data.get("continue") or data.get("scode") is None:
+            return None
+        return data["scode"]
+
+    @staticmethod
+    def _merge_area_pages(pages: list[dict[str, Any]]) -> dict[str, Any]:
+        """
+        合并自动翻页得到的 GetAreaShip 结果，ship_list 按页顺序拼接。
+        首页失败时直接返回首页错误；后续页失败时返回已取得的船舶，并在 page_errors 中列出失败页。
+        """
+        if pages[0].get("ok") is not True:
+            return pages[0]
+        succeeded = [page for page in pages if page.get("ok") is True and isinstance(page.get("data"), dict)]
+        ships = [ship for page in succeeded for ship in page["data"].get("ship_list") or []]
+        result = {key: value for key, value in pages[0].items() if key != "meta"}
+        result["data"] = {**succeeded[-1]["data"], "ship_list": ships}
+        failures = [{"page": index + 1, "error": page.get("error")} for index, page in enumerate(pages) if all(page is not ok for ok in succeeded)]
+        if failures:
+            result["page_errors"] = failures
+        _record_call_meta("pages", len(pages))
+        return result
+
+    def _area_tiles(self, region: str) -> tuple[list[tuple[float, float]], list[str]] | None:
+        """区域超过瓦片边长时返回 (原多边形, 各瓦片区域字符串)；无需拆分或区域无法解析时返回 None。"""
+        polygon = parse_region(region) if self.area_tile_degrees else None
+        if polygon is None:
+            return None
+        tiles = tile_polygon(polygon, self.area_tile_degrees)
+        if len(tiles) <= 1:
+            return None
+        return polygon, [format_region(tile) for tile in tiles]
+
+    def _merge_area_tiles(self, polygon: list[tuple[float, float]], regions: list[str], results: list[dict[str, Any] | Exception]) -> dict[str, Any]:
+        """
+        合并各瓦片的区域查询结果：船舶裁剪回原多边形，按 MMSI 去重并保留 last_time_utc 最新的一条。
+        部分瓦片失败时返回其余瓦片的船舶，并在 tile_errors 中列出失败瓦片；全部失败时返回第一个瓦片的错误。
+        翻页达到上限后仍有下一页的瓦片同样列在 tile_errors 中（type 为 truncated），此时 data.continue 为 1、truncated 为 true。
+        各瓦片的 scode 只对该瓦片有效，合并结果的 scode 为 None。
+        """
+        results = [result if isinstance(result, dict) else self._exception_result("get_area_ship", result) for result in results]
+        succeeded = [result for result in results if result.get("ok") is True and isinstance(result.get("data"), dict)]
+        if not succeeded:
+            return results[0]
+        ships = merge_tile_ships(polygon, [result["data"].get("ship_list") or [] for result in succeeded])
+        tile_errors: list[dict[str, Any]] = []
+        truncated = False
+        for index, result in enumerate(results):
+            if all(result is not ok for ok in succeeded):
+                tile_errors.append({"tile": index, "region": regions[index], "error": result.get("error")})
+                continue
+            for page_error in result.get("page_errors") or []:
+                tile_errors.append({"tile": index, "region": regions[index], "error": page_error["error"]})
+            if result["data"].get("continue"):
+                truncated = True
+                tile_errors.append({
+                    "tile": index,
+                    "region": regions[index],
+                    "error": {"type": "truncated", "message": "该瓦片翻页达到上限后仍有未取回的船舶。"},
+                })
+        merged = {key: value for key, value in succeeded[0].items() if key not in ("meta", "page_errors", "data")}
+        merged["data"] = {"total": len(ships), "scode": None, "continue": int(truncated), "ship_list": ships}
+        if truncated:
+            merged["truncated"] = True
+        if tile_errors:
+            merged["tile_errors"] = tile_errors
+        _record_call_meta("tiles", len(regions))
+        return merged
+
+    @staticmethod
+    def _with_elapsed(result: Any, started: float) -> Any:
+        if isinstance(result, dict):
+            result.setdefault("meta", {})["elapsed_ms"] = round((time.monotonic() - started) * 1000, 3)
+        return result
+
+    @staticmethod
+    def _snapshot_windows(window_hours: int) -> tuple[tuple[int, int], tuple[int, int]]:
+        """port_snapshot 的 (预抵港窗口, 历史靠港窗口)；当前时间取整到分钟，便于短时间内重复查询命中缓存。"""
+        now = int(time.time()) // 60 * 60
+        window = int(window_hours) * 3600
+        return (now, now + window), (now - window, now)
+
+    def _composite_result(self, operation: str, sections: dict[str, Any]) -> dict[str, Any]:
+        """
+        组合查询的统一结果：data 中按分项名保存各接口的完整结果（含 meta.elapsed_ms），失败分项同时列在 section_errors 中。
+        至少一个分项成功即 ok=true；全部失败时 ok=false，error 为第一个分项的错误。
+        """
+        sections = {
+            name: section if isinstance(section, dict) else self._exception_result(operation, section)
+            for name, section in sections.items()
+        }
+        errors = {name: section.get("error") for name, section in sections.items() if section.get("ok") is not True}
+        result: dict[str, Any] = {"ok": len(errors) < len(sections), "endpoint": operation, "data": sections}
+        if errors:
+            result["section_errors"] = errors
+        if not result["ok"]:
+            result["error"] = dict(next(iter(errors.values())) or {})
+        return result
+
+    def _start_revalidation(self, key: tuple[Any, ...]) -> bool:
+        """同一个键同时只安排一次后台刷新。"""
+        with self._revalidating_lock:
+            if key in self._revalidating:
+                return False
+            self._revalidating.add(key)
+            return True
+
+    def _finish_revalidation(self, key: tuple[Any, ...]) -> None:
+        with self._revalidating_lock:
+            self._revalidating.discard(key)
+
+    @property
+    def revalidation_pending(self) -> bool:
+        """是否还有后台缓存刷新尚未完成。"""
+        with self._revalidating_lock:
+            return bool(self._revalidating)
+
+    @staticmethod
+    def _flight_timeout() -> float | None:
+        deadline = _request_deadline.get()
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+    def _acquire_circuit(self, endpoint: str) -> CircuitBreaker:
+        """取得接口熔断器；熔断打开时直接抛出 upstream_unavailable，不再请求上游。"""
+        breaker = self.breakers.get(endpoint)
+        if not breaker.allow_request():
+            exc = ShipxyTransportError("upstream_unavailable", f"船讯网接口 {endpoint} 连续失败已熔断，请稍后重试。")
+            exc.circuit = breaker.snapshot()
+            raise exc
+        return breaker
+
+    def _retry_delay(self, breaker: CircuitBreaker, exc: ShipxyTransportError, attempt: int) -> float | None:
+        """
+        记录一次失败并决定是否重试。
+        返回：
+            下一次重试前的等待秒数；不可重试、次数用尽、熔断已打开或超过截止时间时返回 None
+        """
+        if exc.retryable:
+            breaker.record_failure()
+        elif exc.status_code is not None:
+            breaker.record_success()
+        else:
+            breaker.release()
+        exc.attempts = attempt
+        exc.circuit = breaker.snapshot()
+        if not exc.retryable or attempt >= self.retry_policy.max_attempts or exc.circuit["state"] != "closed":
+            return None
+        delay = self.retry_policy.backoff(attempt)
+        deadline = _request_deadline.get()
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+    def _http_status_error(self, status_code: int, method: str) -> ShipxyTransportError:
+        # 只有幂等的 GET 查询在 5xx 时可重试；414 回退的 POST 不重试
+        return ShipxyTransportError(
+            "http_error",
+            f"HTTP请求失败: {status_code}",
+            status_code=status_code,
+            retryable=status_code >= 500 and method == "GET",
+        )
+
+    def _check_response_json(self, resp_json: dict[str, Any]) -> dict[str, Any]:
+        if resp_json.get("status") != 0:
+            raise ShipxyAPIError(resp_json.get("msg") or resp_json.get("message", "未知错误"), resp_json.get("status"))
+        return resp_json
+
     def _classify_error(self, message: str) -> str:
         """将 Shipxy 或客户端错误消息映射成稳定的错误类型。"""
         lowered = (message or "").lower()
@@ -869,6 +1453,14 @@ class ShipxyAPI:
                 details=self._validation_details(exc),
             )
 
+        if isinstance(exc, ShipxyTransportError):
+            result = self._error_result(exc.error_type, str(exc), endpoint=operation, status_code=exc.status_code)
+            if exc.attempts > 1:
+                result["error"]["attempts"] = exc.attempts
+            if exc.circuit is not None:
+                result["error"]["circuit"] = exc.circuit
+            return result
+
         if isinstance(exc, ShipxyAPIError):
             message = str(exc)
             return self._error_result(
@@ -879,14 +1471,6 @@ class ShipxyAPI:
             )
 
         message = str(exc)
-        if message.startswith("HTTP请求失败:"):
-            status_text = message.split(":", 1)[1].strip()
-            status_code = int(status_text) if status_text.isdigit() else None
-            return self._error_result("http_error", message, endpoint=operation, status_code=status_code)
-
-        if message.startswith("请求船讯网失败:"):
-            return self._error_result("network_error", message, endpoint=operation)
-
         if message.startswith("船讯网返回错误:"):
             clean_message = message.split(":", 1)[1].strip()
             return self._error_result(self._classify_error(clean_message), clean_message, endpoint=operation)
@@ -917,6 +1501,197 @@ class ShipxyAPI:
                 
         return "未知类型"
 
+class ShipxyAPI(_ShipxyAPIBase):
+    """船讯网API封装"""
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "http://api.shipxy.com/apicall",
+        *,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        keep_alive: bool = True,
+        timeouts: dict[str, tuple[float, float]] | None = None,
+        retry_policy: RetryPolicy | None = None,
+        breakers: CircuitBreakerRegistry | None = None,
+        rate_limiter: RateLimiter | None = None,
+        coalesce: bool = True,
+        cache: ResponseCache | None = None,
+        track_window: int = DEFAULT_TRACK_WINDOW_SECONDS,
+        area_tile_degrees: float = DEFAULT_AREA_TILE_DEGREES,
+    ):
+        """
+        初始化船讯网API客户端
+        
+        参数：
+            api_key: 船讯网提供的API key
+            base_url: API基础URL
+            pool_connections: 连接池缓存的主机数量
+            pool_maxsize: 每个主机保持的最大连接数，应不小于并发调用数
+            keep_alive: 是否复用 TCP/TLS 长连接；False 时每次请求后关闭连接
+            timeouts: 按接口名覆盖默认的 (连接超时, 读取超时)，参见 ENDPOINT_TIMEOUTS
+            retry_policy: 网络错误、超时和 5xx 的重试策略，默认最多 3 次、指数退避加抖动
+            breakers: 按接口的熔断器注册表；多个客户端共享时熔断状态全局生效
+            rate_limiter: 可选的令牌桶限流器，按 API key 平滑突发调用；排队时间记录在 meta.rate_limit_wait_ms
+            coalesce: 是否合并参数完全相同的并发请求，只向上游发出一次；共享结果的调用带 meta.coalesced
+            cache: 可选的响应缓存，按接口新鲜期复用成功响应，结果带 meta.cache（hit/miss/stale）
+            track_window: 轨迹查询子窗口秒数，更长的时间范围拆分后并发查询再按 utc 合并去重；0 表示不拆分
+            area_tile_degrees: 区域查询的瓦片边长（度），更大的多边形按网格拆分后并发查询再合并去重；0 表示不拆分
+        """
+        super().__init__(api_key, base_url, timeouts, retry_policy, breakers, rate_limiter, cache, track_window, area_tile_degrees)
+        self.session = self._create_session(pool_connections, pool_maxsize, keep_alive)
+        self._single_flight = SingleFlight() if coalesce else None
+
+        
+    @staticmethod
+    def _create_session(pool_connections: int, pool_maxsize: int, keep_alive: bool) -> requests.Session:
+        """创建实例独享的连接池会话，重复调用时复用已建立的连接。"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if not keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
+    def close(self) -> None:
+        """关闭连接池，释放所有保持中的连接。"""
+        self.session.close()
+
+    def __enter__(self) -> "ShipxyAPI":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _request(self, endpoint: str, params: dict[str, Any]) -> dict[str, Any]:
+        """
+        所有接口共用的请求执行器：按接口超时和调用截止时间发起请求，检查 HTTP 状态和业务状态。
+        配置了缓存时优先返回新鲜缓存，上游暂不可用时降级返回过期缓存。
+        参数：
+            endpoint: Shipxy 接口名，例如 GetSingleShip
+            params: 查询参数（含 key）
+        返回：
+            业务成功（status == 0）的响应 JSON
+        """
+        key = self._request_key(endpoint, params)
+        cached = self._cache_lookup(endpoint, key)
+        if cached is not None and cached.fresh:
+            return cached.value
+        if cached is not None and cached.revalidate:
+            self._revalidate_in_background(endpoint, params, key)
+            return self._stale_response(cached, revalidating=True)
+        self._check_negative_cache(endpoint, key)
+        try:
+            resp_json, shared = self._fetch(endpoint, params, key)
+        except ShipxyTransportError:
+            if cached is None:
+                raise
+            return self._stale_response(cached)
+        except ShipxyAPIError as exc:
+            self._remember_not_found(endpoint, key, exc)
+            raise
+        if not shared:
+            self._cache_store(endpoint, key, resp_json, params)
+        return resp_json
+
+    def _revalidate_in_background(self, endpoint: str, params: dict[str, Any], key: tuple[Any, ...]) -> None:
+        """在独立线程中刷新缓存；新线程不继承调用方的截止时间。"""
+        if not self._start_revalidation(key):
+            return
+        threading.Thread(
+            target=self._revalidate,
+            args=(endpoint, params, key),
+            name=f"shipxy-revalidate-{endpoint}",
+            daemon=True,
+        ).start()
+
+    def _revalidate(self, endpoint: str, params: dict[str, Any], key: tuple[Any, ...]) -> None:
+        try:
+            resp_json, shared = self._fetch(endpoint, params, key)
+            if not shared:
+                self._cache_store(endpoint, key, resp_json, params)
+        except Exception:
+            # 刷新失败时保留旧缓存，下一次调用会再次尝试
+            pass
+        finally:
+            self._finish_revalidation(key)
+
+    def _cached_tide_data(self, endpoint: str, port_code: int, tides: TideCache, start: date, end: date) -> dict[str, Any]:
+        """只向上游补查潮汐按日缓存中缺失的连续日期段，再按日期顺序拼装完整结果。"""
+        key = (self.api_key, endpoint, str(port_code))
+        runs = tides.missing(key, start, end)
+        msg = ""
+        for run_start, run_end in runs:
+            params = self._tide_params(port_code, run_start, run_end)
+            resp_json, _ = self._fetch(endpoint, params, self._request_key(endpoint, params))
+            if not tides.add(key, run_start, run_end, resp_json.get("data")):
+                # 无法按天拆分的响应结构不做按日缓存，直接使用完整日期范围的查询结果
+                if (run_start, run_end) == (start, end):
+                    return resp_json
+                return self._request(endpoint, self._tide_params(port_code, start, end))
+            msg = resp_json.get("msg", msg)
+        return self._assemble_tides(tides, key, start, end, runs, msg)
+
+    def _fetch(self, endpoint: str, params: dict[str, Any], key: tuple[Any, ...]) -> tuple[dict[str, Any], bool]:
+        """向上游请求；参数完全相同的并发请求只发出一次，返回 (响应, 是否共享了其他调用的结果)。"""
+        if self._single_flight is None:
+            return self._execute(endpoint, params), False
+        try:
+            resp_json, shared = self._single_flight.do(key, lambda: self._execute(endpoint, params), timeout=self._flight_timeout())
+        except TimeoutError:
+            raise ShipxyTransportError("timeout", f"等待相同 {endpoint} 请求的结果超过调用截止时间。") from None
+        except Exception as exc:
+            if getattr(exc, "coalesced", False):
+                _record_call_meta("coalesced", True)
+            raise
+        if shared:
+            _record_call_meta("coalesced", True)
+        return resp_json, shared
+
+    def _execute(self, endpoint: str, params: dict[str, Any]) -> dict[str, Any]:
+        """单个请求的限流、熔断和重试循环。"""
+        attempt = 1
+        while True:
+            wait = self._reserve_rate_limit(endpoint)
+            if wait:
+                time.sleep(wait)
+            breaker = self._acquire_circuit(endpoint)
+            try:
+                resp_json = self._send(endpoint, params)
+            except ShipxyTransportError as exc:
+                delay = self._retry_delay(breaker, exc, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except Exception:
+                # 上游有响应但内容无法解析，不计入熔断
+                breaker.record_success()
+                raise
+            breaker.record_success()
+            return self._check_response_json(resp_json)
+
+    def _send(self, endpoint: str, params: dict[str, Any]) -> dict[str, Any]:
+        """发起单次 HTTP 请求并解析 JSON，传输层失败统一抛出 ShipxyTransportError。"""
+        url = f"{self.base_url}/v3/{endpoint}"
+        timeout = self._timeout_for(endpoint)
+        method = "GET"
+        # 优先GET请求，若参数过长则自动切换POST
+        try:
+            response = self.session.get(url, params=params, timeout=timeout)
+            if response.status_code == 414:  # URI Too Long
+                method = "POST"
+                response = self.session.post(url, data=params, timeout=timeout)
+        except requests.Timeout as e:
+            raise ShipxyTransportError("timeout", f"请求船讯网超时: {e}", retryable=method == "GET")
+        except requests.RequestException as e:
+            raise ShipxyTransportError("network_error", f"请求船讯网失败: {e}", retryable=method == "GET")
+        if response.status_code != 200:
+            raise self._http_status_error(response.status_code, method)
+        return response.json()
+
     def search_ship(self, keywords: str, max_results: Optional[int] = None) -> SearchShipResponse:
         """
         查询船舶信息（SearchShip接口）
@@ -928,29 +1703,13 @@ class ShipxyAPI:
         异常：
             请求失败或返回错误码
         """
-        url = f"{self.base_url}/v3/SearchShip"
         params = {
             "key": self.api_key,
             "keywords": keywords
         }
         if max_results is not None:
             params["max"] = max_results
-        
-        # 优先GET请求，若参数过长则自动切换POST
-        try:
-            response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-            if response.status_code == 414:  # URI Too Long
-                response = requests.post(url, data=params, timeout=DEFAULT_TIMEOUT)
-        except Exception as e:
-            raise Exception(f"请求船讯网失败: {e}")
-        
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
-        
+        resp_json = self._request("SearchShip", params)
         # 强类型化返回
         return self._success_result("SearchShip", resp_json, SearchShipResponse)
 
@@ -962,39 +1721,31 @@ class ShipxyAPI:
         返回：
             SingleShipResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/GetSingleShip"
         params = {
             "key": self.api_key,
             "mmsi": mmsi
         }
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetSingleShip", params)
         return self._success_result("GetSingleShip", resp_json, SingleShipResponse)
 
     def get_many_ship(self, mmsis: list[int]) -> ManyShipResponse:
         """
         多船位置查询
         参数：
-            mmsis: 船舶mmsi编号列表（最多100个）
+            mmsis: 船舶mmsi编号列表（超过100个时自动去重、每100个一组并发查询后合并）
         返回：
-            ManyShipResponse: 查询结果，强类型返回
+            ManyShipResponse: 查询结果，强类型返回；部分分组失败时附带 chunk_errors
         """
-        url = f"{self.base_url}/v3/GetManyShip"
-        mmsis_str = ','.join(str(m) for m in mmsis)
+        chunks = self._mmsi_chunks(mmsis)
+        if len(chunks) > 1:
+            outcomes = fan_out([lambda chunk=chunk: self._request("GetManyShip", {"key": self.api_key, "mmsis": ",".join(chunk)}) for chunk in chunks])
+            return self._merge_many_ship(chunks, outcomes)
+        mmsis_str = ','.join(chunks[0] if chunks else [])
         params = {
             "key": self.api_key,
             "mmsis": mmsis_str
         }
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetManyShip", params)
         return self._success_result("GetManyShip", resp_json, ManyShipResponse)
 
     def get_fleet_ship(self, fleet_id: str) -> FleetShipResponse:
@@ -1005,17 +1756,11 @@ class ShipxyAPI:
         返回：
             FleetShipResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/GetFleetShip"
         params = {
             "key": self.api_key,
             "fleet_id": fleet_id
         }
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetFleetShip", params)
         return self._success_result("GetFleetShip", resp_json, FleetShipResponse)
 
     def get_surrounding_ship(self, mmsi: int) -> SurRoundingShipResponse:
@@ -1026,30 +1771,39 @@ class ShipxyAPI:
         返回：
             SurRoundingShipResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/GetSurRoundingShip"
         params = {
             "key": self.api_key,
             "mmsi": mmsi
         }
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetSurRoundingShip", params)
         return self._success_result("GetSurRoundingShip", resp_json, SurRoundingShipResponse)
 
-    def get_area_ship(self, region: str, output: int = 1, scode: int = None) -> AreaShipResponse:
+    def get_area_ship(self, region: str, output: int = 1, scode: int = None, max_pages: int = None) -> AreaShipResponse:
         """
         区域船舶查询
         参数：
             region: 区域字符串（lng,lat-lng,lat-...）
             output: 输出格式，1为json，0为base64
             scode: 会话令牌（可选）
+            max_pages: 可选，按 continue/scode 自动翻页的最大页数，各页 ship_list 合并返回；不传时只查询一页
         返回：
             AreaShipResponse: 查询结果，强类型返回
-        """
-        url = f"{self.base_url}/v3/GetAreaShip"
+        外接矩形超过 area_tile_degrees 的区域会按网格拆分为多个瓦片并发查询，每个瓦片自动翻页（最多 max_pages 页，
+        不传时为 MAX_AREA_SHIP_PAGES），合并后带 meta.tiles；仍有瓦片未取完时 data.continue 为 1 且 truncated 为 true。
+        """
+        tiles = self._area_tiles(region) if scode is None and output == 1 else None
+        if tiles is not None:
+            polygon, regions = tiles
+            # 每个瓦片都跟随翻页，避免只取回各瓦片的第一页
+            pages = max_pages or MAX_AREA_SHIP_PAGES
+            results = fan_out([lambda tile=tile: self._fetch_area_tile(tile, pages) for tile in regions])
+            return self._merge_area_tiles(polygon, regions, results)
+        if max_pages is not None and max_pages > 1:
+            return self._merge_area_pages(list(self.iter_area_ship_pages(region, output, scode, max_pages)))
+        return self._fetch_area_page(region, output, scode)
+
+    def _fetch_area_page(self, region: str, output: int, scode: int | None) -> AreaShipResponse:
+        """查询区域船舶的一页，不拆分瓦片：一次调用对应一次上游请求。"""
         params = {
             "key": self.api_key,
             "region": region,
@@ -1057,14 +1811,39 @@ class ShipxyAPI:
         }
         if scode is not None:
             params["scode"] = scode
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetAreaShip", params)
         return self._success_result("GetAreaShip", resp_json, AreaShipResponse)
 
+    def _fetch_area_tile(self, region: str, max_pages: int) -> dict[str, Any]:
+        """
+        查询单个瓦片并自动翻页（最多 max_pages 页）。
+        瓦片可能因 MAX_AREA_TILES 被放大到超过 area_tile_degrees，这里直接请求而不再拆分，每页只发一次上游请求。
+        """
+        pages: list[dict[str, Any]] = []
+        scode = None
+        for _ in range(max_pages):
+            try:
+                page = self._fetch_area_page(region, 1, scode)
+            except Exception as exc:
+                page = self._exception_result("get_area_ship", exc)
+            pages.append(page)
+            scode = self._next_area_scode(page)
+            if scode is None:
+                break
+        return self._merge_area_pages(pages)
+
+    def iter_area_ship_pages(self, region: str, output: int = 1, scode: int = None, max_pages: int = MAX_AREA_SHIP_PAGES) -> Iterator[dict[str, Any]]:
+        """
+        逐页查询区域船舶，每取得一页立即产出该页结果（与 get_area_ship 的单页结果相同，船舶在 data.ship_list 中）。
+        上游返回 continue 时带上 scode 继续请求下一页；最后一页、出错页或达到 max_pages 后停止。
+        """
+        for _ in range(max_pages):
+            page = self.get_area_ship(region, output, scode)
+            yield page
+            scode = self._next_area_scode(page)
+            if scode is None:
+                return
+
     def get_ship_registry(self, mmsi: int) -> ShipRegistryResponse:
         """
         船籍信息查询
@@ -1073,17 +1852,11 @@ class ShipxyAPI:
         返回：
             ShipRegistryResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/GetShipRegistry"
         params = {
             "key": self.api_key,
             "mmsi": mmsi
         }
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetShipRegistry", params)
         return self._success_result("GetShipRegistry", resp_json, ShipRegistryResponse)
 
     def search_ship_particular(self, mmsi: int = None, imo: int = None, call_sign: str = None, ship_name: str = None) -> SearchShipParticularResponse:
@@ -1097,7 +1870,6 @@ class ShipxyAPI:
         返回：
             SearchShipParticularResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/SearchShipParticular"
         params = {"key": self.api_key}
         if mmsi is not None:
             params["mmsi"] = mmsi
@@ -1109,12 +1881,7 @@ class ShipxyAPI:
             params["ship_name"] = ship_name
         if len(params) == 1:
             raise Exception("必须至少提供mmsi、imo、call_sign、ship_name中的一个")
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("SearchShipParticular", params)
         return self._success_result("SearchShipParticular", resp_json, SearchShipParticularResponse)
 
     def search_port(self, keywords: str, max_results: int = None) -> SearchPortResponse:
@@ -1126,19 +1893,13 @@ class ShipxyAPI:
         返回：
             SearchPortResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/SearchPort"
         params = {
             "key": self.api_key,
             "keywords": keywords
         }
         if max_results is not None:
             params["max"] = max_results
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("SearchPort", params)
         return self._success_result("SearchPort", resp_json, SearchPortResponse)
 
     def get_berth_ships(self, port_code: str, ship_type: int = None) -> GetBerthShipsResponse:
@@ -1150,19 +1911,13 @@ class ShipxyAPI:
         返回：
             GetBerthShipsResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/GetBerthShips"
         params = {
             "key": self.api_key,
             "port_code": port_code
         }
         if ship_type is not None:
             params["ship_type"] = ship_type
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetBerthShips", params)
         return self._success_result("GetBerthShips", resp_json, GetBerthShipsResponse)
 
     def get_anchor_ships(self, port_code: str, ship_type: int = None) -> GetAnchorShipsResponse:
@@ -1174,19 +1929,13 @@ class ShipxyAPI:
         返回：
             GetAnchorShipsResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/GetAnchorShips"
         params = {
             "key": self.api_key,
             "port_code": port_code
         }
         if ship_type is not None:
             params["ship_type"] = ship_type
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetAnchorShips", params)
         # 兼容返回结构为list或dict
         if isinstance(resp_json.get("data"), dict):
             return self._success_result("GetAnchorShips", {**resp_json, "total": 1, "data": [resp_json["data"]]}, GetAnchorShipsResponse)
@@ -1203,7 +1952,6 @@ class ShipxyAPI:
         返回：
             GetETAShipsResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/GetETAShips"
         params = {
             "key": self.api_key,
             "port_code": port_code,
@@ -1212,14 +1960,53 @@ class ShipxyAPI:
         }
         if ship_type is not None:
             params["ship_type"] = ship_type
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetETAShips", params)
         return self._success_result("GetETAShips", resp_json, GetETAShipsResponse)
 
+    def _timed_section(self, call: Callable[[], T]) -> T:
+        started = time.monotonic()
+        return self._with_elapsed(call(), started)
+
+    def port_snapshot(self, port_code: str, window_hours: int = DEFAULT_SNAPSHOT_WINDOW_HOURS, ship_type: int = None) -> dict[str, Any]:
+        """
+        港口概览：并发查询靠泊船舶、锚地船舶、预抵港船舶和历史靠港记录，合并为一个结果。
+        参数：
+            port_code: 港口标准五位码
+            window_hours: 预抵港查询未来多少小时、靠港记录回溯多少小时，默认 24
+            ship_type: 船舶类型（可选），用于靠泊、锚地和预抵港查询
+        返回：
+            data 中 berth_ships、anchor_ships、eta_ships、port_calls 各为对应工具的完整结果，单项失败不影响其他分项
+        """
+        (eta_start, eta_end), (calls_start, calls_end) = self._snapshot_windows(window_hours)
+        sections: dict[str, Callable[[], dict[str, Any]]] = {
+            "berth_ships": lambda: self.get_berth_ships(port_code, ship_type),
+            "anchor_ships": lambda: self.get_anchor_ships(port_code, ship_type),
+            "eta_ships": lambda: self.get_eta_ships(port_code, eta_start, eta_end, ship_type),
+            "port_calls": lambda: self.get_port_of_call_by_port(port_code, calls_start, calls_end),
+        }
+        outcomes = fan_out([lambda call=call: self._timed_section(call) for call in sections.values()])
+        return self._composite_result("port_snapshot", dict(zip(sections, outcomes)))
+
+    def ship_dossier(self, mmsi: int, port_code: str = None) -> dict[str, Any]:
+        """
+        船舶档案汇总：并发查询实时位置、船舶档案、挂靠状态、船籍和精准 ETA，合并为一个结果。
+        各分项与单独调用对应工具共用响应缓存和并发合并。
+        参数：
+            mmsi: 船舶mmsi编号
+            port_code: 可选，精准 ETA 的目的港五位码；不传时使用船舶上报的目的港
+        返回：
+            data 中 position、particulars、status、registry、eta 各为对应工具的完整结果，单项失败不影响其他分项
+        """
+        sections: dict[str, Callable[[], dict[str, Any]]] = {
+            "position": lambda: self.get_single_ship(mmsi),
+            "particulars": lambda: self.search_ship_particular(mmsi=mmsi),
+            "status": lambda: self.get_ship_status(mmsi),
+            "registry": lambda: self.get_ship_registry(mmsi),
+            "eta": lambda: self.get_single_eta_precise(mmsi, port_code),
+        }
+        outcomes = fan_out([lambda call=call: self._timed_section(call) for call in sections.values()])
+        return self._composite_result("ship_dossier", dict(zip(sections, outcomes)))
+
     def get_ship_track(self, mmsi: int, start_time: int, end_time: int, output: int = 1) -> GetShipTrackResponse:
         """
         船舶轨迹查询
@@ -1231,7 +2018,16 @@ class ShipxyAPI:
         返回：
             GetShipTrackResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/GetShipTrack"
+        tracks = self._track_cache(start_time, end_time, output)
+        if tracks is not None:
+            return self._success_result("GetShipTrack", self._cached_track(tracks, mmsi, start_time, end_time), GetShipTrackResponse)
+        windows = self._track_windows(start_time, end_time) if output == 1 else []
+        if len(windows) > 1:
+            outcomes = fan_out([lambda window=window: self._request("GetShipTrack", self._track_params(mmsi, *window)) for window in windows])
+            for outcome in outcomes:
+                if isinstance(outcome, Exception):
+                    raise outcome
+            return self._success_result("GetShipTrack", self._merge_track_windows(outcomes), GetShipTrackResponse)
         params = {
             "key": self.api_key,
             "mmsi": mmsi,
@@ -1239,14 +2035,32 @@ class ShipxyAPI:
             "end_time": end_time,
             "output": output
         }
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetShipTrack", params)
         return self._success_result("GetShipTrack", resp_json, GetShipTrackResponse)
 
+    def _cached_track(self, tracks: TrackCache, mmsi: int, start_time: int, end_time: int) -> dict[str, Any]:
+        """
+        只向上游补查轨迹缓存未覆盖的时间段，再与已缓存的轨迹点按 utc 合并去重。
+        较长的缺口按 track_window 拆成子窗口并发补查；部分子窗口失败时已成功的部分仍写入缓存，重试只补查剩余时段。
+        """
+        key = (self.api_key, int(mmsi))
+        gaps = tracks.missing(key, start_time, end_time)
+        windows = [window for gap in gaps for window in self._track_windows(*gap)]
+
+        def fetch_window(window_start: int, window_end: int) -> str:
+            params = self._track_params(mmsi, window_start, window_end)
+            resp_json, _ = self._fetch("GetShipTrack", params, self._request_key("GetShipTrack", params))
+            tracks.add(key, window_start, window_end, resp_json.get("data") or [])
+            return resp_json.get("msg", "")
+
+        outcomes = fan_out([lambda window=window: fetch_window(*window) for window in windows])
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                raise outcome
+        if len(windows) > 1:
+            _record_call_meta("track_windows", len(windows))
+        return self._assemble_track(tracks, key, start_time, end_time, gaps, outcomes[-1] if outcomes else "")
+
     def search_ship_approach(self, mmsi: int, start_time: int, end_time: int, approach_zone: int = None) -> SearchShipApproachResponse:
         """
         船舶搭靠事件查询
@@ -1258,7 +2072,6 @@ class ShipxyAPI:
         返回：
             SearchShipApproachResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/SearchshipApproach"
         params = {
             "key": self.api_key,
             "mmsi": mmsi,
@@ -1267,12 +2080,7 @@ class ShipxyAPI:
         }
         if approach_zone is not None:
             params["approach_zone"] = approach_zone
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg") or resp_json.get("message", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("SearchshipApproach", params)
         return self._success_result("SearchshipApproach", resp_json, SearchShipApproachResponse)
 
     def get_port_of_call_by_ship(self, mmsi: int, start_time: int, end_time: int, imo: int = None, ship_name: str = None, call_sign: str = None, time_zone: int = 2) -> GetPortOfCallByShipResponse:
@@ -1289,7 +2097,6 @@ class ShipxyAPI:
         返回：
             GetPortOfCallByShipResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/GetPortofCallByShip"
         params = {
             "key": self.api_key,
             "mmsi": mmsi,
@@ -1303,12 +2110,7 @@ class ShipxyAPI:
             params["ship_name"] = ship_name
         if call_sign is not None:
             params["call_sign"] = call_sign
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetPortofCallByShip", params)
         return self._success_result("GetPortofCallByShip", resp_json, GetPortOfCallByShipResponse)
 
     def get_port_of_call_by_ship_port(self, mmsi: int, port_code: str, start_time: int, end_time: int, imo: int = None, ship_name: str = None, call_sign: str = None, time_zone: int = 2) -> GetPortOfCallByShipPortResponse:
@@ -1326,7 +2128,6 @@ class ShipxyAPI:
         返回：
             GetPortOfCallByShipPortResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/GetPortofCallByShipPort"
         params = {
             "key": self.api_key,
             "mmsi": mmsi,
@@ -1341,12 +2142,7 @@ class ShipxyAPI:
             params["ship_name"] = ship_name
         if call_sign is not None:
             params["call_sign"] = call_sign
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetPortofCallByShipPort", params)
         return self._success_result("GetPortofCallByShipPort", resp_json, GetPortOfCallByShipPortResponse)
 
     def get_ship_status(self, mmsi: int, imo: int = None, ship_name: str = None, call_sign: str = None, time_zone: int = 2) -> GetShipStatusResponse:
@@ -1361,7 +2157,6 @@ class ShipxyAPI:
         返回：
             GetShipStatusResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/GetShipStatus"
         params = {
             "key": self.api_key,
             "mmsi": mmsi,
@@ -1373,12 +2168,7 @@ class ShipxyAPI:
             params["ship_name"] = ship_name
         if call_sign is not None:
             params["call_sign"] = call_sign
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetShipStatus", params)
         return self._success_result("GetShipStatus", resp_json, GetShipStatusResponse)
 
     def get_port_of_call_by_port(self, port_code: str, start_time: int, end_time: int, type_: int = 1, time_zone: int = 2) -> GetPortOfCallByPortResponse:
@@ -1393,7 +2183,6 @@ class ShipxyAPI:
         返回：
             GetPortOfCallByPortResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/GetPortofCallByPort"
         params = {
             "key": self.api_key,
             "port_code": port_code,
@@ -1402,12 +2191,7 @@ class ShipxyAPI:
             "type": type_,
             "time_zone": time_zone
         }
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetPortofCallByPort", params)
         return self._success_result("GetPortofCallByPort", resp_json, GetPortOfCallByPortResponse)
 
     def plan_route_by_point(self, start_point: str, end_point: str = None, end_port_code: str = None, avoid: str = None, through: str = None) -> PlanRouteByPointResponse:
@@ -1422,7 +2206,6 @@ class ShipxyAPI:
         返回：
             PlanRouteByPointResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/PlanRouteByPoint"
         params = {
             "key": self.api_key,
             "start_point": start_point,
@@ -1435,12 +2218,7 @@ class ShipxyAPI:
             params["avoid"] = avoid
         if through is not None:
             params["through"] = through
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("PlanRouteByPoint", params)
         return self._success_result("PlanRouteByPoint", resp_json, PlanRouteByPointResponse)
 
     def plan_route_by_port(self, start_port_code: str, end_port_code: str, avoid: str = None, through: str = None) -> PlanRouteByPortResponse:
@@ -1454,7 +2232,6 @@ class ShipxyAPI:
         返回：
             PlanRouteByPortResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/PlanRouteByPort"
         params = {
             "key": self.api_key,
             "start_port_code": start_port_code,
@@ -1464,12 +2241,7 @@ class ShipxyAPI:
             params["avoid"] = avoid
         if through is not None:
             params["through"] = through
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("PlanRouteByPort", params)
         return self._success_result("PlanRouteByPort", resp_json, PlanRouteByPortResponse)
 
     def get_single_eta_precise(self, mmsi: int, port_code: str = None, speed: float = None) -> GetSingleETAPreciseResponse:
@@ -1482,7 +2254,6 @@ class ShipxyAPI:
         返回：
             GetSingleETAPreciseResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/GetSingleETAPrecise"
         params = {
             "key": self.api_key,
             "mmsi": mmsi
@@ -1491,12 +2262,7 @@ class ShipxyAPI:
             params["port_code"] = port_code
         if speed is not None:
             params["speed"] = speed
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetSingleETAPrecise", params)
         return self._success_result("GetSingleETAPrecise", resp_json, GetSingleETAPreciseResponse)
 
     def get_weather(self, weather_type: int) -> GetWeatherResponse:
@@ -1507,17 +2273,11 @@ class ShipxyAPI:
         返回：
             GetWeatherResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/GetWeather"
         params = {
             "key": self.api_key,
             "weather_type": weather_type
         }
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetWeather", params)
         return self._success_result("GetWeather", resp_json, GetWeatherResponse)
 
     def get_all_typhoon(self) -> GetAllTyphoonResponse:
@@ -1526,14 +2286,8 @@ class ShipxyAPI:
         返回：
             GetAllTyphoonResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/GetAllTyphoon"
         params = {"key": self.api_key}
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetAllTyphoon", params)
         return self._success_result("GetAllTyphoon", resp_json, GetAllTyphoonResponse)
 
     def get_single_typhoon(self, typhoon_id: int) -> GetSingleTyphoonResponse:
@@ -1544,14 +2298,8 @@ class ShipxyAPI:
         返回：
             GetSingleTyphoonResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/GetSingleTyphoon"
         params = {"key": self.api_key, "typhoon_id": typhoon_id}
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetSingleTyphoon", params)
         return self._success_result("GetSingleTyphoon", resp_json, GetSingleTyphoonResponse)
 
     def get_tides(self) -> GetTidesResponse:
@@ -1560,14 +2308,8 @@ class ShipxyAPI:
         返回：
             GetTidesResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/GetTides"
         params = {"key": self.api_key}
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetTides", params)
         return self._success_result("GetTides", resp_json, GetTidesResponse)
 
     def get_tide_data(self, port_code: int, start_date: str, end_date: str) -> GetTideDataResponse:
@@ -1580,19 +2322,16 @@ class ShipxyAPI:
         返回：
             GetTideDataResponse: 查询结果，强类型返回
         """
-        url = f"{self.base_url}/v3/GetTideData"
         params = {
             "key": self.api_key,
             "port_code": port_code,
             "start_date": start_date,
             "end_date": end_date
         }
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        tide_range = self._tide_cache(start_date, end_date)
+        if tide_range is not None:
+            return self._success_result("GetTideData", self._cached_tide_data("GetTideData", port_code, *tide_range), GetTideDataResponse)
+        resp_json = self._request("GetTideData", params)
         return self._success_result("GetTideData", resp_json, GetTideDataResponse)
 
     def get_weather_by_point(self, lng: float, lat: float, weather_time: int = None) -> GetWeatherByPointResponse:
@@ -1611,7 +2350,6 @@ class ShipxyAPI:
         异常：
             请求失败或返回错误码
         """
-        url = f"{self.base_url}/v3/GetWeatherByPoint"
         params = {
             "key": self.api_key,
             "lng": lng,
@@ -1619,15 +2357,7 @@ class ShipxyAPI:
         }
         if weather_time is not None:
             params["weather_time"] = weather_time
-        try:
-            response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        except Exception as e:
-            raise Exception(f"请求船讯网失败: {e}")
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetWeatherByPoint", params)
         return self._success_result("GetWeatherByPoint", resp_json, GetWeatherByPointResponse)
 
     def get_global_tides(self) -> GetGlobalTidesResponse:
@@ -1636,14 +2366,8 @@ class ShipxyAPI:
         返回：
             GetGlobalTidesResponse: 全球潮汐观测站列表。
         """
-        url = f"{self.base_url}/v3/GetGlobalTides"
         params = {"key": self.api_key}
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetGlobalTides", params)
         return self._success_result("GetGlobalTides", resp_json, GetGlobalTidesResponse)
 
     def get_global_tide_data(self, port_code: int, start_date: str, end_date: str) -> GetGlobalTideDataResponse:
@@ -1656,19 +2380,16 @@ class ShipxyAPI:
         返回：
             GetGlobalTideDataResponse: 潮汐概览和小时潮高数据。
         """
-        url = f"{self.base_url}/v3/GetGlobalTideData"
         params = {
             "key": self.api_key,
             "port_code": port_code,
             "start_date": start_date,
             "end_date": end_date,
         }
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        tide_range = self._tide_cache(start_date, end_date)
+        if tide_range is not None:
+            return self._success_result("GetGlobalTideData", self._cached_tide_data("GetGlobalTideData", port_code, *tide_range), GetGlobalTideDataResponse)
+        resp_json = self._request("GetGlobalTideData", params)
         return self._success_result("GetGlobalTideData", resp_json, GetGlobalTideDataResponse)
 
     def current_weather(self, lng: float, lat: float) -> WeatherFlexibleResponse:
@@ -1680,14 +2401,8 @@ class ShipxyAPI:
         返回：
             WeatherFlexibleResponse: 实时大气气象和海洋气象数据。
         """
-        url = f"{self.base_url}/v3/CurrentWeather"
         params = {"key": self.api_key, "lng": lng, "lat": lat}
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("CurrentWeather", params)
         return self._success_result("CurrentWeather", resp_json, WeatherFlexibleResponse)
 
     def future_weather(self, lng: float, lat: float) -> WeatherFlexibleResponse:
@@ -1699,14 +2414,8 @@ class ShipxyAPI:
         返回：
             WeatherFlexibleResponse: 未来 7 天大气气象和海洋气象预报数据。
         """
-        url = f"{self.base_url}/v3/FutureWeather"
         params = {"key": self.api_key, "lng": lng, "lat": lat}
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("FutureWeather", params)
         return self._success_result("FutureWeather", resp_json, WeatherFlexibleResponse)
 
     def history_weather(self, lng: float, lat: float, start_time: str, end_time: str) -> WeatherFlexibleResponse:
@@ -1720,14 +2429,8 @@ class ShipxyAPI:
         返回：
             WeatherFlexibleResponse: 历史大气气象和海洋气象数据。
         """
-        url = f"{self.base_url}/v3/HistoryWeather"
         params = {"key": self.api_key, "lng": lng, "lat": lat, "start_time": start_time, "end_time": end_time}
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("HistoryWeather", params)
         return self._success_result("HistoryWeather", resp_json, WeatherFlexibleResponse)
 
     def get_nav_warning(self, start_time: str, end_time: str) -> GetNavWarningResponse:
@@ -1739,66 +2442,756 @@ class ShipxyAPI:
         返回：
             GetNavWarningResponse: 中国海事局航行警告列表。
         """
-        url = f"{self.base_url}/v3/GetNavWarning"
         params = {"key": self.api_key, "start_time": start_time, "end_time": end_time}
-        response = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            raise Exception(f"HTTP请求失败: {response.status_code}")
-        resp_json = response.json()
-        if resp_json.get("status") != 0:
-            raise ShipxyAPIError(resp_json.get("msg", "未知错误"), resp_json.get("status"))
+        resp_json = self._request("GetNavWarning", params)
         return self._success_result("GetNavWarning", resp_json, GetNavWarningResponse)
 
 
-def _wrap_shipxy_api_methods() -> None:
-    method_names = [
-        "search_ship",
-        "get_single_ship",
-        "get_many_ship",
-        "get_fleet_ship",
-        "get_surrounding_ship",
-        "get_area_ship",
-        "get_ship_registry",
-        "search_ship_particular",
-        "search_port",
-        "get_berth_ships",
-        "get_anchor_ships",
-        "get_eta_ships",
-        "get_ship_track",
-        "search_ship_approach",
-        "get_port_of_call_by_ship",
-        "get_port_of_call_by_ship_port",
-        "get_ship_status",
-        "get_port_of_call_by_port",
-        "plan_route_by_point",
-        "plan_route_by_port",
-        "get_single_eta_precise",
-        "get_weather",
-        "get_all_typhoon",
-        "get_single_typhoon",
-        "get_tides",
-        "get_tide_data",
-        "get_weather_by_point",
-        "get_global_tides",
-        "get_global_tide_data",
-        "current_weather",
-        "future_weather",
-        "history_weather",
-        "get_nav_warning",
-    ]
-
-    for method_name in method_names:
-        original = getattr(ShipxyAPI, method_name)
-
-        def wrapped(self, *args, __original=original, __method_name=method_name, **kwargs):
+class AsyncShipxyAPI(_ShipxyAPIBase):
+    """船讯网API异步封装，所有接口与 ShipxyAPI 同名同参，返回值需 await。"""
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "http://api.shipxy.com/apicall",
+        *,
+        client: httpx.AsyncClient | None = None,
+        max_connections: int = DEFAULT_ASYNC_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_POOL_MAXSIZE,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+        timeouts: dict[str, tuple[float, float]] | None = None,
+        retry_policy: RetryPolicy | None = None,
+        breakers: CircuitBreakerRegistry | None = None,
+        rate_limiter: RateLimiter | None = None,
+        coalesce: bool = True,
+        cache: ResponseCache | None = None,
+        track_window: int = DEFAULT_TRACK_WINDOW_SECONDS,
+        area_tile_degrees: float = DEFAULT_AREA_TILE_DEGREES,
+    ):
+        """
+        初始化船讯网API异步客户端
+
+        参数：
+            api_key: 船讯网提供的API key
+            base_url: API基础URL
+            client: 可选的共享 httpx.AsyncClient；传入时由调用方负责关闭
+            max_connections: 连接池最大并发连接数
+            max_keepalive_connections: 保持空闲的长连接数
+            keepalive_expiry: 空闲长连接的保活秒数
+            timeouts: 按接口名覆盖默认的 (连接超时, 读取超时)，参见 ENDPOINT_TIMEOUTS
+            retry_policy: 网络错误、超时和 5xx 的重试策略，默认最多 3 次、指数退避加抖动
+            breakers: 按接口的熔断器注册表；多个客户端共享时熔断状态全局生效
+            rate_limiter: 可选的令牌桶限流器，按 API key 平滑突发调用；排队时间记录在 meta.rate_limit_wait_ms
+            coalesce: 是否合并参数完全相同的并发请求，只向上游发出一次；共享结果的调用带 meta.coalesced
+            cache: 可选的响应缓存，按接口新鲜期复用成功响应，结果带 meta.cache（hit/miss/stale）
+            track_window: 轨迹查询子窗口秒数，更长的时间范围拆分后并发查询再按 utc 合并去重；0 表示不拆分
+            area_tile_degrees: 区域查询的瓦片边长（度），更大的多边形按网格拆分后并发查询再合并去重；0 表示不拆分
+        """
+        super().__init__(api_key, base_url, timeouts, retry_policy, breakers, rate_limiter, cache, track_window, area_tile_degrees)
+        self._owns_client = client is None
+        self._single_flight = AsyncSingleFlight() if coalesce else None
+        self._background_tasks: set[asyncio.Task] = set()
+        self.client = client or httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=DEFAULT_TIMEOUT,
+        )
+
+    async def aclose(self) -> None:
+        """关闭自建的 httpx.AsyncClient；共享客户端由调用方关闭。未完成的后台刷新会被取消。"""
+        for task in list(self._background_tasks):
+            task.cancel()
+        if self._owns_client:
+            await self.client.aclose()
+
+    async def __aenter__(self) -> "AsyncShipxyAPI":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def _request(self, endpoint: str, params: dict[str, Any]) -> dict[str, Any]:
+        """异步请求执行器，超时、截止时间、缓存、并发合并和错误处理与 ShipxyAPI._request 一致。"""
+        key = self._request_key(endpoint, params)
+        cached = self._cache_lookup(endpoint, key)
+        if cached is not None and cached.fresh:
+            return cached.value
+        if cached is not None and cached.revalidate:
+            self._revalidate_in_background(endpoint, params, key)
+            return self._stale_response(cached, revalidating=True)
+        self._check_negative_cache(endpoint, key)
+        try:
+            resp_json, shared = await self._fetch(endpoint, params, key)
+        except ShipxyTransportError:
+            if cached is None:
+                raise
+            return self._stale_response(cached)
+        except ShipxyAPIError as exc:
+            self._remember_not_found(endpoint, key, exc)
+            raise
+        if not shared:
+            self._cache_store(endpoint, key, resp_json, params)
+        return resp_json
+
+    def _revalidate_in_background(self, endpoint: str, params: dict[str, Any], key: tuple[Any, ...]) -> None:
+        """在独立 Task 中刷新缓存；使用空上下文，不继承调用方的截止时间和 meta。"""
+        if not self._start_revalidation(key):
+            return
+        task = asyncio.get_running_loop().create_task(self._revalidate(endpoint, params, key), context=contextvars.Context())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _revalidate(self, endpoint: str, params: dict[str, Any], key: tuple[Any, ...]) -> None:
+        try:
+            resp_json, shared = await self._fetch(endpoint, params, key)
+            if not shared:
+                self._cache_store(endpoint, key, resp_json, params)
+        except Exception:
+            # 刷新失败时保留旧缓存，下一次调用会再次尝试
+            pass
+        finally:
+            self._finish_revalidation(key)
+
+    async def _cached_tide_data(self, endpoint: str, port_code: int, tides: TideCache, start: date, end: date) -> dict[str, Any]:
+        """潮汐按日缓存补查，参见 ShipxyAPI._cached_tide_data；多个缺失日期段并发补查。"""
+        key = (self.api_key, endpoint, str(port_code))
+        runs = tides.missing(key, start, end)
+
+        async def fetch_run(run_start: date, run_end: date) -> tuple[dict[str, Any], bool]:
+            params = self._tide_params(port_code, run_start, run_end)
+            resp_json, _ = await self._fetch(endpoint, params, self._request_key(endpoint, params))
+            return resp_json, tides.add(key, run_start, run_end, resp_json.get("data"))
+
+        results = await _gather(*(fetch_run(run_start, run_end) for run_start, run_end in runs))
+        if not all(stored for _, stored in results):
+            # 无法按天拆分的响应结构不做按日缓存，直接使用完整日期范围的查询结果
+            if runs == [(start, end)]:
+                return results[0][0]
+            return await self._request(endpoint, self._tide_params(port_code, start, end))
+        return self._assemble_tides(tides, key, start, end, runs, results[-1][0].get("msg", "") if results else "")
+
+    async def _fetch(self, endpoint: str, params: dict[str, Any], key: tuple[Any, ...]) -> tuple[dict[str, Any], bool]:
+        if self._single_flight is None:
+            return await self._execute(endpoint, params), False
+        try:
+            resp_json, shared = await self._single_flight.do(key, lambda: self._execute(endpoint, params), timeout=self._flight_timeout())
+        except TimeoutError:
+            raise ShipxyTransportError("timeout", f"等待相同 {endpoint} 请求的结果超过调用截止时间。") from None
+        except Exception as exc:
+            if getattr(exc, "coalesced", False):
+                _record_call_meta("coalesced", True)
+            raise
+        if shared:
+            _record_call_meta("coalesced", True)
+        return resp_json, shared
+
+    async def _execute(self, endpoint: str, params: dict[str, Any]) -> dict[str, Any]:
+        """单个请求的限流、熔断和重试循环。"""
+        attempt = 1
+        while True:
+            wait = self._reserve_rate_limit(endpoint)
+            if wait:
+                await asyncio.sleep(wait)
+            breaker = self._acquire_circuit(endpoint)
+            try:
+                resp_json = await self._send(endpoint, params)
+            except ShipxyTransportError as exc:
+                delay = self._retry_delay(breaker, exc, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            except Exception:
+                # 上游有响应但内容无法解析，不计入熔断
+                breaker.record_success()
+                raise
+            breaker.record_success()
+            return self._check_response_json(resp_json)
+
+    async def _send(self, endpoint: str, params: dict[str, Any]) -> dict[str, Any]:
+        url = f"{self.base_url}/v3/{endpoint}"
+        connect, read = self._timeout_for(endpoint)
+        timeout = httpx.Timeout(read, connect=connect)
+        method = "GET"
+        try:
+            response = await self.client.get(url, params=params, timeout=timeout)
+            if response.status_code == 414:  # URI Too Long
+                method = "POST"
+                response = await self.client.post(url, data=params, timeout=timeout)
+        except httpx.TimeoutException as e:
+            raise ShipxyTransportError("timeout", f"请求船讯网超时: {e}", retryable=method == "GET")
+        except httpx.HTTPError as e:
+            raise ShipxyTransportError("network_error", f"请求船讯网失败: {e}", retryable=method == "GET")
+        if response.status_code != 200:
+            raise self._http_status_error(response.status_code, method)
+        return response.json()
+
+    async def search_ship(self, keywords: str, max_results: Optional[int] = None) -> SearchShipResponse:
+        """船舶模糊查询，参见 ShipxyAPI.search_ship。"""
+        params = {"key": self.api_key, "keywords": keywords}
+        if max_results is not None:
+            params["max"] = max_results
+        resp_json = await self._request("SearchShip", params)
+        return self._success_result("SearchShip", resp_json, SearchShipResponse)
+
+    async def get_single_ship(self, mmsi: int) -> SingleShipResponse:
+        """单船位置查询，参见 ShipxyAPI.get_single_ship。"""
+        resp_json = await self._request("GetSingleShip", {"key": self.api_key, "mmsi": mmsi})
+        return self._success_result("GetSingleShip", resp_json, SingleShipResponse)
+
+    async def get_many_ship(self, mmsis: list[int]) -> ManyShipResponse:
+        """多船位置查询，参见 ShipxyAPI.get_many_ship。"""
+        chunks = self._mmsi_chunks(mmsis)
+        if len(chunks) > 1:
+            outcomes = await _gather(
+                *(self._request("GetManyShip", {"key": self.api_key, "mmsis": ",".join(chunk)}) for chunk in chunks),
+                return_exceptions=True,
+            )
+            return self._merge_many_ship(chunks, outcomes)
+        params = {"key": self.api_key, "mmsis": ",".join(chunks[0] if chunks else [])}
+        resp_json = await self._request("GetManyShip", params)
+        return self._success_result("GetManyShip", resp_json, ManyShipResponse)
+
+    async def get_fleet_ship(self, fleet_id: str) -> FleetShipResponse:
+        """船队船位置查询，参见 ShipxyAPI.get_fleet_ship。"""
+        resp_json = await self._request("GetFleetShip", {"key": self.api_key, "fleet_id": fleet_id})
+        return self._success_result("GetFleetShip", resp_json, FleetShipResponse)
+
+    async def get_surrounding_ship(self, mmsi: int) -> SurRoundingShipResponse:
+        """周边船舶查询，参见 ShipxyAPI.get_surrounding_ship。"""
+        resp_json = await self._request("GetSurRoundingShip", {"key": self.api_key, "mmsi": mmsi})
+        return self._success_result("GetSurRoundingShip", resp_json, SurRoundingShipResponse)
+
+    async def get_area_ship(self, region: str, output: int = 1, scode: int = None, max_pages: int = None) -> AreaShipResponse:
+        """区域船舶查询，参见 ShipxyAPI.get_area_ship。"""
+        tiles = self._area_tiles(region) if scode is None and output == 1 else None
+        if tiles is not None:
+            polygon, regions = tiles
+            pages = max_pages or MAX_AREA_SHIP_PAGES
+            results = await _gather(*(self._fetch_area_tile(tile, pages) for tile in regions), return_exceptions=True)
+            return self._merge_area_tiles(polygon, regions, results)
+        if max_pages is not None and max_pages > 1:
+            return self._merge_area_pages([page async for page in self.iter_area_ship_pages(region, output, scode, max_pages)])
+        return await self._fetch_area_page(region, output, scode)
+
+    async def _fetch_area_page(self, region: str, output: int, scode: int | None) -> AreaShipResponse:
+        """查询区域船舶的一页，不拆分瓦片，参见 ShipxyAPI._fetch_area_page。"""
+        params = {"key": self.api_key, "region": region, "output": output}
+        if scode is not None:
+            params["scode"] = scode
+        resp_json = await self._request("GetAreaShip", params)
+        return self._success_result("GetAreaShip", resp_json, AreaShipResponse)
+
+    async def _fetch_area_tile(self, region: str, max_pages: int) -> dict[str, Any]:
+        """查询单个瓦片并自动翻页，参见 ShipxyAPI._fetch_area_tile。"""
+        pages: list[dict[str, Any]] = []
+        scode = None
+        for _ in range(max_pages):
             try:
-                return __original(self, *args, **kwargs)
+                page = await self._fetch_area_page(region, 1, scode)
             except Exception as exc:
-                return self._exception_result(__method_name, exc)
+                page = self._exception_result("get_area_ship", exc)
+            pages.append(page)
+            scode = self._next_area_scode(page)
+            if scode is None:
+                break
+        return self._merge_area_pages(pages)
+
+    async def iter_area_ship_pages(self, region: str, output: int = 1, scode: int = None, max_pages: int = MAX_AREA_SHIP_PAGES) -> AsyncIterator[dict[str, Any]]:
+        """逐页查询区域船舶的异步迭代器，参见 ShipxyAPI.iter_area_ship_pages。"""
+        for _ in range(max_pages):
+            page = await self.get_area_ship(region, output, scode)
+            yield page
+            scode = self._next_area_scode(page)
+            if scode is None:
+                return
+
+    async def get_ship_registry(self, mmsi: int) -> ShipRegistryResponse:
+        """船籍信息查询，参见 ShipxyAPI.get_ship_registry。"""
+        resp_json = await self._request("GetShipRegistry", {"key": self.api_key, "mmsi": mmsi})
+        return self._success_result("GetShipRegistry", resp_json, ShipRegistryResponse)
+
+    async def search_ship_particular(self, mmsi: int = None, imo: int = None, call_sign: str = None, ship_name: str = None) -> SearchShipParticularResponse:
+        """船舶档案查询，参见 ShipxyAPI.search_ship_particular。"""
+        params = {"key": self.api_key}
+        if mmsi is not None:
+            params["mmsi"] = mmsi
+        if imo is not None:
+            params["imo"] = imo
+        if call_sign is not None:
+            params["call_sign"] = call_sign
+        if ship_name is not None:
+            params["ship_name"] = ship_name
+        if len(params) == 1:
+            raise Exception("必须至少提供mmsi、imo、call_sign、ship_name中的一个")
+        resp_json = await self._request("SearchShipParticular", params)
+        return self._success_result("SearchShipParticular", resp_json, SearchShipParticularResponse)
+
+    async def search_port(self, keywords: str, max_results: int = None) -> SearchPortResponse:
+        """港口查询，参见 ShipxyAPI.search_port。"""
+        params = {"key": self.api_key, "keywords": keywords}
+        if max_results is not None:
+            params["max"] = max_results
+        resp_json = await self._request("SearchPort", params)
+        return self._success_result("SearchPort", resp_json, SearchPortResponse)
+
+    async def get_berth_ships(self, port_code: str, ship_type: int = None) -> GetBerthShipsResponse:
+        """港口靠泊船舶查询，参见 ShipxyAPI.get_berth_ships。"""
+        params = {"key": self.api_key, "port_code": port_code}
+        if ship_type is not None:
+            params["ship_type"] = ship_type
+        resp_json = await self._request("GetBerthShips", params)
+        return self._success_result("GetBerthShips", resp_json, GetBerthShipsResponse)
+
+    async def get_anchor_ships(self, port_code: str, ship_type: int = None) -> GetAnchorShipsResponse:
+        """港口锚地船舶查询，参见 ShipxyAPI.get_anchor_ships。"""
+        params = {"key": self.api_key, "port_code": port_code}
+        if ship_type is not None:
+            params["ship_type"] = ship_type
+        resp_json = await self._request("GetAnchorShips", params)
+        # 兼容返回结构为list或dict
+        if isinstance(resp_json.get("data"), dict):
+            return self._success_result("GetAnchorShips", {**resp_json, "total": 1, "data": [resp_json["data"]]}, GetAnchorShipsResponse)
+        return self._success_result("GetAnchorShips", resp_json, GetAnchorShipsResponse)
+
+    async def get_eta_ships(self, port_code: str, start_time: int, end_time: int, ship_type: int = None) -> GetETAShipsResponse:
+        """预抵港船舶查询，参见 ShipxyAPI.get_eta_ships。"""
+        params = {"key": self.api_key, "port_code": port_code, "start_time": start_time, "end_time": end_time}
+        if ship_type is not None:
+            params["ship_type"] = ship_type
+        resp_json = await self._request("GetETAShips", params)
+        return self._success_result("GetETAShips", resp_json, GetETAShipsResponse)
+
+    async def _timed_section(self, call: Callable[[], Awaitable[T]]) -> T:
+        started = time.monotonic()
+        return self._with_elapsed(await call(), started)
+
+    async def port_snapshot(self, port_code: str, window_hours: int = DEFAULT_SNAPSHOT_WINDOW_HOURS, ship_type: int = None) -> dict[str, Any]:
+        """港口概览，参见 ShipxyAPI.port_snapshot。"""
+        (eta_start, eta_end), (calls_start, calls_end) = self._snapshot_windows(window_hours)
+        sections: dict[str, Callable[[], Awaitable[dict[str, Any]]]] = {
+            "berth_ships": lambda: self.get_berth_ships(port_code, ship_type),
+            "anchor_ships": lambda: self.get_anchor_ships(port_code, ship_type),
+            "eta_ships": lambda: self.get_eta_ships(port_code, eta_start, eta_end, ship_type),
+            "port_calls": lambda: self.get_port_of_call_by_port(port_code, calls_start, calls_end),
+        }
+        outcomes = await asyncio.gather(*(self._timed_section(call) for call in sections.values()), return_exceptions=True)
+        return self._composite_result("port_snapshot", dict(zip(sections, outcomes)))
+
+    async def ship_dossier(self, mmsi: int, port_code: str = None) -> dict[str, Any]:
+        """船舶档案汇总，参见 ShipxyAPI.ship_dossier。"""
+        sections: dict[str, Callable[[], Awaitable[dict[str, Any]]]] = {
+            "position": lambda: self.get_single_ship(mmsi),
+            "particulars": lambda: self.search_ship_particular(mmsi=mmsi),
+            "status": lambda: self.get_ship_status(mmsi),
+            "registry": lambda: self.get_ship_registry(mmsi),
+            "eta": lambda: self.get_single_eta_precise(mmsi, port_code),
+        }
+        outcomes = await asyncio.gather(*(self._timed_section(call) for call in sections.values()), return_exceptions=True)
+        return self._composite_result("ship_dossier", dict(zip(sections, outcomes)))
+
+    async def get_ship_track(self, mmsi: int, start_time: int, end_time: int, output: int = 1) -> GetShipTrackResponse:
+        """船舶轨迹查询，参见 ShipxyAPI.get_ship_track。"""
+        tracks = self._track_cache(start_time, end_time, output)
+        if tracks is not None:
+            return self._success_result("GetShipTrack", await self._cached_track(tracks, mmsi, start_time, end_time), GetShipTrackResponse)
+        windows = self._track_windows(start_time, end_time) if output == 1 else []
+        if len(windows) > 1:
+            responses = await _gather(*(self._request("GetShipTrack", self._track_params(mmsi, *window)) for window in windows))
+            return self._success_result("GetShipTrack", self._merge_track_windows(list(responses)), GetShipTrackResponse)
+        params = {"key": self.api_key, "mmsi": mmsi, "start_time": start_time, "end_time": end_time, "output": output}
+        resp_json = await self._request("GetShipTrack", params)
+        return self._success_result("GetShipTrack", resp_json, GetShipTrackResponse)
+
+    async def _cached_track(self, tracks: TrackCache, mmsi: int, start_time: int, end_time: int) -> dict[str, Any]:
+        """轨迹区间缓存补查，参见 ShipxyAPI._cached_track；各缺口的子窗口并发补查。"""
+        key = (self.api_key, int(mmsi))
+        gaps = tracks.missing(key, start_time, end_time)
+        windows = [window for gap in gaps for window in self._track_windows(*gap)]
+
+        async def fetch_window(window_start: int, window_end: int) -> str:
+            params = self._track_params(mmsi, window_start, window_end)
+            resp_json, _ = await self._fetch("GetShipTrack", params, self._request_key("GetShipTrack", params))
+            tracks.add(key, window_start, window_end, resp_json.get("data") or [])
+            return resp_json.get("msg", "")
+
+        # 与同步版本一致：等待所有子窗口结束，已成功的子窗口写入缓存后再抛出第一个失败
+        messages = await _gather(*(fetch_window(*window) for window in windows), return_exceptions=True)
+        for message in messages:
+            if isinstance(message, BaseException):
+                raise message
+        if len(windows) > 1:
+            _record_call_meta("track_windows", len(windows))
+        return self._assemble_track(tracks, key, start_time, end_time, gaps, messages[-1] if messages else "")
+
+    async def search_ship_approach(self, mmsi: int, start_time: int, end_time: int, approach_zone: int = None) -> SearchShipApproachResponse:
+        """船舶搭靠事件查询，参见 ShipxyAPI.search_ship_approach。"""
+        params = {"key": self.api_key, "mmsi": mmsi, "start_time": start_time, "end_time": end_time}
+        if approach_zone is not None:
+            params["approach_zone"] = approach_zone
+        resp_json = await self._request("SearchshipApproach", params)
+        return self._success_result("SearchshipApproach", resp_json, SearchShipApproachResponse)
+
+    async def get_port_of_call_by_ship(self, mmsi: int, start_time: int, end_time: int, imo: int = None, ship_name: str = None, call_sign: str = None, time_zone: int = 2) -> GetPortOfCallByShipResponse:
+        """船舶靠港记录查询，参见 ShipxyAPI.get_port_of_call_by_ship。"""
+        params = {"key": self.api_key, "mmsi": mmsi, "start_time": start_time, "end_time": end_time, "time_zone": time_zone}
+        if imo is not None:
+            params["imo"] = imo
+        if ship_name is not None:
+            params["ship_name"] = ship_name
+        if call_sign is not None:
+            params["call_sign"] = call_sign
+        resp_json = await self._request("GetPortofCallByShip", params)
+        return self._success_result("GetPortofCallByShip", resp_json, GetPortOfCallByShipResponse)
+
+    async def get_port_of_call_by_ship_port(self, mmsi: int, port_code: str, start_time: int, end_time: int, imo: int = None, ship_name: str = None, call_sign: str = None, time_zone: int = 2) -> GetPortOfCallByShipPortResponse:
+        """船舶在指定港口的靠港记录查询，参见 ShipxyAPI.get_port_of_call_by_ship_port。"""
+        params = {"key": self.api_key, "mmsi": mmsi, "port_code": port_code, "start_time": start_time, "end_time": end_time, "time_zone": time_zone}
+        if imo is not None:
+            params["imo"] = imo
+        if ship_name is not None:
+            params["ship_name"] = ship_name
+        if call_sign is not None:
+            params["call_sign"] = call_sign
+        resp_json = await self._request("GetPortofCallByShipPort", params)
+        return self._success_result("GetPortofCallByShipPort", resp_json, GetPortOfCallByShipPortResponse)
+
+    async def get_ship_status(self, mmsi: int, imo: int = None, ship_name: str = None, call_sign: str = None, time_zone: int = 2) -> GetShipStatusResponse:
+        """船舶状态查询，参见 ShipxyAPI.get_ship_status。"""
+        params = {"key": self.api_key, "mmsi": mmsi, "time_zone": time_zone}
+        if imo is not None:
+            params["imo"] = imo
+        if ship_name is not None:
+            params["ship_name"] = ship_name
+        if call_sign is not None:
+            params["call_sign"] = call_sign
+        resp_json = await self._request("GetShipStatus", params)
+        return self._success_result("GetShipStatus", resp_json, GetShipStatusResponse)
+
+    async def get_port_of_call_by_port(self, port_code: str, start_time: int, end_time: int, type_: int = 1, time_zone: int = 2) -> GetPortOfCallByPortResponse:
+        """港口靠港记录查询，参见 ShipxyAPI.get_port_of_call_by_port。"""
+        params = {"key": self.api_key, "port_code": port_code, "start_time": start_time, "end_time": end_time, "type": type_, "time_zone": time_zone}
+        resp_json = await self._request("GetPortofCallByPort", params)
+        return self._success_result("GetPortofCallByPort", resp_json, GetPortOfCallByPortResponse)
+
+    async def plan_route_by_point(self, start_point: str, end_point: str = None, end_port_code: str = None, avoid: str = None, through: str = None) -> PlanRouteByPointResponse:
+        """航线规划（经纬度点），参见 ShipxyAPI.plan_route_by_point。"""
+        params = {"key": self.api_key, "start_point": start_point}
+        if end_point is not None:
+            params["end_point"] = end_point
+        if end_port_code is not None:
+            params["end_port_code"] = end_port_code
+        if avoid is not None:
+            params["avoid"] = avoid
+        if through is not None:
+            params["through"] = through
+        resp_json = await self._request("PlanRouteByPoint", params)
+        return self._success_result("PlanRouteByPoint", resp_json, PlanRouteByPointResponse)
+
+    async def plan_route_by_port(self, start_port_code: str, end_port_code: str, avoid: str = None, through: str = None) -> PlanRouteByPortResponse:
+        """航线规划（港口），参见 ShipxyAPI.plan_route_by_port。"""
+        params = {"key": self.api_key, "start_port_code": start_port_code, "end_port_code": end_port_code}
+        if avoid is not None:
+            params["avoid"] = avoid
+        if through is not None:
+            params["through"] = through
+        resp_json = await self._request("PlanRouteByPort", params)
+        return self._success_result("PlanRouteByPort", resp_json, PlanRouteByPortResponse)
+
+    async def get_single_eta_precise(self, mmsi: int, port_code: str = None, speed: float = None) -> GetSingleETAPreciseResponse:
+        """单船精确ETA查询，参见 ShipxyAPI.get_single_eta_precise。"""
+        params = {"key": self.api_key, "mmsi": mmsi}
+        if port_code is not None:
+            params["port_code"] = port_code
+        if speed is not None:
+            params["speed"] = speed
+        resp_json = await self._request("GetSingleETAPrecise", params)
+        return self._success_result("GetSingleETAPrecise", resp_json, GetSingleETAPreciseResponse)
+
+    async def get_weather(self, weather_type: int) -> GetWeatherResponse:
+        """区域气象查询，参见 ShipxyAPI.get_weather。"""
+        resp_json = await self._request("GetWeather", {"key": self.api_key, "weather_type": weather_type})
+        return self._success_result("GetWeather", resp_json, GetWeatherResponse)
+
+    async def get_all_typhoon(self) -> GetAllTyphoonResponse:
+        """获取全球台风列表，参见 ShipxyAPI.get_all_typhoon。"""
+        resp_json = await self._request("GetAllTyphoon", {"key": self.api_key})
+        return self._success_result("GetAllTyphoon", resp_json, GetAllTyphoonResponse)
+
+    async def get_single_typhoon(self, typhoon_id: int) -> GetSingleTyphoonResponse:
+        """获取单个台风信息，参见 ShipxyAPI.get_single_typhoon。"""
+        resp_json = await self._request("GetSingleTyphoon", {"key": self.api_key, "typhoon_id": typhoon_id})
+        return self._success_result("GetSingleTyphoon", resp_json, GetSingleTyphoonResponse)
+
+    async def get_tides(self) -> GetTidesResponse:
+        """查询国内潮汐观测站列表，参见 ShipxyAPI.get_tides。"""
+        resp_json = await self._request("GetTides", {"key": self.api_key})
+        return self._success_result("GetTides", resp_json, GetTidesResponse)
+
+    async def get_tide_data(self, port_code: int, start_date: str, end_date: str) -> GetTideDataResponse:
+        """查询单个港口潮汐观测站详情，参见 ShipxyAPI.get_tide_data。"""
+        params = {"key": self.api_key, "port_code": port_code, "start_date": start_date, "end_date": end_date}
+        tide_range = self._tide_cache(start_date, end_date)
+        if tide_range is not None:
+            return self._success_result("GetTideData", await self._cached_tide_data("GetTideData", port_code, *tide_range), GetTideDataResponse)
+        resp_json = await self._request("GetTideData", params)
+        return self._success_result("GetTideData", resp_json, GetTideDataResponse)
+
+    async def get_weather_by_point(self, lng: float, lat: float, weather_time: int = None) -> GetWeatherByPointResponse:
+        """单点海洋气象查询，参见 ShipxyAPI.get_weather_by_point。"""
+        params = {"key": self.api_key, "lng": lng, "lat": lat}
+        if weather_time is not None:
+            params["weather_time"] = weather_time
+        resp_json = await self._request("GetWeatherByPoint", params)
+        return self._success_result("GetWeatherByPoint", resp_json, GetWeatherByPointResponse)
+
+    async def get_global_tides(self) -> GetGlobalTidesResponse:
+        """查询全球潮汐观测站列表，参见 ShipxyAPI.get_global_tides。"""
+        resp_json = await self._request("GetGlobalTides", {"key": self.api_key})
+        return self._success_result("GetGlobalTides", resp_json, GetGlobalTidesResponse)
+
+    async def get_global_tide_data(self, port_code: int, start_date: str, end_date: str) -> GetGlobalTideDataResponse:
+        """查询单个全球潮汐观测站详情，参见 ShipxyAPI.get_global_tide_data。"""
+        params = {"key": self.api_key, "port_code": port_code, "start_date": start_date, "end_date": end_date}
+        tide_range = self._tide_cache(start_date, end_date)
+        if tide_range is not None:
+            return self._success_result("GetGlobalTideData", await self._cached_tide_data("GetGlobalTideData", port_code, *tide_range), GetGlobalTideDataResponse)
+        resp_json = await self._request("GetGlobalTideData", params)
+        return self._success_result("GetGlobalTideData", resp_json, GetGlobalTideDataResponse)
+
+    async def current_weather(self, lng: float, lat: float) -> WeatherFlexibleResponse:
+        """新全球实时气象查询，参见 ShipxyAPI.current_weather。"""
+        resp_json = await self._request("CurrentWeather", {"key": self.api_key, "lng": lng, "lat": lat})
+        return self._success_result("CurrentWeather", resp_json, WeatherFlexibleResponse)
+
+    async def future_weather(self, lng: float, lat: float) -> WeatherFlexibleResponse:
+        """新全球未来气象预报查询，参见 ShipxyAPI.future_weather。"""
+        resp_json = await self._request("FutureWeather", {"key": self.api_key, "lng": lng, "lat": lat})
+        return self._success_result("FutureWeather", resp_json, WeatherFlexibleResponse)
+
+    async def history_weather(self, lng: float, lat: float, start_time: str, end_time: str) -> WeatherFlexibleResponse:
+        """历史气象记录查询，参见 ShipxyAPI.history_weather。"""
+        params = {"key": self.api_key, "lng": lng, "lat": lat, "start_time": start_time, "end_time": end_time}
+        resp_json = await self._request("HistoryWeather", params)
+        return self._success_result("HistoryWeather", resp_json, WeatherFlexibleResponse)
+
+    async def get_nav_warning(self, start_time: str, end_time: str) -> GetNavWarningResponse:
+        """航行警告查询，参见 ShipxyAPI.get_nav_warning。"""
+        params = {"key": self.api_key, "start_time": start_time, "end_time": end_time}
+        resp_json = await self._request("GetNavWarning", params)
+        return self._success_result("GetNavWarning", resp_json, GetNavWarningResponse)
+
+
+# 变化缓慢、适合落盘缓存的接口及其响应模型；模型 schema 变化时对应的磁盘缓存自动失效
+PERSISTENT_CACHE_MODELS: dict[str, type[BaseModel]] = {
+    "GetTides": GetTidesResponse,
+    "GetGlobalTides": GetGlobalTidesResponse,
+    "SearchPort": SearchPortResponse,
+    "SearchShipParticular": SearchShipParticularResponse,
+}
+
+
+def create_response_cache(max_bytes: int = DEFAULT_CACHE_MAX_BYTES, cache_dir: str | None = None) -> ResponseCache:
+    """
+    创建响应缓存。
+    参数：
+        max_bytes: 内存缓存上限（字节）
+        cache_dir: 可选的磁盘缓存目录；传入时潮汐站、港口、船舶档案查询结果写入 SQLite，跨进程复用
+    """
+    persistent = PersistentCache(cache_dir, PERSISTENT_CACHE_MODELS) if cache_dir else None
+    return ResponseCache(max_bytes=max_bytes, persistent=persistent)
+
+
+class ShipxyClientRegistry:
+    """
+    按 API key 复用长生命周期 ShipxyAPI 客户端的有界注册表。
+
+    同一个 key 的所有调用共享一个客户端及其连接池；超过 idle_timeout 秒未使用的客户端
+    和超出 max_clients 时最久未使用的客户端会被移除。被移除的客户端如果仍有通过 lease 借出的调用
+    或未完成的后台缓存刷新，关闭推迟到最后一个调用归还且刷新结束之后。线程安全。
+    """
+    def __init__(self, max_clients: int = DEFAULT_MAX_CLIENTS, idle_timeout: float = DEFAULT_CLIENT_IDLE_TIMEOUT, **client_kwargs: Any):
+        """
+        参数：
+            max_clients: 最多同时保留的客户端数量
+            idle_timeout: 客户端空闲多少秒后被回收
+            client_kwargs: 创建 ShipxyAPI 时透传的参数，例如 base_url、pool_maxsize
+        """
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self.client_kwargs = client_kwargs
+        self._clients: OrderedDict[str | None, tuple[ShipxyAPI, float]] = OrderedDict()
+        # id(客户端) -> 借出中的调用数
+        self._leases: dict[int, int] = {}
+        # 已移除但仍在使用、等待关闭的客户端
+        self._retired: dict[int, ShipxyAPI] = {}
+        self._lock = threading.Lock()
+
+    def get(self, api_key: str | None) -> ShipxyAPI:
+        """
+        返回 api_key 对应的客户端，不存在时创建。
+        返回的客户端没有借出计数，被移除时可能立即关闭；执行调用请使用 lease。
+        """
+        with self._lock:
+            client, closable = self._checkout(api_key)
+        self._close_all(closable)
+        return client
+
+    @contextmanager
+    def lease(self, api_key: str | None) -> Iterator[ShipxyAPI]:
+        """借出 api_key 对应的客户端；借出期间客户端即使被移除也不会关闭。"""
+        with self._lock:
+            client, closable = self._checkout(api_key)
+            self._leases[id(client)] = self._leases.get(id(client), 0) + 1
+        self._close_all(closable)
+        try:
+            yield client
+        finally:
+            with self._lock:
+                remaining = self._leases[id(client)] - 1
+                if remaining:
+                    self._leases[id(client)] = remaining
+                else:
+                    del self._leases[id(client)]
+                closable = self._collect_retired()
+            self._close_all(closable)
+
+    def _checkout(self, api_key: str | None) -> tuple[ShipxyAPI, list[ShipxyAPI]]:
+        """在锁内取出或创建客户端并刷新使用时间，返回 (客户端, 可以立即关闭的已移除客户端)。"""
+        now = time.monotonic()
+        self._retire(self._pop_idle(now))
+        entry = self._clients.pop(api_key, None)
+        client = entry[0] if entry else ShipxyAPI(api_key=api_key, **self.client_kwargs)
+        self._clients[api_key] = (client, now)
+        while len(self._clients) > self.max_clients:
+            _, (oldest, _) = self._clients.popitem(last=False)
+            self._retire([oldest])
+        return client, self._collect_retired()
+
+    def _pop_idle(self, now: float) -> list[ShipxyAPI]:
+        idle = [key for key, (_, last_used) in self._clients.items() if now - last_used > self.idle_timeout]
+        return [self._clients.pop(key)[0] for key in idle]
+
+    def _retire(self, clients: list[ShipxyAPI]) -> None:
+        for client in clients:
+            self._retired[id(client)] = client
+
+    def _collect_retired(self) -> list[ShipxyAPI]:
+        """在锁内取出已移除、没有借出调用且后台刷新已结束的客户端。"""
+        closable = [
+            client for client_id, client in self._retired.items()
+            if client_id not in self._leases and not client.revalidation_pending
+        ]
+        for client in closable:
+            del self._retired[id(client)]
+        return closable
+
+    @staticmethod
+    def _close_all(clients: list[ShipxyAPI]) -> None:
+        for client in clients:
+            client.close()
+
+    def evict_idle(self) -> int:
+        """立即回收空闲客户端，返回回收数量；仍在使用的客户端稍后关闭。"""
+        with self._lock:
+            evicted = self._pop_idle(time.monotonic())
+            self._retire(evicted)
+            closable = self._collect_retired()
+        self._close_all(closable)
+        return len(evicted)
+
+    def close(self) -> None:
+        """关闭并移除全部客户端，包括等待关闭的已移除客户端。"""
+        with self._lock:
+            clients = [client for client, _ in self._clients.values()] + list(self._retired.values())
+            self._clients.clear()
+            self._retired.clear()
+        self._close_all(clients)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+
+SHIPXY_API_METHODS: tuple[str, ...] = (
+    "search_ship",
+    "get_single_ship",
+    "get_many_ship",
+    "get_fleet_ship",
+    "get_surrounding_ship",
+    "get_area_ship",
+    "get_ship_registry",
+    "search_ship_particular",
+    "search_port",
+    "get_berth_ships",
+    "get_anchor_ships",
+    "get_eta_ships",
+    "get_ship_track",
+    "search_ship_approach",
+    "get_port_of_call_by_ship",
+    "get_port_of_call_by_ship_port",
+    "get_ship_status",
+    "get_port_of_call_by_port",
+    "plan_route_by_point",
+    "plan_route_by_port",
+    "get_single_eta_precise",
+    "get_weather",
+    "get_all_typhoon",
+    "get_single_typhoon",
+    "get_tides",
+    "get_tide_data",
+    "get_weather_by_point",
+    "get_global_tides",
+    "get_global_tide_data",
+    "current_weather",
+    "future_weather",
+    "history_weather",
+    "get_nav_warning",
+    "port_snapshot",
+    "ship_dossier",
+)
+
+
+def _with_call_meta(result: Any, meta: dict[str, Any]) -> Any:
+    if meta and isinstance(result, dict):
+        result.setdefault("meta", {}).update(meta)
+    return result
+
+
+def _wrap_shipxy_api_methods(api_cls: type[_ShipxyAPIBase]) -> None:
+    for method_name in SHIPXY_API_METHODS:
+        original = getattr(api_cls, method_name)
+
+        if inspect.iscoroutinefunction(original):
+            async def wrapped(self, *args, __original=original, __method_name=method_name, **kwargs):
+                meta: dict[str, Any] = {}
+                token = _call_metadata.set(meta)
+                try:
+                    result = await __original(self, *args, **kwargs)
+                except Exception as exc:
+                    result = self._exception_result(__method_name, exc)
+                finally:
+                    _call_metadata.reset(token)
+                return _with_call_meta(result, meta)
+        else:
+            def wrapped(self, *args, __original=original, __method_name=method_name, **kwargs):
+                meta: dict[str, Any] = {}
+                token = _call_metadata.set(meta)
+                try:
+                    result = __original(self, *args, **kwargs)
+                except Exception as exc:
+                    result = self._exception_result(__method_name, exc)
+                finally:
+                    _call_metadata.reset(token)
+                return _with_call_meta(result, meta)
 
         wrapped.__name__ = original.__name__
         wrapped.__doc__ = original.__doc__
-        setattr(ShipxyAPI, method_name, wrapped)
+        setattr(api_cls, method_name, wrapped)
 
 
-_wrap_shipxy_api_methods()
+_wrap_shipxy_api_methods(ShipxyAPI)
+_wrap_shipxy_api_methods(AsyncShipxyAPI)
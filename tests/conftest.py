@@ -0,0 +1,20 @@
+import pytest
+
+from resilience import NO_RETRY
+from ship_service import ShipxyAPI
+from tests.fakes import FakeShipxy
+
+
+@pytest.fixture
+def upstream():
+    fake = FakeShipxy()
+    yield fake
+    fake.close()
+
+
+@pytest.fixture
+def api(upstream):
+    """不重试的同步客户端，失败场景下测试不必等待退避。"""
+    client = ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY)
+    yield client
+    client.close()
@@ -0,0 +1,83 @@
+"""测试用的本地 Shipxy 假上游：按接口名注册处理函数，记录每次请求。"""
+from __future__ import annotations
+
+import json
+import threading
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+Handler = Callable[[dict[str, str]], Any]
+
+
+def ship_record(mmsi: int | str, last_time_utc: int = 1700000000, lng: float = 120.0, lat: float = 30.0) -> dict[str, Any]:
+    return {
+        "mmsi": int(mmsi), "imo": 1234567, "call_sign": "CALL", "ship_name": "SHIP", "ship_cnname": "", "data_source": 1,
+        "ship_type": 70, "length": 100, "width": 20, "left": 10, "trail": 50, "draught": 8, "dest": "", "destcode": "",
+        "eta": "", "navistat": 0, "lat": lat, "lng": lng, "sog": 10, "cog": 90, "hdg": 90, "rot": 0,
+        "last_time": "", "last_time_utc": last_time_utc,
+    }
+
+
+def ok(data: Any, **extra: Any) -> dict[str, Any]:
+    return {"status": 0, "msg": "ok", "data": data, **extra}
+
+
+class FakeShipxy:
+    """
+    在本地线程中运行的假 Shipxy HTTP 服务。
+    handlers[接口名] 接收查询参数，返回响应 JSON，或 (HTTP 状态码, 响应 JSON)。
+    """
+
+    def __init__(self):
+        self.handlers: dict[str, Handler] = {
+            "GetSingleShip": lambda q: ok(ship_record(q["mmsi"])),
+            "GetManyShip": lambda q: ok([ship_record(mmsi) for mmsi in q["mmsis"].split(",")]),
+        }
+        self.calls: list[tuple[str, dict[str, str]]] = []
+        # 每次请求的客户端地址，用于判断连接是否复用
+        self.peers: list[tuple[str, int]] = []
+        self._lock = threading.Lock()
+        fake = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                parsed = urlparse(self.path)
+                endpoint = parsed.path.rsplit("/", 1)[-1]
+                query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+                with fake._lock:
+                    fake.calls.append((endpoint, query))
+                    fake.peers.append(self.client_address)
+                handler = fake.handlers.get(endpoint, lambda q: ok([]))
+                outcome = handler(query)
+                status, body = outcome if isinstance(outcome, tuple) else (200, outcome)
+                payload = json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    # 客户端已因超时断开
+                    pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), RequestHandler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}/apicall"
+
+    def endpoint_calls(self, endpoint: str) -> list[dict[str, str]]:
+        with self._lock:
+            return [query for name, query in self.calls if name == endpoint]
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,79 @@
+import pytest
+
+from resilience import NO_RETRY
+from ship_service import MAX_AREA_SHIP_PAGES, ShipxyAPI
+from tool_registry import invoke_tool
+from tests.fakes import ok, ship_record
+
+REGION = "120,30-121,30-121,31-120,31"
+PAGE_SIZE = 3
+
+
+def _paged(total, fail_page=None):
+    def handler(query):
+        offset = int(query.get("scode", 0))
+        if fail_page is not None and offset == (fail_page - 1) * PAGE_SIZE:
+            return 500, {"status": -1, "msg": "boom"}
+        ships = [ship_record(413000000 + index, lng=120.5, lat=30.5) for index in range(offset, min(offset + PAGE_SIZE, total))]
+        more = offset + PAGE_SIZE < total
+        return ok({"total": total, "scode": offset + PAGE_SIZE, "continue": int(more), "ship_list": ships})
+    return handler
+
+
+@pytest.fixture
+def area_api(upstream):
+    api = ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, area_tile_degrees=0)
+    yield api
+    api.close()
+
+
+def test_without_max_pages_only_the_first_page_is_fetched(area_api, upstream):
+    upstream.handlers["GetAreaShip"] = _paged(10)
+    result = area_api.get_area_ship(REGION)
+    assert len(result["data"]["ship_list"]) == PAGE_SIZE
+    assert result["data"]["continue"] == 1
+    assert len(upstream.endpoint_calls("GetAreaShip")) == 1
+
+
+def test_pages_are_followed_until_continue_is_zero(area_api, upstream):
+    upstream.handlers["GetAreaShip"] = _paged(10)
+    result = area_api.get_area_ship(REGION, max_pages=10)
+    assert [ship["mmsi"] for ship in result["data"]["ship_list"]] == [413000000 + index for index in range(10)]
+    assert result["data"]["continue"] == 0
+    assert result["meta"]["pages"] == 4
+    assert [q.get("scode") for q in upstream.endpoint_calls("GetAreaShip")] == [None, "3", "6", "9"]
+
+
+def test_page_limit_leaves_continue_set(area_api, upstream):
+    upstream.handlers["GetAreaShip"] = _paged(10)
+    result = area_api.get_area_ship(REGION, max_pages=2)
+    assert len(result["data"]["ship_list"]) == 6
+    assert result["data"]["continue"] == 1
+
+
+def test_later_page_failure_keeps_earlier_ships(area_api, upstream):
+    upstream.handlers["GetAreaShip"] = _paged(10, fail_page=2)
+    result = area_api.get_area_ship(REGION, max_pages=10)
+    assert result["ok"] is True
+    assert len(result["data"]["ship_list"]) == PAGE_SIZE
+    assert result["page_errors"][0]["page"] == 2
+
+
+def test_first_page_failure_is_returned_as_is(area_api, upstream):
+    upstream.handlers["GetAreaShip"] = _paged(10, fail_page=1)
+    assert area_api.get_area_ship(REGION, max_pages=10)["ok"] is False
+
+
+def test_iterator_fetches_pages_lazily(area_api, upstream):
+    upstream.handlers["GetAreaShip"] = _paged(10)
+    pages = area_api.iter_area_ship_pages(REGION)
+    first = next(pages)
+    assert len(first["data"]["ship_list"]) == PAGE_SIZE
+    assert len(upstream.endpoint_calls("GetAreaShip")) == 1
+    assert len(list(pages)) == 3
+
+
+def test_tool_validates_the_page_range(area_api, upstream):
+    result = invoke_tool(area_api, "get_area_ship", {"region": REGION, "max_pages": MAX_AREA_SHIP_PAGES + 1})
+    assert result["error"]["type"] == "invalid_request"
+    assert upstream.calls == []
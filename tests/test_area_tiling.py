@@ -0,0 +1,120 @@
+import asyncio
+
+from area_tiling import MAX_AREA_TILES, bounding_box, clip_to_box, format_region, merge_tile_ships, parse_region, point_in_polygon, polygon_area, tile_polygon
+from resilience import NO_RETRY
+from ship_service import AsyncShipxyAPI, ShipxyAPI
+from tests.fakes import ok, ship_record
+
+L_SHAPE = [(100.0, 0.0), (120.0, 0.0), (120.0, 5.0), (105.0, 5.0), (105.0, 20.0), (100.0, 20.0)]
+# 10 x 10 个网格点上的船，另有一条在 L 形缺口处（多边形外）
+SHIPS = [ship_record(413000000 + i * 10 + j, lng=100.5 + i * 2, lat=0.5 + j * 2) for i in range(10) for j in range(10)]
+
+
+def _paged_area_handler(page_size):
+    def handler(query):
+        min_lng, min_lat, max_lng, max_lat = bounding_box(parse_region(query["region"]))
+        ships = [ship for ship in SHIPS if min_lng <= ship["lng"] <= max_lng and min_lat <= ship["lat"] <= max_lat]
+        offset = int(query.get("scode", 0))
+        page = ships[offset:offset + page_size]
+        more = offset + page_size < len(ships)
+        return ok({"total": len(ships), "scode": offset + page_size, "continue": int(more), "ship_list": page})
+    return handler
+
+
+def _expected_mmsis():
+    return {ship["mmsi"] for ship in SHIPS if point_in_polygon(ship["lng"], ship["lat"], L_SHAPE)}
+
+
+def test_parse_and_format_region_round_trip():
+    region = "100,0-120,0-120,5-100,5-100,0"
+    polygon = parse_region(region)
+    assert polygon == [(100.0, 0.0), (120.0, 0.0), (120.0, 5.0), (100.0, 5.0)]
+    assert parse_region(format_region(polygon)) == polygon
+    assert parse_region("100,0-120,0") is None
+    assert parse_region("100,0-abc,1-1,1") is None
+
+
+def test_point_in_polygon_handles_concave_shape_and_edges():
+    assert point_in_polygon(102, 10, L_SHAPE)
+    assert not point_in_polygon(110, 10, L_SHAPE)
+    assert point_in_polygon(100, 10, L_SHAPE)
+
+
+def test_tiles_cover_polygon_exactly():
+    tiles = tile_polygon(L_SHAPE, 5)
+    assert len(tiles) > 1
+    assert all(max(b[2] - b[0], b[3] - b[1]) <= 5 + 1e-9 for b in map(bounding_box, tiles))
+    assert abs(sum(polygon_area(tile) for tile in tiles) - polygon_area(L_SHAPE)) < 1e-6
+
+
+def test_small_polygon_is_not_tiled_and_tile_count_is_bounded():
+    small = [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0)]
+    assert tile_polygon(small, 5) == [small]
+    assert len(tile_polygon([(0.0, 0.0), (180.0, 0.0), (180.0, 80.0), (0.0, 80.0)], 1, max_tiles=64)) <= 64
+    assert clip_to_box(small, (5, 5, 6, 6)) == []
+
+
+def test_merge_keeps_freshest_record_inside_polygon():
+    older = ship_record(413000001, last_time_utc=100, lng=101, lat=1)
+    newer = ship_record(413000001, last_time_utc=200, lng=101.5, lat=1.5)
+    outside = ship_record(413000002, lng=110, lat=10)
+    merged = merge_tile_ships(L_SHAPE, [[older, outside], [newer]])
+    assert merged == [newer]
+
+
+def test_tiled_query_follows_every_tile_page(api, upstream):
+    upstream.handlers["GetAreaShip"] = _paged_area_handler(page_size=2)
+
+    result = api.get_area_ship(format_region(L_SHAPE))
+
+    assert result["ok"] is True
+    assert {ship["mmsi"] for ship in result["data"]["ship_list"]} == _expected_mmsis()
+    assert result["data"]["total"] == len(_expected_mmsis())
+    assert result["data"]["continue"] == 0 and result["data"]["scode"] is None
+    assert "truncated" not in result and "tile_errors" not in result
+    assert result["meta"]["tiles"] > 1
+
+
+def test_tiled_query_reports_truncated_tiles(api, upstream):
+    upstream.handlers["GetAreaShip"] = _paged_area_handler(page_size=2)
+
+    result = api.get_area_ship(format_region(L_SHAPE), max_pages=1)
+
+    assert result["ok"] is True
+    assert result["truncated"] is True
+    assert result["data"]["continue"] == 1 and result["data"]["scode"] is None
+    assert {error["error"]["type"] for error in result["tile_errors"]} == {"truncated"}
+    assert len(result["data"]["ship_list"]) < len(_expected_mmsis())
+
+
+def test_tiling_can_be_disabled(upstream):
+    upstream.handlers["GetAreaShip"] = _paged_area_handler(page_size=1000)
+    with ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, area_tile_degrees=0) as client:
+        result = client.get_area_ship(format_region(L_SHAPE))
+    assert "tiles" not in result.get("meta", {})
+    assert len(upstream.endpoint_calls("GetAreaShip")) == 1
+
+
+def test_capped_tiles_are_fetched_with_one_request_each(api, upstream):
+    # 60 x 60 度超过 MAX_AREA_TILES 个 5 度瓦片，瓦片被放大到超过 area_tile_degrees
+    region = "100,0-160,0-160,60-100,60"
+    assert len(tile_polygon(parse_region(region), 5)) == MAX_AREA_TILES
+    upstream.handlers["GetAreaShip"] = _paged_area_handler(page_size=1000)
+
+    result = api.get_area_ship(region)
+
+    assert result["meta"]["tiles"] == MAX_AREA_TILES
+    assert len(upstream.endpoint_calls("GetAreaShip")) == MAX_AREA_TILES
+
+
+def test_async_capped_tiles_are_fetched_with_one_request_each(upstream):
+    region = "100,0-160,0-160,60-100,60"
+    upstream.handlers["GetAreaShip"] = _paged_area_handler(page_size=1000)
+
+    async def main():
+        async with AsyncShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY) as client:
+            return await client.get_area_ship(region)
+
+    result = asyncio.run(main())
+    assert result["meta"]["tiles"] == MAX_AREA_TILES
+    assert len(upstream.endpoint_calls("GetAreaShip")) == MAX_AREA_TILES
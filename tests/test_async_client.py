@@ -0,0 +1,68 @@
+import asyncio
+import inspect
+
+import httpx
+
+from resilience import NO_RETRY
+from ship_service import SHIPXY_API_METHODS, AsyncShipxyAPI, ShipxyAPI
+from tests.fakes import ok
+
+
+def _run(upstream, scenario, **kwargs):
+    async def main():
+        async with AsyncShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, **kwargs) as api:
+            return await scenario(api)
+
+    return asyncio.run(main())
+
+
+def test_every_sync_method_has_an_async_counterpart():
+    for name in SHIPXY_API_METHODS:
+        sync_method, async_method = getattr(ShipxyAPI, name), getattr(AsyncShipxyAPI, name)
+        assert inspect.iscoroutinefunction(async_method) or inspect.isasyncgenfunction(async_method), name
+        assert list(inspect.signature(sync_method).parameters) == list(inspect.signature(async_method).parameters), name
+
+
+def test_concurrent_calls_return_the_sync_envelope(upstream):
+    async def scenario(api):
+        return await asyncio.gather(*(api.get_single_ship(413000000 + index) for index in range(10)))
+
+    results = _run(upstream, scenario)
+    assert all(result["ok"] is True for result in results)
+    assert [result["data"]["mmsi"] for result in results] == [413000000 + index for index in range(10)]
+
+
+def test_business_errors_match_the_sync_client(upstream, api):
+    upstream.handlers["GetSingleShip"] = lambda q: {"status": 100, "msg": "船舶不存在", "data": None}
+
+    async def scenario(client):
+        return await client.get_single_ship(413000000)
+
+    async_result = _run(upstream, scenario)
+    sync_result = api.get_single_ship(413000000)
+    assert async_result["ok"] is False
+    assert async_result["error"]["type"] == sync_result["error"]["type"]
+    assert async_result["error"]["message"] == sync_result["error"]["message"]
+
+
+def test_shared_httpx_client_is_left_open(upstream):
+    async def main():
+        shared = httpx.AsyncClient()
+        try:
+            async with AsyncShipxyAPI("test-key", base_url=upstream.base_url, client=shared, retry_policy=NO_RETRY) as api:
+                assert (await api.get_single_ship(413000000))["ok"] is True
+            assert not shared.is_closed
+        finally:
+            await shared.aclose()
+
+    asyncio.run(main())
+
+
+def test_area_pages_stream_as_an_async_generator(upstream):
+    upstream.handlers["GetAreaShip"] = lambda q: ok({"total": 2, "scode": 1, "continue": int(q.get("scode", "0") == "0"), "ship_list": [{"mmsi": int(q.get("scode", 0))}]})
+
+    async def scenario(api):
+        return [page async for page in api.iter_area_ship_pages("120,30-121,30-121,31-120,31", max_pages=5)]
+
+    pages = _run(upstream, scenario, area_tile_degrees=0)
+    assert [page["ok"] for page in pages] == [True, True]
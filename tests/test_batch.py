@@ -0,0 +1,76 @@
+import threading
+
+from ship_service import FANOUT_POOL_SIZE, fan_out
+from tool_registry import describe_tool_capabilities, invoke_batch
+
+
+def test_nested_fan_out_runs_inline_on_the_worker_thread():
+    def inner():
+        return threading.current_thread().name
+
+    def outer():
+        return threading.current_thread().name, fan_out([inner, inner, inner])
+
+    outcomes = fan_out([outer for _ in range(4)])
+    for outer_thread, inner_threads in outcomes:
+        assert outer_thread.startswith("shipxy-fanout")
+        assert inner_threads == [outer_thread] * 3
+
+
+def test_fan_out_shares_one_bounded_pool():
+    barrier = threading.Barrier(3, timeout=5)
+
+    def call():
+        barrier.wait()
+        return threading.current_thread().name
+
+    first = fan_out([call, call, call], max_workers=3)
+    second = fan_out([call, call, call], max_workers=3)
+    pool_threads = {thread.name for thread in threading.enumerate() if thread.name.startswith("shipxy-fanout")}
+    assert len(pool_threads) <= FANOUT_POOL_SIZE
+    assert set(first) | set(second) <= pool_threads
+
+
+def test_fan_out_respects_max_workers():
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def call():
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        threading.Event().wait(0.02)
+        with lock:
+            active -= 1
+
+    fan_out([call for _ in range(10)], max_workers=2)
+    assert peak <= 2
+
+
+def test_invoke_batch_keeps_order_and_isolates_failures(api, upstream):
+    calls = [
+        {"tool_name": "get_single_ship", "arguments": {"mmsi": 413000001}},
+        {"tool_name": "get_single_ship", "arguments": {"mmsi": 413000002}},
+        {"tool_name": "get_many_ship", "arguments": {"mmsis": [str(413000100 + index) for index in range(250)]}},
+    ]
+    upstream.handlers["GetSingleShip"] = lambda q: (500, {"status": -1, "msg": "boom"}) if q["mmsi"] == "413000002" else {"status": 0, "msg": "ok", "data": {"mmsi": int(q["mmsi"])}}
+    result = invoke_batch(api, calls)
+    assert result["total"] == 3 and result["failed"] == 1 and result["succeeded"] == 2
+    assert [entry["ok"] for entry in result["results"]] == [True, False, True]
+    assert len(result["results"][2]["data"]) == 250
+
+
+def test_invoke_batch_rejects_whole_batch_on_invalid_call(api, upstream):
+    result = invoke_batch(api, [{"tool_name": "get_single_ship", "arguments": {"mmsi": 413000001}}, {"tool_name": "invoke_batch", "arguments": {}}])
+    assert result["ok"] is False
+    assert result["returns"] == "BatchResult"
+    assert result["error"]["details"][0]["index"] == 1
+    assert upstream.calls == []
+
+
+def test_invoke_batch_is_in_capability_catalog():
+    capability = describe_tool_capabilities("invoke_batch")["capability"]
+    assert capability["returns"] == "BatchResult"
+    assert {param["name"] for param in capability["parameter_requirements"]} == {"calls", "max_concurrency"}
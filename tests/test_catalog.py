@@ -0,0 +1,70 @@
+import copy
+import json
+
+import pytest
+
+import domain_catalog
+import tool_registry
+from domain_catalog import describe_object
+from tool_registry import describe_tool_capabilities
+
+
+def test_describe_object_is_read_only():
+    first = describe_object("VesselPosition")
+    with pytest.raises(TypeError):
+        first["schema"]["properties"].clear()
+    with pytest.raises(TypeError):
+        first["ok"] = False
+    second = describe_object("VesselPosition")
+    assert second["ok"] is True
+    assert second["schema"]["properties"]
+
+
+def test_describe_object_listing_is_read_only():
+    with pytest.raises(AttributeError):
+        describe_object()["objects"].clear()
+    assert describe_object()["objects"]
+
+
+def test_describe_tool_capabilities_is_read_only():
+    first = describe_tool_capabilities("get_single_ship")
+    with pytest.raises(TypeError):
+        first["capability"]["common_errors"] = []
+    with pytest.raises(TypeError):
+        first["capability"].update(parameter_requirements=[])
+    second = describe_tool_capabilities("get_single_ship")
+    assert second["capability"]["parameter_requirements"]
+    assert second["capability"]["common_errors"]
+
+
+def test_deepcopy_gives_a_mutable_copy():
+    mutable = copy.deepcopy(describe_tool_capabilities("get_single_ship"))
+    mutable["capability"]["parameter_requirements"].clear()
+    assert type(mutable) is dict
+    assert describe_tool_capabilities("get_single_ship")["capability"]["parameter_requirements"]
+
+
+def test_cached_results_serialize_like_plain_json():
+    result = describe_object("VesselPosition")
+    assert json.loads(json.dumps(result)) == copy.deepcopy(result)
+
+
+def test_cached_lookups_do_not_rebuild_or_copy_schemas(monkeypatch):
+    capabilities = describe_tool_capabilities()
+    position = describe_object("VesselPosition")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("缓存命中时不应重建或深拷贝目录")
+
+    monkeypatch.setattr(tool_registry, "describe_capabilities", fail)
+    monkeypatch.setattr(tool_registry, "all_schemas", fail)
+    monkeypatch.setattr(domain_catalog, "_with_field_descriptions", fail)
+    monkeypatch.setattr(domain_catalog, "deepcopy", fail)
+    monkeypatch.setattr(copy, "deepcopy", fail)
+    assert describe_tool_capabilities() is capabilities
+    assert describe_object("VesselPosition") is position
+
+
+def test_unknown_names_report_not_found():
+    assert describe_object("Nope")["error"]["type"] == "not_found"
+    assert describe_tool_capabilities("nope")["error"]["type"] == "not_found"
@@ -0,0 +1,73 @@
+import functools
+import io
+import json
+
+import pytest
+
+import cli
+from resilience import NO_RETRY
+from ship_service import ShipxyAPI
+
+
+@pytest.fixture
+def run_batch(upstream, monkeypatch, capsys):
+    monkeypatch.setattr(cli, "ShipxyAPI", functools.partial(ShipxyAPI, base_url=upstream.base_url, retry_policy=NO_RETRY))
+
+    def run(lines, *options):
+        monkeypatch.setattr("sys.stdin", io.StringIO("\n".join(lines) + "\n"))
+        exit_code = cli.main(["batch", "--api-key", "test-key", *options])
+        output = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        return exit_code, output
+
+    return run
+
+
+def test_every_line_gets_one_result_with_its_id(run_batch):
+    lines = [json.dumps({"id": f"ship-{index}", "tool": "get_single_ship", "arguments": {"mmsi": 413000000 + index}}) for index in range(20)]
+    exit_code, output = run_batch(lines, "--concurrency", "4")
+    assert exit_code == 0
+    assert sorted(result["id"] for result in output) == sorted(f"ship-{index}" for index in range(20))
+    assert all(result["ok"] is True for result in output)
+
+
+def test_missing_id_defaults_to_line_number_and_blank_lines_are_skipped(run_batch):
+    exit_code, output = run_batch(["", json.dumps({"tool_name": "get-single-ship", "arguments": {"mmsi": 413000000}})])
+    assert exit_code == 0
+    assert output[0]["id"] == 2
+    assert output[0]["tool"] == "get_single_ship"
+
+
+def test_bad_lines_fail_alone_with_nonzero_exit(run_batch):
+    lines = [
+        "not json",
+        json.dumps({"id": "unknown", "tool": "nope", "arguments": {}}),
+        json.dumps({"id": "bad-args", "tool": "get_single_ship", "arguments": {"mmsi": "abc"}}),
+        json.dumps({"id": "good", "tool": "get_single_ship", "arguments": {"mmsi": 413000000}}),
+    ]
+    exit_code, output = run_batch(lines)
+    results = {result["id"]: result for result in output}
+    assert exit_code == cli.EXIT_USAGE
+    assert results[1]["error"]["type"] == "invalid_request"
+    assert results["unknown"]["error"]["type"] == "invalid_request"
+    assert results["bad-args"]["ok"] is False
+    assert results["good"]["ok"] is True
+
+
+def test_upstream_failures_exit_with_api_error(run_batch, upstream):
+    upstream.handlers["GetSingleShip"] = lambda q: (500, {"status": -1, "msg": "boom"})
+    exit_code, output = run_batch([json.dumps({"tool": "get_single_ship", "arguments": {"mmsi": 413000000}})])
+    assert exit_code == cli.EXIT_API_ERROR
+    assert output[0]["ok"] is False
+
+
+def test_repeated_calls_share_the_in_process_cache(run_batch, upstream):
+    line = json.dumps({"tool": "search_port", "arguments": {"keywords": "QINGDAO"}})
+    upstream.handlers["SearchPort"] = lambda q: {"status": 0, "msg": "ok", "total": 0, "data": []}
+    exit_code, output = run_batch([line, line, line], "--concurrency", "1")
+    assert exit_code == 0
+    assert len(upstream.endpoint_calls("SearchPort")) == 1
+    assert [result.get("meta", {}).get("cache") for result in output].count("hit") == 2
+
+
+def test_read_batch_lines_numbers_from_one():
+    assert list(cli.read_batch_lines(io.StringIO("a\n\n b \n"))) == [(1, "a"), (3, "b")]
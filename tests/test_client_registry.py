@@ -0,0 +1,78 @@
+from ship_service import ShipxyAPI, ShipxyClientRegistry
+
+
+def _track_closes(monkeypatch):
+    closed = []
+    monkeypatch.setattr(ShipxyAPI, "close", lambda self: closed.append(self.api_key))
+    return closed
+
+
+def test_same_key_reuses_one_client():
+    registry = ShipxyClientRegistry()
+    try:
+        assert registry.get("a") is registry.get("a")
+        with registry.lease("a") as client:
+            assert client is registry.get("a")
+        assert len(registry) == 1
+    finally:
+        registry.close()
+
+
+def test_lru_eviction_closes_unused_clients(monkeypatch):
+    closed = _track_closes(monkeypatch)
+    registry = ShipxyClientRegistry(max_clients=2)
+    registry.get("a")
+    registry.get("b")
+    registry.get("c")
+    assert closed == ["a"]
+    assert len(registry) == 2
+
+
+def test_leased_client_is_closed_only_after_release(monkeypatch):
+    closed = _track_closes(monkeypatch)
+    registry = ShipxyClientRegistry(max_clients=1)
+    with registry.lease("a") as client:
+        registry.get("b")
+        assert closed == []
+        assert client.api_key == "a"
+    assert closed == ["a"]
+
+
+def test_nested_leases_keep_the_client_open(monkeypatch):
+    closed = _track_closes(monkeypatch)
+    registry = ShipxyClientRegistry(max_clients=1)
+    with registry.lease("a"):
+        with registry.lease("a"):
+            registry.get("b")
+        assert closed == []
+    assert closed == ["a"]
+
+
+def test_client_with_pending_revalidation_is_closed_later(monkeypatch):
+    closed = _track_closes(monkeypatch)
+    registry = ShipxyClientRegistry(max_clients=1)
+    client = registry.get("a")
+    client._start_revalidation(("GetSingleShip", ()))
+    registry.get("b")
+    assert closed == []
+    client._finish_revalidation(("GetSingleShip", ()))
+    registry.get("b")
+    assert closed == ["a"]
+
+
+def test_idle_clients_are_evicted(monkeypatch):
+    closed = _track_closes(monkeypatch)
+    registry = ShipxyClientRegistry(idle_timeout=0)
+    registry.get("a")
+    assert registry.evict_idle() == 1
+    assert closed == ["a"]
+    assert len(registry) == 0
+
+
+def test_close_also_closes_retired_clients(monkeypatch):
+    closed = _track_closes(monkeypatch)
+    registry = ShipxyClientRegistry(max_clients=1)
+    with registry.lease("a"):
+        registry.get("b")
+        registry.close()
+    assert sorted(closed) == ["a", "b"]
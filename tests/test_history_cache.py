@@ -0,0 +1,45 @@
+import math
+import time
+
+from resilience import NO_RETRY
+from response_cache import HISTORY_SETTLE_SECONDS, ResponseCache
+from ship_service import ShipxyAPI
+from tests.fakes import ok
+
+DAY = 86400
+
+
+def test_settled_windows_never_expire():
+    cache = ResponseCache()
+    old_end = int(time.time()) - HISTORY_SETTLE_SECONDS - DAY
+    assert cache._fresh_for("GetPortofCallByShip", {"start_time": old_end - DAY, "end_time": old_end}) == math.inf
+    assert cache._fresh_for("SearchshipApproach", {"start_time": old_end - DAY, "end_time": old_end}) == math.inf
+
+
+def test_recent_windows_use_the_normal_ttl():
+    cache = ResponseCache()
+    recent_end = int(time.time()) - 60
+    assert cache._fresh_for("GetPortofCallByShip", {"start_time": recent_end - DAY, "end_time": recent_end}) == cache.ttl_for("GetPortofCallByShip")
+
+
+def test_other_endpoints_ignore_end_time():
+    cache = ResponseCache()
+    assert cache._fresh_for("GetShipTrack", {"end_time": 0}) == cache.ttl_for("GetShipTrack")
+
+
+def test_settled_port_calls_outlive_the_normal_ttl(upstream):
+    upstream.handlers["GetPortofCallByShip"] = lambda q: ok([])
+    api = ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, cache=ResponseCache(ttls={"GetPortofCallByShip": 0.01}))
+    old_end = int(time.time()) - 10 * DAY
+    recent_end = int(time.time()) - 60
+    try:
+        api.get_port_of_call_by_ship(413000000, old_end - DAY, old_end)
+        api.get_port_of_call_by_ship(413000000, recent_end - DAY, recent_end)
+        time.sleep(0.02)
+        settled = api.get_port_of_call_by_ship(413000000, old_end - DAY, old_end)
+        recent = api.get_port_of_call_by_ship(413000000, recent_end - DAY, recent_end)
+    finally:
+        api.close()
+    assert settled["meta"]["cache"] == "hit"
+    assert recent["meta"]["cache"] == "miss"
+    assert len(upstream.endpoint_calls("GetPortofCallByShip")) == 3
@@ -0,0 +1,38 @@
+from resilience import NO_RETRY
+from ship_service import ShipxyAPI
+
+
+def test_requests_reuse_one_keep_alive_connection(api, upstream):
+    for _ in range(5):
+        assert api.get_single_ship(413000000)["ok"] is True
+    assert len(upstream.peers) == 5
+    assert len(set(upstream.peers)) == 1
+
+
+def test_keep_alive_can_be_disabled(upstream):
+    api = ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, keep_alive=False)
+    try:
+        for _ in range(3):
+            assert api.get_single_ship(413000000)["ok"] is True
+    finally:
+        api.close()
+    assert api.session.headers["Connection"] == "close"
+    assert len(set(upstream.peers)) == 3
+
+
+def test_each_client_owns_its_session_and_pool_size(upstream):
+    first = ShipxyAPI("test-key", base_url=upstream.base_url, pool_maxsize=32)
+    second = ShipxyAPI("test-key", base_url=upstream.base_url)
+    try:
+        assert first.session is not second.session
+        assert first.session.get_adapter("https://api.shipxy.com")._pool_maxsize == 32
+    finally:
+        first.close()
+        second.close()
+
+
+def test_context_manager_closes_the_session(upstream):
+    with ShipxyAPI("test-key", base_url=upstream.base_url) as api:
+        session = api.session
+        assert api.get_single_ship(413000000)["ok"] is True
+    assert not any(adapter.poolmanager.pools for adapter in session.adapters.values())
@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+
+from resilience import NO_RETRY
+from response_cache import ResponseCache
+from ship_service import DEFAULT_FANOUT_WORKERS, MAX_MANY_SHIP_MMSIS, AsyncShipxyAPI, ShipxyAPI, _call_metadata, fan_out, _record_call_meta
+from tests.fakes import ok, ship_record
+from validation import validate_tool_input
+
+WATCHLIST = [str(413000000 + index) for index in range(3000)]
+
+
+def test_default_cap_accepts_watchlists_of_thousands():
+    assert MAX_MANY_SHIP_MMSIS >= 10000
+    assert validate_tool_input("get_many_ship", {"mmsis": WATCHLIST})["ok"] is True
+    result = validate_tool_input("get_many_ship", {"mmsis": [str(413000000 + index) for index in range(MAX_MANY_SHIP_MMSIS + 1)]})
+    assert result["ok"] is False
+    assert result["errors"][0]["field"] == "mmsis"
+
+
+def test_large_watchlist_is_chunked_and_merged(api, upstream):
+    result = api.get_many_ship(WATCHLIST + WATCHLIST[:5])
+    assert result["ok"] is True
+    assert len(result["data"]) == 3000
+    assert len(upstream.endpoint_calls("GetManyShip")) == 30
+    assert all(len(query["mmsis"].split(",")) <= 100 for query in upstream.endpoint_calls("GetManyShip"))
+
+
+def test_failed_chunks_are_reported_and_others_returned(api, upstream):
+    def handler(query):
+        mmsis = query["mmsis"].split(",")
+        if "413000150" in mmsis:
+            return 500, {"status": -1, "msg": "boom"}
+        return ok([ship_record(mmsi) for mmsi in mmsis])
+
+    upstream.handlers["GetManyShip"] = handler
+    result = api.get_many_ship(WATCHLIST[:300])
+    assert result["ok"] is True
+    assert len(result["data"]) == 200
+    assert len(result["chunk_errors"]) == 1
+    assert "413000150" in result["chunk_errors"][0]["mmsis"]
+
+
+def test_mixed_chunk_cache_status_is_partial(upstream):
+    api = ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, cache=ResponseCache())
+    try:
+        api.get_many_ship(WATCHLIST[:100])
+        result = api.get_many_ship(WATCHLIST[:200])
+        assert result["meta"]["cache"] == "partial"
+        result = api.get_many_ship(WATCHLIST[:200])
+        assert result["meta"]["cache"] == "hit"
+    finally:
+        api.close()
+
+
+def test_async_mixed_chunk_cache_status_is_partial(upstream):
+    async def scenario():
+        async with AsyncShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, cache=ResponseCache()) as api:
+            await api.get_many_ship(WATCHLIST[:100])
+            return await api.get_many_ship(WATCHLIST[:200])
+
+    result = asyncio.run(scenario())
+    assert len(result["data"]) == 200
+    assert result["meta"]["cache"] == "partial"
+
+
+def test_fan_out_gives_each_call_its_own_meta_and_merges():
+    def call(cache, wait):
+        def run():
+            _record_call_meta("cache", cache)
+            _record_call_meta("rate_limit_wait_ms", wait, accumulate=True)
+            return _call_metadata.get()
+        return run
+
+    meta = {}
+    token = _call_metadata.set(meta)
+    try:
+        outcomes = fan_out([call("hit", 5), call("miss", 20), call("hit", 10)])
+    finally:
+        _call_metadata.reset(token)
+    assert [outcome["cache"] for outcome in outcomes] == ["hit", "miss", "hit"]
+    assert len({id(outcome) for outcome in outcomes} | {id(meta)}) == 4
+    assert meta == {"cache": "partial", "rate_limit_wait_ms": 20}
+
+
+def _counting_handler():
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def handler(query):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.02)
+        with lock:
+            state["active"] -= 1
+        return ok([ship_record(mmsi) for mmsi in query["mmsis"].split(",")])
+
+    return handler, state
+
+
+def test_chunk_concurrency_is_bounded_like_fan_out(upstream):
+    handler, state = _counting_handler()
+    upstream.handlers["GetManyShip"] = handler
+
+    async def scenario():
+        async with AsyncShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY) as api:
+            return await api.get_many_ship(WATCHLIST)
+
+    result = asyncio.run(scenario())
+    assert len(result["data"]) == 3000
+    assert 1 < state["peak"] <= DEFAULT_FANOUT_WORKERS
+
+    state["peak"] = 0
+    api = ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY)
+    try:
+        api.get_many_ship(WATCHLIST)
+    finally:
+        api.close()
+    assert 1 < state["peak"] <= DEFAULT_FANOUT_WORKERS
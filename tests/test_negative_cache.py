@@ -0,0 +1,70 @@
+import time
+
+from resilience import NO_RETRY
+from response_cache import ResponseCache
+from ship_service import ShipxyAPI
+from tests.fakes import ok, ship_record
+
+NOT_FOUND = {"status": 100, "msg": "船舶不存在", "data": None}
+
+
+def _client(upstream, **cache_kwargs):
+    return ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, cache=ResponseCache(**cache_kwargs))
+
+
+def test_not_found_is_replayed_from_the_negative_cache(upstream):
+    upstream.handlers["GetSingleShip"] = lambda q: NOT_FOUND
+    api = _client(upstream)
+    try:
+        first = api.get_single_ship(413000000)
+        second = api.get_single_ship(413000000)
+    finally:
+        api.close()
+    assert first["error"]["type"] == "not_found"
+    assert second["error"] == first["error"]
+    assert second["meta"]["cached"] is True
+    assert len(upstream.endpoint_calls("GetSingleShip")) == 1
+
+
+def test_negative_entries_expire(upstream):
+    upstream.handlers["GetSingleShip"] = lambda q: NOT_FOUND
+    api = _client(upstream, negative_ttl=0.05)
+    try:
+        api.get_single_ship(413000000)
+        time.sleep(0.08)
+        upstream.handlers["GetSingleShip"] = lambda q: ok(ship_record(q["mmsi"]))
+        assert api.get_single_ship(413000000)["ok"] is True
+    finally:
+        api.close()
+
+
+def test_other_errors_are_not_negatively_cached(upstream):
+    upstream.handlers["GetSingleShip"] = lambda q: {"status": 101, "msg": "key 无权限", "data": None}
+    api = _client(upstream)
+    try:
+        api.get_single_ship(413000000)
+        api.get_single_ship(413000000)
+    finally:
+        api.close()
+    assert len(upstream.endpoint_calls("GetSingleShip")) == 2
+
+
+def test_negative_ttl_zero_disables_it(upstream):
+    upstream.handlers["GetSingleShip"] = lambda q: NOT_FOUND
+    api = _client(upstream, negative_ttl=0)
+    try:
+        api.get_single_ship(413000000)
+        api.get_single_ship(413000000)
+    finally:
+        api.close()
+    assert len(upstream.endpoint_calls("GetSingleShip")) == 2
+
+
+def test_negative_entries_are_per_query(upstream):
+    upstream.handlers["GetSingleShip"] = lambda q: NOT_FOUND if q["mmsi"] == "413000000" else ok(ship_record(q["mmsi"]))
+    api = _client(upstream)
+    try:
+        api.get_single_ship(413000000)
+        assert api.get_single_ship(413000001)["ok"] is True
+    finally:
+        api.close()
@@ -0,0 +1,66 @@
+import sqlite3
+
+from resilience import NO_RETRY
+from response_cache import PersistentCache
+from ship_service import PERSISTENT_CACHE_MODELS, ShipxyAPI, create_response_cache
+from tests.fakes import ok
+
+PORT_KEY = ("SearchPort", (("key", "test-key"), ("keywords", "QINGDAO")))
+PORT_RESPONSE = ok([{"port_code": "CNQDG", "port_name": "QINGDAO", "port_cnname": "青岛", "port_time_zone": "8"}], total=1)
+
+
+def test_entries_survive_a_new_cache_instance(tmp_path):
+    first = create_response_cache(cache_dir=str(tmp_path))
+    first.set("SearchPort", PORT_KEY, PORT_RESPONSE)
+    second = create_response_cache(cache_dir=str(tmp_path))
+    cached = second.get(PORT_KEY)
+    assert cached is not None and cached.fresh
+    assert cached.value == PORT_RESPONSE
+
+
+def test_api_key_is_not_stored_in_plain_text(tmp_path):
+    cache = create_response_cache(cache_dir=str(tmp_path))
+    cache.set("SearchPort", PORT_KEY, PORT_RESPONSE)
+    rows = sqlite3.connect(cache.persistent.path).execute("SELECT key FROM responses").fetchall()
+    assert rows and all("test-key" not in row[0] for row in rows)
+
+
+def test_non_persistent_endpoints_skip_sqlite(tmp_path, monkeypatch):
+    cache = create_response_cache(cache_dir=str(tmp_path))
+    lookups = []
+    monkeypatch.setattr(cache.persistent, "get", lambda key: lookups.append(key))
+    assert cache.get(("GetSingleShip", (("key", "test-key"), ("mmsi", "413000000")))) is None
+    assert lookups == []
+    cache.get(PORT_KEY)
+    assert lookups == [PORT_KEY]
+
+
+def test_locked_database_is_a_miss(tmp_path, monkeypatch):
+    persistent = PersistentCache(str(tmp_path), PERSISTENT_CACHE_MODELS)
+
+    class LockedConnection:
+        def execute(self, *args):
+            raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(persistent, "_connection", lambda: LockedConnection())
+    assert persistent.get(PORT_KEY) is None
+    persistent.set("SearchPort", PORT_KEY, b"{}", 60)
+
+
+def test_schema_change_drops_old_rows(tmp_path):
+    persistent = PersistentCache(str(tmp_path), PERSISTENT_CACHE_MODELS)
+    persistent.set("SearchPort", PORT_KEY, b"{}", 60)
+    persistent.close()
+    changed = PersistentCache(str(tmp_path), {**PERSISTENT_CACHE_MODELS, "SearchPort": PERSISTENT_CACHE_MODELS["GetTides"]})
+    assert changed.get(PORT_KEY) is None
+
+
+def test_second_process_reads_port_search_from_disk(tmp_path, upstream):
+    upstream.handlers["SearchPort"] = lambda q: PORT_RESPONSE
+    for _ in range(2):
+        api = ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, cache=create_response_cache(cache_dir=str(tmp_path)))
+        try:
+            assert api.search_port("QINGDAO")["ok"] is True
+        finally:
+            api.close()
+    assert len(upstream.endpoint_calls("SearchPort")) == 1
@@ -0,0 +1,66 @@
+import asyncio
+
+from resilience import NO_RETRY
+from ship_service import AsyncShipxyAPI
+from tests.fakes import ok
+from tool_registry import invoke_tool
+from validation import MAX_SNAPSHOT_WINDOW_HOURS
+
+SECTIONS = {"berth_ships": "GetBerthShips", "anchor_ships": "GetAnchorShips", "eta_ships": "GetETAShips", "port_calls": "GetPortofCallByPort"}
+FAILURE = (500, {"status": -1, "msg": "boom"})
+
+
+def test_all_sections_are_queried_once(api, upstream):
+    result = api.port_snapshot("CNSHA", window_hours=6)
+    assert result["ok"] is True
+    assert set(result["data"]) == set(SECTIONS)
+    assert "section_errors" not in result
+    for section, endpoint in SECTIONS.items():
+        assert result["data"][section]["ok"] is True
+        assert "elapsed_ms" in result["data"][section]["meta"]
+        assert len(upstream.endpoint_calls(endpoint)) == 1
+
+
+def test_windows_look_forward_for_eta_and_back_for_calls(api, upstream):
+    api.port_snapshot("CNSHA", window_hours=6)
+    eta = upstream.endpoint_calls("GetETAShips")[0]
+    calls = upstream.endpoint_calls("GetPortofCallByPort")[0]
+    assert int(eta["end_time"]) - int(eta["start_time"]) == 6 * 3600
+    assert calls["end_time"] == eta["start_time"]
+    assert int(calls["end_time"]) - int(calls["start_time"]) == 6 * 3600
+
+
+def test_failed_section_does_not_hide_the_others(api, upstream):
+    upstream.handlers["GetAnchorShips"] = lambda q: FAILURE
+    result = api.port_snapshot("CNSHA")
+    assert result["ok"] is True
+    assert list(result["section_errors"]) == ["anchor_ships"]
+    assert result["data"]["berth_ships"]["ok"] is True
+
+
+def test_all_sections_failing_reports_an_error(api, upstream):
+    for endpoint in SECTIONS.values():
+        upstream.handlers[endpoint] = lambda q: FAILURE
+    result = api.port_snapshot("CNSHA")
+    assert result["ok"] is False
+    assert result["error"]
+    assert set(result["section_errors"]) == set(SECTIONS)
+
+
+def test_async_snapshot_matches_sync(upstream):
+    upstream.handlers["GetBerthShips"] = lambda q: FAILURE
+
+    async def main():
+        async with AsyncShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY) as api:
+            return await api.port_snapshot("CNSHA")
+
+    result = asyncio.run(main())
+    assert result["ok"] is True
+    assert list(result["section_errors"]) == ["berth_ships"]
+    assert set(result["data"]) == set(SECTIONS)
+
+
+def test_tool_validates_window_hours(api, upstream):
+    result = invoke_tool(api, "port_snapshot", {"port_code": "CNSHA", "window_hours": MAX_SNAPSHOT_WINDOW_HOURS + 1})
+    assert result["error"]["type"] == "invalid_request"
+    assert upstream.calls == []
@@ -0,0 +1,61 @@
+import pytest
+
+from resilience import NO_RETRY, RateLimiter
+from ship_service import ShipxyAPI, request_deadline
+
+
+def test_burst_is_free_then_requests_are_spaced():
+    limiter = RateLimiter(rate=10, burst=3)
+    waits = [limiter.reserve("a", "GetSingleShip") for _ in range(5)]
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert waits[3] == pytest.approx(0.1, abs=0.02)
+    assert waits[4] == pytest.approx(0.2, abs=0.02)
+
+
+def test_buckets_are_per_api_key():
+    limiter = RateLimiter(rate=1, burst=1)
+    assert limiter.reserve("a", "GetSingleShip") == 0.0
+    assert limiter.reserve("b", "GetSingleShip") == 0.0
+    assert limiter.reserve("a", "GetSingleShip") > 0
+
+
+def test_per_endpoint_buckets():
+    limiter = RateLimiter(rate=1, burst=1, per_endpoint=True)
+    assert limiter.reserve("a", "GetSingleShip") == 0.0
+    assert limiter.reserve("a", "SearchPort") == 0.0
+    assert limiter.reserve("a", "GetSingleShip") > 0
+
+
+def test_wait_beyond_max_wait_does_not_consume_a_token():
+    limiter = RateLimiter(rate=1, burst=1)
+    limiter.reserve("a", "GetSingleShip")
+    assert limiter.reserve("a", "GetSingleShip", max_wait=0.1) is None
+    assert limiter.reserve("a", "GetSingleShip") == pytest.approx(1.0, abs=0.05)
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        RateLimiter(rate=0)
+
+
+def test_client_reports_queue_time_in_meta(upstream):
+    api = ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, rate_limiter=RateLimiter(rate=20, burst=1))
+    try:
+        first = api.get_single_ship(413000000)
+        second = api.get_single_ship(413000001)
+    finally:
+        api.close()
+    assert first["meta"]["rate_limit_wait_ms"] == 0
+    assert second["meta"]["rate_limit_wait_ms"] > 0
+
+
+def test_queue_past_the_deadline_fails_without_a_request(upstream):
+    api = ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, rate_limiter=RateLimiter(rate=0.5, burst=1))
+    try:
+        api.get_single_ship(413000000)
+        with request_deadline(0.2):
+            result = api.get_single_ship(413000001)
+    finally:
+        api.close()
+    assert result["error"]["type"] == "rate_limited"
+    assert len(upstream.endpoint_calls("GetSingleShip")) == 1
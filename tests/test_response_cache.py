@@ -0,0 +1,86 @@
+import time
+
+from resilience import NO_RETRY
+from response_cache import ResponseCache
+from ship_service import ShipxyAPI
+from tests.fakes import ok, ship_record
+
+
+def _client(upstream, cache, api_key="test-key"):
+    return ShipxyAPI(api_key, base_url=upstream.base_url, retry_policy=NO_RETRY, cache=cache)
+
+
+def test_fresh_hit_skips_upstream_and_reports_age(upstream):
+    api = _client(upstream, ResponseCache())
+    try:
+        first = api.get_single_ship(413000000)
+        second = api.get_single_ship(413000000)
+    finally:
+        api.close()
+    assert first["meta"]["cache"] == "miss"
+    assert second["meta"]["cache"] == "hit"
+    assert second["meta"]["cache_age"] >= 0
+    assert second["data"] == first["data"]
+    assert len(upstream.endpoint_calls("GetSingleShip")) == 1
+
+
+def test_expired_entry_is_fetched_again(upstream):
+    api = _client(upstream, ResponseCache(ttls={"GetSingleShip": 0.05}))
+    try:
+        api.get_single_ship(413000000)
+        time.sleep(0.08)
+        assert api.get_single_ship(413000000)["meta"]["cache"] == "miss"
+    finally:
+        api.close()
+    assert len(upstream.endpoint_calls("GetSingleShip")) == 2
+
+
+def test_uncached_endpoints_always_hit_upstream(upstream):
+    api = _client(upstream, ResponseCache(ttls={"GetSingleShip": 0}))
+    try:
+        api.get_single_ship(413000000)
+        result = api.get_single_ship(413000000)
+    finally:
+        api.close()
+    assert "cache" not in result.get("meta", {})
+    assert len(upstream.endpoint_calls("GetSingleShip")) == 2
+
+
+def test_stale_entry_is_served_when_upstream_fails(upstream):
+    api = _client(upstream, ResponseCache(ttls={"GetSingleShip": 0.01}))
+    try:
+        api.get_single_ship(413000000)
+        time.sleep(0.02)
+        upstream.handlers["GetSingleShip"] = lambda q: (503, {"status": -1, "msg": "down"})
+        result = api.get_single_ship(413000000)
+    finally:
+        api.close()
+    assert result["ok"] is True
+    assert result["meta"]["cache"] == "stale"
+
+
+def test_entries_are_isolated_by_api_key(upstream):
+    cache = ResponseCache()
+    first, second = _client(upstream, cache, "key-a"), _client(upstream, cache, "key-b")
+    try:
+        first.get_single_ship(413000000)
+        assert second.get_single_ship(413000000)["meta"]["cache"] == "miss"
+    finally:
+        first.close()
+        second.close()
+
+
+def test_lru_eviction_respects_the_byte_budget():
+    cache = ResponseCache(max_bytes=2000)
+    for index in range(20):
+        cache.set("GetSingleShip", ("GetSingleShip", index), ok(ship_record(413000000 + index)))
+    assert cache.nbytes <= 2000
+    assert cache.get(("GetSingleShip", 0)) is None
+    assert cache.get(("GetSingleShip", 19)) is not None
+
+
+def test_cached_values_are_independent_copies():
+    cache = ResponseCache()
+    cache.set("GetSingleShip", ("GetSingleShip", 1), ok(ship_record(413000000)))
+    cache.get(("GetSingleShip", 1)).value["data"]["mmsi"] = 0
+    assert cache.get(("GetSingleShip", 1)).value["data"]["mmsi"] == 413000000
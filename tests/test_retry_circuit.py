@@ -0,0 +1,111 @@
+import time
+
+from resilience import CIRCUIT_CLOSED, CIRCUIT_HALF_OPEN, CIRCUIT_OPEN, CircuitBreaker, CircuitBreakerRegistry, RetryPolicy
+from ship_service import ShipxyAPI
+from tests.fakes import ok, ship_record
+
+FAST_RETRY = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.002)
+
+
+def _flaky(failures, status=502):
+    remaining = [failures]
+
+    def handler(query):
+        if remaining[0] > 0:
+            remaining[0] -= 1
+            return status, {"status": -1, "msg": "upstream error"}
+        return ok(ship_record(query["mmsi"]))
+    return handler
+
+
+def _client(upstream, **kwargs):
+    return ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=FAST_RETRY, **kwargs)
+
+
+def test_backoff_uses_full_jitter_under_a_growing_ceiling():
+    policy = RetryPolicy(max_attempts=5, base_delay=0.1, max_delay=0.3)
+    for attempt, ceiling in ((1, 0.1), (2, 0.2), (3, 0.3), (4, 0.3)):
+        assert all(0 <= policy.backoff(attempt) <= ceiling for _ in range(50))
+
+
+def test_transient_5xx_is_retried_until_success(upstream):
+    upstream.handlers["GetSingleShip"] = _flaky(2)
+    api = _client(upstream)
+    try:
+        assert api.get_single_ship(413000000)["ok"] is True
+    finally:
+        api.close()
+    assert len(upstream.endpoint_calls("GetSingleShip")) == 3
+
+
+def test_exhausted_retries_report_attempts(upstream):
+    upstream.handlers["GetSingleShip"] = _flaky(10)
+    api = _client(upstream)
+    try:
+        result = api.get_single_ship(413000000)
+    finally:
+        api.close()
+    assert result["error"]["type"] == "http_error"
+    assert result["error"]["attempts"] == 3
+
+
+def test_client_errors_are_not_retried(upstream):
+    upstream.handlers["GetSingleShip"] = _flaky(10, status=404)
+    api = _client(upstream)
+    try:
+        assert api.get_single_ship(413000000)["ok"] is False
+    finally:
+        api.close()
+    assert len(upstream.endpoint_calls("GetSingleShip")) == 1
+
+
+def test_breaker_opens_then_probes_once_after_recovery():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.snapshot()["state"] == CIRCUIT_CLOSED
+    breaker.record_failure()
+    assert breaker.snapshot()["state"] == CIRCUIT_OPEN
+    assert not breaker.allow_request()
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    assert breaker.snapshot()["state"] == CIRCUIT_HALF_OPEN
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.snapshot()["state"] == CIRCUIT_CLOSED
+
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.snapshot()["state"] == CIRCUIT_OPEN
+
+
+def test_open_circuit_rejects_without_calling_upstream(upstream):
+    upstream.handlers["GetSingleShip"] = _flaky(100)
+    api = _client(upstream, breakers=CircuitBreakerRegistry(failure_threshold=3, recovery_timeout=60))
+    try:
+        api.get_single_ship(413000000)
+        calls = len(upstream.endpoint_calls("GetSingleShip"))
+        result = api.get_single_ship(413000000)
+        api.search_port("QINGDAO")
+    finally:
+        api.close()
+    assert result["error"]["type"] == "upstream_unavailable"
+    assert result["error"]["circuit"]["state"] == CIRCUIT_OPEN
+    assert len(upstream.endpoint_calls("GetSingleShip")) == calls
+    assert len(upstream.endpoint_calls("SearchPort")) == 1
+
+
+def test_shared_registry_spreads_breaker_state_across_clients(upstream):
+    upstream.handlers["GetSingleShip"] = _flaky(100)
+    breakers = CircuitBreakerRegistry(failure_threshold=3, recovery_timeout=60)
+    first, second = _client(upstream, breakers=breakers), _client(upstream, breakers=breakers)
+    try:
+        first.get_single_ship(413000000)
+        assert second.get_single_ship(413000000)["error"]["type"] == "upstream_unavailable"
+    finally:
+        first.close()
+        second.close()
@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+import pytest
+
+import server
+from resilience import NO_RETRY
+from ship_service import ShipxyClientRegistry
+from tests.fakes import ok, ship_record
+
+
+@pytest.fixture
+def registry(upstream, monkeypatch):
+    registry = ShipxyClientRegistry(base_url=upstream.base_url, retry_policy=NO_RETRY)
+    monkeypatch.setattr(server, "client_registry", registry)
+    server.configure_concurrency(8)
+    yield registry
+    registry.close()
+
+
+def _slow_single_ship(query):
+    time.sleep(0.3)
+    return ok(ship_record(query["mmsi"]))
+
+
+def test_slow_tool_calls_do_not_block_the_event_loop(upstream, registry):
+    upstream.handlers["GetSingleShip"] = _slow_single_ship
+
+    async def main():
+        ticks = 0
+        done = asyncio.Event()
+
+        async def ticker():
+            nonlocal ticks
+            while not done.is_set():
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.create_task(ticker())
+        started = time.monotonic()
+        results = await asyncio.gather(*(server.run_shipxy_tool("get_single_ship", {"mmsi": 413000000 + index}) for index in range(4)))
+        elapsed = time.monotonic() - started
+        done.set()
+        await ticking
+        return results, elapsed, ticks
+
+    results, elapsed, ticks = asyncio.run(main())
+    assert all(result["ok"] is True for result in results)
+    assert elapsed < 0.9
+    assert ticks >= 10
+
+
+def test_connection_api_key_reaches_the_worker_thread(upstream, registry):
+    async def main():
+        token = server.current_api_key.set("session-key")
+        try:
+            return await server.run_shipxy_tool("get_single_ship", {"mmsi": 413000000})
+        finally:
+            server.current_api_key.reset(token)
+
+    assert asyncio.run(main())["ok"] is True
+    assert upstream.endpoint_calls("GetSingleShip")[0]["key"] == "session-key"
+
+
+def test_concurrency_must_be_positive():
+    with pytest.raises(ValueError):
+        server.configure_concurrency(0)
@@ -0,0 +1,64 @@
+import asyncio
+
+from resilience import NO_RETRY
+from response_cache import ResponseCache
+from ship_service import CACHE_HIT, AsyncShipxyAPI, ShipxyAPI
+
+SECTIONS = {"position": "GetSingleShip", "particulars": "SearchShipParticular", "status": "GetShipStatus", "registry": "GetShipRegistry", "eta": "GetSingleETAPrecise"}
+FAILURE = (500, {"status": -1, "msg": "boom"})
+
+
+def test_all_sections_are_queried_once(api, upstream):
+    result = api.ship_dossier(413000000, port_code="CNSHA")
+    assert set(result["data"]) == set(SECTIONS)
+    assert result["data"]["position"]["data"]["mmsi"] == 413000000
+    for endpoint in SECTIONS.values():
+        calls = upstream.endpoint_calls(endpoint)
+        assert len(calls) == 1
+        assert calls[0]["mmsi"] == "413000000"
+    assert upstream.endpoint_calls("GetSingleETAPrecise")[0]["port_code"] == "CNSHA"
+
+
+def test_reported_destination_is_used_without_port_code(api, upstream):
+    api.ship_dossier(413000000)
+    assert "port_code" not in upstream.endpoint_calls("GetSingleETAPrecise")[0]
+
+
+def test_failed_section_is_listed_in_section_errors(api, upstream):
+    upstream.handlers["GetShipRegistry"] = lambda q: FAILURE
+    result = api.ship_dossier(413000000)
+    assert result["ok"] is True
+    assert "registry" in result["section_errors"]
+    assert result["data"]["position"]["ok"] is True
+
+
+def test_all_sections_failing_reports_an_error(api, upstream):
+    for endpoint in SECTIONS.values():
+        upstream.handlers[endpoint] = lambda q: FAILURE
+    result = api.ship_dossier(413000000)
+    assert result["ok"] is False
+    assert set(result["section_errors"]) == set(SECTIONS)
+
+
+def test_sections_share_the_response_cache_with_single_tools(upstream):
+    api = ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, cache=ResponseCache())
+    try:
+        api.get_single_ship(413000000)
+        result = api.ship_dossier(413000000)
+    finally:
+        api.close()
+    assert result["data"]["position"]["meta"]["cache"] == CACHE_HIT
+    assert len(upstream.endpoint_calls("GetSingleShip")) == 1
+
+
+def test_async_dossier_matches_sync(upstream):
+    upstream.handlers["GetSingleShip"] = lambda q: FAILURE
+
+    async def main():
+        async with AsyncShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY) as api:
+            return await api.ship_dossier(413000000)
+
+    result = asyncio.run(main())
+    assert result["ok"] is True
+    assert list(result["section_errors"]) == ["position"]
+    assert set(result["data"]) == set(SECTIONS)
@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+
+from resilience import NO_RETRY, AsyncSingleFlight, SingleFlight
+from ship_service import AsyncShipxyAPI, ShipxyTransportError
+from tests.fakes import ok, ship_record
+
+
+def _slow(delay, outcome):
+    def handler(query):
+        time.sleep(delay)
+        return outcome(query) if callable(outcome) else outcome
+    return handler
+
+
+def _run_concurrently(fn, count):
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def run(index):
+        barrier.wait()
+        results[index] = fn()
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_followers_receive_copy_of_transport_error():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def leader():
+        started.set()
+        time.sleep(0.2)
+        raise ShipxyTransportError("http_error", "HTTP请求失败: 502", status_code=502, retryable=True)
+
+    errors = []
+
+    def follower():
+        started.wait()
+        try:
+            flight.do("key", lambda: None)
+        except ShipxyTransportError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=follower) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    try:
+        flight.do("key", leader)
+    except ShipxyTransportError as exc:
+        leader_error = exc
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 2
+    for error in errors:
+        assert error is not leader_error
+        assert (error.error_type, error.status_code, str(error)) == ("http_error", 502, "HTTP请求失败: 502")
+        assert error.coalesced is True
+    assert not getattr(leader_error, "coalesced", False)
+
+
+def test_coalesced_callers_share_upstream_failure(api, upstream):
+    upstream.handlers["GetBerthShips"] = _slow(0.3, (502, {}))
+
+    results = _run_concurrently(lambda: api.get_berth_ships("CNSHA"), 3)
+
+    assert [result["error"]["type"] for result in results] == ["http_error"] * 3
+    assert sum(bool(result.get("meta", {}).get("coalesced")) for result in results) == 2
+    assert len(upstream.endpoint_calls("GetBerthShips")) == 1
+
+
+def test_coalesced_callers_share_success(api, upstream):
+    upstream.handlers["GetSingleShip"] = _slow(0.3, lambda q: ok(ship_record(q["mmsi"])))
+
+    results = _run_concurrently(lambda: api.get_single_ship(413000000), 3)
+
+    assert all(result["ok"] for result in results)
+    assert sum(bool(result.get("meta", {}).get("coalesced")) for result in results) == 2
+    assert len(upstream.endpoint_calls("GetSingleShip")) == 1
+
+
+def test_async_followers_receive_marked_copy():
+    async def main():
+        flight = AsyncSingleFlight()
+        error = ShipxyTransportError("timeout", "请求船讯网超时")
+
+        async def leader():
+            await asyncio.sleep(0.05)
+            raise error
+
+        outcomes = await asyncio.gather(*(flight.do("key", leader) for _ in range(3)), return_exceptions=True)
+        return error, outcomes
+
+    error, outcomes = asyncio.run(main())
+    assert outcomes[0] is error
+    for follower in outcomes[1:]:
+        assert isinstance(follower, ShipxyTransportError) and follower is not error
+        assert follower.error_type == "timeout" and follower.coalesced is True
+
+
+def test_async_client_followers_report_transport_error(upstream):
+    upstream.handlers["GetBerthShips"] = _slow(0.2, (502, {}))
+
+    async def main():
+        client = AsyncShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY)
+        try:
+            return await asyncio.gather(*(client.get_berth_ships("CNSHA") for _ in range(3)))
+        finally:
+            await client.aclose()
+
+    results = asyncio.run(main())
+    assert [result["error"]["type"] for result in results] == ["http_error"] * 3
+    assert sum(bool(result.get("meta", {}).get("coalesced")) for result in results) == 2
+    assert len(upstream.endpoint_calls("GetBerthShips")) == 1
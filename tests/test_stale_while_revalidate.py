@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import time
+
+from resilience import NO_RETRY
+from response_cache import ResponseCache
+from ship_service import AsyncShipxyAPI, ShipxyAPI
+from tests.fakes import ok
+
+
+def _typhoons(version):
+    return lambda q: ok([], total=version)
+
+
+def _cache():
+    return ResponseCache(ttls={"GetAllTyphoon": 0.05}, revalidate_windows={"GetAllTyphoon": 60})
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_stale_entry_is_returned_and_refreshed_in_background(upstream):
+    upstream.handlers["GetAllTyphoon"] = _typhoons(1)
+    api = ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, cache=_cache())
+    try:
+        api.get_all_typhoon()
+        time.sleep(0.06)
+        upstream.handlers["GetAllTyphoon"] = _typhoons(2)
+        stale = api.get_all_typhoon()
+        assert stale["meta"]["cache"] == "stale"
+        assert stale["meta"]["revalidating"] is True
+        assert stale["total"] == 1
+        assert _wait_for(lambda: not api.revalidation_pending)
+        fresh = api.get_all_typhoon()
+    finally:
+        api.close()
+    assert fresh["meta"]["cache"] == "hit"
+    assert fresh["total"] == 2
+    assert len(upstream.endpoint_calls("GetAllTyphoon")) == 2
+
+
+def test_concurrent_stale_reads_schedule_one_refresh(upstream):
+    release = threading.Event()
+    upstream.handlers["GetAllTyphoon"] = _typhoons(1)
+    api = ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, cache=_cache())
+    try:
+        api.get_all_typhoon()
+        time.sleep(0.06)
+
+        def slow_refresh(query):
+            release.wait(2)
+            return ok([], total=2)
+
+        upstream.handlers["GetAllTyphoon"] = slow_refresh
+        results = [api.get_all_typhoon() for _ in range(5)]
+        release.set()
+        assert _wait_for(lambda: not api.revalidation_pending)
+    finally:
+        api.close()
+    assert all(result["meta"]["cache"] == "stale" for result in results)
+    assert len(upstream.endpoint_calls("GetAllTyphoon")) == 2
+
+
+def test_failed_refresh_keeps_the_old_entry(upstream):
+    upstream.handlers["GetAllTyphoon"] = _typhoons(1)
+    api = ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, cache=_cache())
+    try:
+        api.get_all_typhoon()
+        time.sleep(0.06)
+        upstream.handlers["GetAllTyphoon"] = lambda q: (503, {"status": -1, "msg": "down"})
+        api.get_all_typhoon()
+        assert _wait_for(lambda: not api.revalidation_pending)
+        again = api.get_all_typhoon()
+    finally:
+        api.close()
+    assert again["ok"] is True
+    assert again["meta"]["cache"] == "stale"
+
+
+def test_endpoints_without_a_window_fetch_synchronously(upstream):
+    api = ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, cache=ResponseCache(ttls={"GetSingleShip": 0.01}))
+    try:
+        api.get_single_ship(413000000)
+        time.sleep(0.02)
+        assert api.get_single_ship(413000000)["meta"]["cache"] == "miss"
+    finally:
+        api.close()
+
+
+def test_async_client_refreshes_in_a_background_task(upstream):
+    upstream.handlers["GetAllTyphoon"] = _typhoons(1)
+
+    async def main():
+        async with AsyncShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, cache=_cache()) as api:
+            await api.get_all_typhoon()
+            await asyncio.sleep(0.06)
+            upstream.handlers["GetAllTyphoon"] = _typhoons(2)
+            stale = await api.get_all_typhoon()
+            while api.revalidation_pending:
+                await asyncio.sleep(0.01)
+            return stale, await api.get_all_typhoon()
+
+    stale, fresh = asyncio.run(main())
+    assert stale["meta"]["revalidating"] is True and stale["total"] == 1
+    assert fresh["meta"]["cache"] == "hit" and fresh["total"] == 2
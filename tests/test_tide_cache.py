@@ -0,0 +1,64 @@
+from datetime import date, timedelta
+
+from resilience import NO_RETRY
+from response_cache import ResponseCache, TideCache
+from ship_service import ShipxyAPI
+from tests.fakes import ok
+
+KEY = ("test-key", "GetGlobalTideData", "1001")
+
+
+def _tide_payload(start, end, **extra):
+    start, end = date.fromisoformat(start), date.fromisoformat(end)
+    days = [(start + timedelta(days=offset)).isoformat() for offset in range((end - start).days + 1)]
+    return {
+        "overview": [{"tide_date": day, "high": 1} for day in days],
+        "detail": [{"tide_date": f"{day} {hour:02d}:00", "height": hour} for day in days for hour in (0, 12)],
+        **extra,
+    }
+
+
+def test_missing_returns_contiguous_gaps_and_assemble_orders_by_day():
+    tides = TideCache()
+    assert tides.add(KEY, date(2024, 1, 2), date(2024, 1, 3), _tide_payload("2024-01-02", "2024-01-03"))
+    assert tides.missing(KEY, date(2024, 1, 1), date(2024, 1, 5)) == [(date(2024, 1, 1), date(2024, 1, 1)), (date(2024, 1, 4), date(2024, 1, 5))]
+    assert tides.add(KEY, date(2024, 1, 4), date(2024, 1, 5), _tide_payload("2024-01-04", "2024-01-05"))
+    assembled = tides.assemble(KEY, date(2024, 1, 2), date(2024, 1, 5))
+    assert [item["tide_date"] for item in assembled["overview"]] == ["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05"]
+    assert len(assembled["detail"]) == 8
+
+
+def test_non_list_fields_disable_per_day_caching():
+    tides = TideCache()
+    assert not tides.add(KEY, date(2024, 1, 1), date(2024, 1, 2), _tide_payload("2024-01-01", "2024-01-02", station={"name": "A"}, unit="cm"))
+    assert tides.missing(KEY, date(2024, 1, 1), date(2024, 1, 2)) == [(date(2024, 1, 1), date(2024, 1, 2))]
+    assert not tides.add(KEY, date(2024, 1, 1), date(2024, 1, 1), {"overview": [{"height": 1}]})
+    assert not tides.add(KEY, date(2024, 1, 1), date(2024, 1, 1), [{"tide_date": "2024-01-01"}])
+
+
+def test_overlapping_queries_fetch_only_missing_days(upstream):
+    upstream.handlers["GetGlobalTideData"] = lambda q: ok(_tide_payload(q["start_date"], q["end_date"]))
+    api = ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, cache=ResponseCache())
+    try:
+        api.get_global_tide_data(1001, "2024-01-01", "2024-01-03")
+        result = api.get_global_tide_data(1001, "2024-01-02", "2024-01-05")
+    finally:
+        api.close()
+    assert result["meta"]["cache"] == "partial"
+    assert result["meta"]["fetched_ranges"] == [["2024-01-04", "2024-01-05"]]
+    assert [item["tide_date"] for item in result["data"]["overview"]] == ["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05"]
+    assert [(q["start_date"], q["end_date"]) for q in upstream.endpoint_calls("GetGlobalTideData")] == [("2024-01-01", "2024-01-03"), ("2024-01-04", "2024-01-05")]
+
+
+def test_station_fields_are_returned_unchanged(upstream):
+    upstream.handlers["GetGlobalTideData"] = lambda q: ok(_tide_payload(q["start_date"], q["end_date"], station={"name": "A"}, unit="cm"))
+    api = ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, cache=ResponseCache())
+    try:
+        first = api.get_global_tide_data(1001, "2024-01-01", "2024-01-03")
+        second = api.get_global_tide_data(1001, "2024-01-01", "2024-01-03")
+    finally:
+        api.close()
+    for result in (first, second):
+        assert result["data"]["station"] == {"name": "A"}
+        assert result["data"]["unit"] == "cm"
+        assert len(result["data"]["overview"]) == 3
@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+from resilience import NO_RETRY
+from ship_service import ENDPOINT_TIMEOUTS, AsyncShipxyAPI, ShipxyAPI, request_deadline
+from tool_registry import invoke_tool
+from tests.fakes import ok, ship_record
+
+
+def _slow(seconds):
+    def handler(query):
+        time.sleep(seconds)
+        return ok(ship_record(query["mmsi"]))
+    return handler
+
+
+def test_heavy_endpoints_get_longer_read_timeouts():
+    assert ENDPOINT_TIMEOUTS["GetShipTrack"][1] > ENDPOINT_TIMEOUTS["GetSingleShip"][1]
+
+
+def test_per_endpoint_read_timeout_is_reported_as_timeout(upstream):
+    upstream.handlers["GetSingleShip"] = _slow(0.5)
+    api = ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, timeouts={"GetSingleShip": (1.0, 0.1)})
+    try:
+        result = api.get_single_ship(413000000)
+    finally:
+        api.close()
+    assert result["ok"] is False
+    assert result["error"]["type"] == "timeout"
+
+
+def test_deadline_caps_the_whole_call(api, upstream):
+    upstream.handlers["GetSingleShip"] = _slow(0.5)
+    started = time.monotonic()
+    with request_deadline(0.15):
+        result = api.get_single_ship(413000000)
+    assert time.monotonic() - started < 0.45
+    assert result["error"]["type"] == "timeout"
+
+
+def test_expired_deadline_skips_the_request(api, upstream):
+    with request_deadline(0):
+        result = api.get_single_ship(413000000)
+    assert result["error"]["type"] == "timeout"
+    assert upstream.calls == []
+
+
+def test_nested_deadlines_keep_the_earlier_one(api, upstream):
+    upstream.handlers["GetSingleShip"] = _slow(0.5)
+    with request_deadline(0.1), request_deadline(10):
+        assert api.get_single_ship(413000000)["error"]["type"] == "timeout"
+
+
+def test_invoke_tool_deadline(api, upstream):
+    upstream.handlers["GetSingleShip"] = _slow(0.5)
+    result = invoke_tool(api, "get_single_ship", {"mmsi": 413000000}, deadline=0.1)
+    assert result["ok"] is False
+    assert result["error"]["type"] == "timeout"
+
+
+def test_async_deadline(upstream):
+    upstream.handlers["GetSingleShip"] = _slow(0.5)
+
+    async def main():
+        async with AsyncShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY) as api:
+            with request_deadline(0.1):
+                return await api.get_single_ship(413000000)
+
+    assert asyncio.run(main())["error"]["type"] == "timeout"
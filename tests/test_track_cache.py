@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+from resilience import NO_RETRY
+from response_cache import ResponseCache, TrackCache
+from ship_service import AsyncShipxyAPI, ShipxyAPI
+from tests.track_helpers import BASE, POINT_INTERVAL, queried_ranges, track_handler, track_point
+
+HOUR = 3600
+
+
+def _client(upstream):
+    return ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, cache=ResponseCache(), track_window=0)
+
+
+def test_missing_reports_uncovered_gaps():
+    tracks = TrackCache()
+    tracks.add("ship", BASE + 100, BASE + 200, [])
+    tracks.add("ship", BASE + 300, BASE + 400, [])
+    assert tracks.missing("ship", BASE, BASE + 500) == [(BASE, BASE + 99), (BASE + 201, BASE + 299), (BASE + 401, BASE + 500)]
+    assert tracks.missing("ship", BASE + 120, BASE + 180) == []
+
+
+def test_recent_interval_is_not_marked_covered():
+    tracks = TrackCache(settle_seconds=600)
+    now = int(time.time())
+    tracks.add("ship", now - 3 * HOUR, now, [track_point(now - HOUR)])
+    [(gap_start, gap_end)] = tracks.missing("ship", now - 3 * HOUR, now)
+    assert gap_end == now
+    assert now - 600 < gap_start <= now - 598
+    assert [point["utc"] for point in tracks.points("ship", now - 3 * HOUR, now)] == [now - HOUR]
+
+
+def test_overlapping_query_fetches_only_the_gap(upstream):
+    upstream.handlers["GetShipTrack"] = track_handler
+    api = _client(upstream)
+    try:
+        first = api.get_ship_track(413000000, BASE, BASE + 2 * HOUR)
+        second = api.get_ship_track(413000000, BASE + HOUR, BASE + 4 * HOUR)
+    finally:
+        api.close()
+    assert first["meta"]["cache"] == "miss"
+    assert second["meta"]["cache"] == "partial"
+    assert second["meta"]["fetched_ranges"] == [[BASE + 2 * HOUR + 1, BASE + 4 * HOUR]]
+    assert queried_ranges(upstream) == [(BASE, BASE + 2 * HOUR), (BASE + 2 * HOUR + 1, BASE + 4 * HOUR)]
+    utcs = [point["utc"] for point in second["data"]]
+    assert utcs == list(range(BASE + HOUR, BASE + 4 * HOUR + 1, POINT_INTERVAL))
+
+
+def test_covered_query_is_a_hit(upstream):
+    upstream.handlers["GetShipTrack"] = track_handler
+    api = _client(upstream)
+    try:
+        api.get_ship_track(413000000, BASE, BASE + 4 * HOUR)
+        result = api.get_ship_track(413000000, BASE + HOUR, BASE + 2 * HOUR)
+    finally:
+        api.close()
+    assert result["meta"]["cache"] == "hit"
+    assert len(upstream.endpoint_calls("GetShipTrack")) == 1
+
+
+def test_non_json_output_bypasses_the_track_cache(upstream):
+    upstream.handlers["GetShipTrack"] = track_handler
+    api = _client(upstream)
+    try:
+        api.get_ship_track(413000000, BASE, BASE + HOUR, output=0)
+        result = api.get_ship_track(413000000, BASE - HOUR, BASE + HOUR, output=0)
+    finally:
+        api.close()
+    assert len(api.cache.tracks) == 0
+    assert "fetched_ranges" not in result.get("meta", {})
+    assert queried_ranges(upstream) == [(BASE, BASE + HOUR), (BASE - HOUR, BASE + HOUR)]
+
+
+def test_async_client_shares_the_gap_logic(upstream):
+    upstream.handlers["GetShipTrack"] = track_handler
+
+    async def main():
+        async with AsyncShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, cache=ResponseCache(), track_window=0) as api:
+            await api.get_ship_track(413000000, BASE, BASE + 2 * HOUR)
+            return await api.get_ship_track(413000000, BASE - HOUR, BASE + HOUR)
+
+    result = asyncio.run(main())
+    assert result["meta"]["cache"] == "partial"
+    assert queried_ranges(upstream)[-1] == (BASE - HOUR, BASE - 1)
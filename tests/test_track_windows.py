@@ -0,0 +1,163 @@
+import asyncio
+import threading
+import time
+
+from resilience import NO_RETRY
+from response_cache import ResponseCache
+from ship_service import DEFAULT_FANOUT_WORKERS, DEFAULT_TRACK_WINDOW_SECONDS, AsyncShipxyAPI, ShipxyAPI
+from tests.track_helpers import BASE, POINT_INTERVAL, queried_ranges, track_handler
+
+DAY = 86400
+
+
+def _client(upstream, **kwargs):
+    return ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, **kwargs)
+
+
+def test_windows_tile_the_range_without_overlap(api):
+    windows = api._track_windows(BASE, BASE + 10 * DAY)
+    assert windows[0][0] == BASE and windows[-1][1] == BASE + 10 * DAY
+    assert all(end - start < DEFAULT_TRACK_WINDOW_SECONDS for start, end in windows)
+    assert all(next_start == end + 1 for (_, end), (next_start, _) in zip(windows, windows[1:]))
+    assert api._track_windows(BASE, BASE + DAY) == [(BASE, BASE + DAY)]
+
+
+def test_long_track_is_split_and_merged_in_order(upstream):
+    upstream.handlers["GetShipTrack"] = track_handler
+    api = _client(upstream, track_window=2 * DAY)
+    try:
+        result = api.get_ship_track(413000000, BASE, BASE + 7 * DAY)
+    finally:
+        api.close()
+    assert result["ok"] is True
+    assert result["meta"]["track_windows"] == 4
+    assert len(queried_ranges(upstream)) == 4
+    assert [point["utc"] for point in result["data"]] == list(range(BASE, BASE + 7 * DAY + 1, POINT_INTERVAL))
+
+
+def test_failed_window_fails_the_call(upstream):
+    def handler(query):
+        if int(query["start_time"]) > BASE:
+            return 500, {"status": -1, "msg": "boom"}
+        return track_handler(query)
+
+    upstream.handlers["GetShipTrack"] = handler
+    api = _client(upstream, track_window=2 * DAY)
+    try:
+        result = api.get_ship_track(413000000, BASE, BASE + 5 * DAY)
+    finally:
+        api.close()
+    assert result["ok"] is False
+
+
+def test_cached_gaps_keep_successful_windows(upstream):
+    failing = {"on": True}
+
+    def handler(query):
+        if failing["on"] and int(query["start_time"]) > BASE:
+            return 500, {"status": -1, "msg": "boom"}
+        return track_handler(query)
+
+    upstream.handlers["GetShipTrack"] = handler
+    api = _client(upstream, track_window=2 * DAY, cache=ResponseCache())
+    try:
+        assert api.get_ship_track(413000000, BASE, BASE + 5 * DAY)["ok"] is False
+        failing["on"] = False
+        before = len(queried_ranges(upstream))
+        result = api.get_ship_track(413000000, BASE, BASE + 5 * DAY)
+    finally:
+        api.close()
+    assert result["ok"] is True
+    assert result["meta"]["cache"] == "partial"
+    assert all(start > BASE for start, _ in queried_ranges(upstream)[before:])
+
+
+def test_zero_window_disables_splitting(upstream):
+    upstream.handlers["GetShipTrack"] = track_handler
+    api = _client(upstream, track_window=0)
+    try:
+        api.get_ship_track(413000000, BASE, BASE + 10 * DAY)
+    finally:
+        api.close()
+    assert queried_ranges(upstream) == [(BASE, BASE + 10 * DAY)]
+
+
+def test_async_client_splits_windows(upstream):
+    upstream.handlers["GetShipTrack"] = track_handler
+
+    async def main():
+        async with AsyncShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, track_window=2 * DAY) as api:
+            return await api.get_ship_track(413000000, BASE, BASE + 7 * DAY)
+
+    result = asyncio.run(main())
+    assert result["meta"]["track_windows"] == 4
+    assert len(result["data"]) == 7 * DAY // POINT_INTERVAL + 1
+
+
+def _slow_track_handler(delay, fail_first=False):
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def handler(query):
+        if fail_first and int(query["start_time"]) == BASE:
+            return 500, {"status": -1, "msg": "boom"}
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(delay)
+        with lock:
+            state["active"] -= 1
+        return track_handler(query)
+
+    return handler, state
+
+
+def _run_async(upstream, scenario, track_window=DAY, **kwargs):
+    async def main():
+        async with AsyncShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, track_window=track_window, **kwargs) as api:
+            return await scenario(api)
+
+    return asyncio.run(main())
+
+
+def test_async_window_concurrency_is_bounded(upstream):
+    upstream.handlers["GetShipTrack"], state = _slow_track_handler(0.02)
+    result = _run_async(upstream, lambda api: api.get_ship_track(413000000, BASE, BASE + 30 * DAY))
+    assert result["ok"] is True
+    assert 1 < state["peak"] <= DEFAULT_FANOUT_WORKERS
+
+
+def test_async_failed_window_cancels_the_remaining_windows(upstream):
+    upstream.handlers["GetShipTrack"], _ = _slow_track_handler(0.1, fail_first=True)
+
+    async def scenario(api):
+        result = await api.get_ship_track(413000000, BASE, BASE + 30 * DAY)
+        # 事件循环继续运行，未被取消的子窗口会在这段时间里继续请求上游
+        await asyncio.sleep(1)
+        return result
+
+    result = _run_async(upstream, scenario)
+    assert result["ok"] is False
+    assert len(queried_ranges(upstream)) <= DEFAULT_FANOUT_WORKERS + 1
+
+
+def test_async_cached_gaps_keep_successful_windows(upstream):
+    failing = {"on": True}
+
+    def handler(query):
+        if failing["on"] and int(query["start_time"]) > BASE:
+            return 500, {"status": -1, "msg": "boom"}
+        return track_handler(query)
+
+    async def scenario(api):
+        first = await api.get_ship_track(413000000, BASE, BASE + 5 * DAY)
+        failing["on"] = False
+        before = len(queried_ranges(upstream))
+        return first, before, await api.get_ship_track(413000000, BASE, BASE + 5 * DAY)
+
+    upstream.handlers["GetShipTrack"] = handler
+    first, before, result = _run_async(upstream, scenario, track_window=2 * DAY, cache=ResponseCache())
+    assert first["ok"] is False
+    assert result["ok"] is True
+    assert result["meta"]["cache"] == "partial"
+    assert all(start > BASE for start, _ in queried_ranges(upstream)[before:])
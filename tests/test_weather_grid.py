@@ -0,0 +1,88 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from resilience import NO_RETRY
+from response_cache import SHIPXY_TIMEZONE, ResponseCache
+from ship_service import ShipxyAPI
+from tests.fakes import ok
+
+
+@pytest.fixture
+def weather_api(upstream):
+    upstream.handlers["CurrentWeather"] = lambda q: ok({"lng": float(q["lng"]), "lat": float(q["lat"])})
+    api = ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, cache=ResponseCache())
+    yield api
+    api.close()
+
+
+def test_points_in_the_same_cell_share_a_key():
+    cache = ResponseCache(weather_grid=0.1)
+    first = cache.key_params("CurrentWeather", {"key": "k", "lng": 123.5841, "lat": 27.3798})
+    second = cache.key_params("CurrentWeather", {"key": "k", "lng": 123.5612, "lat": 27.4203})
+    third = cache.key_params("CurrentWeather", {"key": "k", "lng": 123.7000, "lat": 27.3798})
+    assert first == second
+    assert first != third
+
+
+def test_other_endpoints_and_disabled_grid_keep_exact_coordinates():
+    params = {"key": "k", "lng": 123.5841, "lat": 27.3798}
+    assert ResponseCache().key_params("GetWeather", params) == params
+    assert ResponseCache(weather_grid=0).key_params("CurrentWeather", params) == params
+
+
+def _published(seconds_ago):
+    return datetime.fromtimestamp(time.time() - seconds_ago, SHIPXY_TIMEZONE).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def test_freshness_ends_one_cycle_after_publish_time():
+    cache = ResponseCache(weather_cycle=3600, ttls={"CurrentWeather": 7200})
+    fresh = cache._fresh_for("CurrentWeather", None, ok({"publish_time": _published(600)}))
+    assert 3000 - 2 <= fresh <= 3000
+    fresh = cache._fresh_for("CurrentWeather", None, ok({"publish_time": int(time.time()) - 1200}))
+    assert 2400 - 2 <= fresh <= 2400
+
+
+def test_latest_publish_time_in_forecast_lists_is_used():
+    cache = ResponseCache(weather_cycle=3600, ttls={"FutureWeather": 7200})
+    forecast = ok({"forecast": [{"publish_time": _published(3000)}, {"publish_time": _published(600)}]})
+    assert 3000 - 2 <= cache._fresh_for("FutureWeather", None, forecast) <= 3000
+    assert 3000 - 2 <= cache._fresh_for("FutureWeather", None, ok([{"publish_time": _published(600)}])) <= 3000
+
+
+def test_overdue_publication_waits_another_cycle():
+    cache = ResponseCache(weather_cycle=3600, ttls={"CurrentWeather": 7200})
+    fresh = cache._fresh_for("CurrentWeather", None, ok({"publish_time": _published(3600 + 600)}))
+    assert 3000 - 2 <= fresh <= 3000
+
+
+def test_missing_publish_time_falls_back_to_the_hourly_boundary():
+    cache = ResponseCache(weather_cycle=3600)
+    now = time.time()
+    for value in (None, ok({"lng": 1.0}), ok({"publish_time": "unknown"})):
+        assert cache._fresh_for("CurrentWeather", None, value) <= (now // 3600 + 1) * 3600 - now + 1
+    assert cache._fresh_for("GetSingleShip", None) == cache.ttl_for("GetSingleShip")
+
+
+def test_nearby_points_reuse_one_upstream_call(weather_api, upstream):
+    first = weather_api.current_weather(123.5841, 27.3798)
+    second = weather_api.current_weather(123.5612, 27.4203)
+    third = weather_api.current_weather(124.0, 27.3798)
+    assert second["meta"]["cache"] == "hit"
+    assert second["data"] == first["data"]
+    assert third["meta"]["cache"] == "miss"
+    assert len(upstream.endpoint_calls("CurrentWeather")) == 2
+
+
+def test_cached_entry_expires_one_cycle_after_publish_time(upstream):
+    upstream.handlers["CurrentWeather"] = lambda q: ok({"lng": float(q["lng"]), "lat": float(q["lat"]), "publish_time": _published(3600 - 1)})
+    api = ShipxyAPI("test-key", base_url=upstream.base_url, retry_policy=NO_RETRY, cache=ResponseCache(weather_cycle=3600, revalidate_windows={"CurrentWeather": 0}))
+    try:
+        api.current_weather(123.5841, 27.3798)
+        time.sleep(1.1)
+        result = api.current_weather(123.5841, 27.3798)
+    finally:
+        api.close()
+    assert result["meta"]["cache"] == "miss"
+    assert len(upstream.endpoint_calls("CurrentWeather")) == 2
@@ -0,0 +1,24 @@
+"""轨迹相关测试共用的假上游处理函数。"""
+from __future__ import annotations
+
+from typing import Any
+
+from tests.fakes import ok
+
+POINT_INTERVAL = 600
+BASE = 1_700_000_000 - 1_700_000_000 % POINT_INTERVAL
+
+
+def track_point(utc: int) -> dict[str, Any]:
+    return {"data_source": 1, "utc": utc, "lng": 120.0, "lat": 30.0, "sog": 10.0, "cog": 90.0}
+
+
+def track_handler(query: dict[str, str]) -> dict[str, Any]:
+    """每 POINT_INTERVAL 秒一个轨迹点，只返回查询区间内的点。"""
+    start, end = int(query["start_time"]), int(query["end_time"])
+    first = -(-start // POINT_INTERVAL) * POINT_INTERVAL
+    return ok([track_point(utc) for utc in range(first, end + 1, POINT_INTERVAL)])
+
+
+def queried_ranges(upstream) -> list[tuple[int, int]]:
+    return [(int(q["start_time"]), int(q["end_time"])) for q in upstream.endpoint_calls("GetShipTrack")]
@@ -1,8 +1,9 @@
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Any, Callable
 
-from domain_catalog import error_fix, tool_response_metadata
-from ship_service import ShipxyAPI
+from domain_catalog import describe_capabilities, error_fix, freeze_catalog, tool_response_metadata
+from ship_service import ShipxyAPI, fan_out, request_deadline
 
 
 @dataclass(frozen=True)
@@ -102,6 +103,16 @@ TOOLS: tuple[ToolSpec, ...] = (
             p("region", "str", "区域字符串，格式如 lng,lat-lng,lat。", required=True, positional=True),
             p("output", "int", "输出格式：1 表示 JSON，0 表示 base64。", default=1),
             p("scode", "int", "分页或会话令牌。", default=None),
+            p("max_pages", "int", "自动翻页的最大页数；不传时只返回一页。", default=None),
+        ),
+    ),
+    ToolSpec(
+        "ship_dossier",
+        "ship_dossier",
+        "并发查询船舶实时位置、档案、挂靠状态、船籍和精准 ETA，返回船舶档案汇总。",
+        (
+            p("mmsi", "int", "船舶 MMSI。", required=True, positional=True),
+            p("port_code", "str", "精准 ETA 的目的港五位码；不传时使用船舶上报的目的港。", default=None),
         ),
     ),
     ToolSpec("get_ship_registry", "get_ship_registry", "查询船舶船籍或国家地区信息。", (p("mmsi", "int", "船舶 MMSI。", required=True, positional=True),)),
@@ -154,6 +165,16 @@ TOOLS: tuple[ToolSpec, ...] = (
             p("ship_type", "int", "船舶类型。", default=None),
         ),
     ),
+    ToolSpec(
+        "port_snapshot",
+        "port_snapshot",
+        "并发查询港口靠泊、锚地、预抵港船舶和近期靠港记录，返回港口概览。",
+        (
+            p("port_code", "str", "港口五位码。", required=True, positional=True),
+            p("window_hours", "int", "预抵港向后、靠港记录向前查询的小时数。", default=24),
+            p("ship_type", "int", "船舶类型。", default=None),
+        ),
+    ),
     ToolSpec(
         "get_ship_track",
         "get_ship_track",
@@ -400,7 +421,11 @@ def _with_response_metadata(tool_name: str, result: Any) -> Any:
     return data
 
 
-def invoke_tool(api: ShipxyAPI, tool_name: str, values: dict[str, Any]) -> Any:
+def invoke_tool(api: ShipxyAPI, tool_name: str, values: dict[str, Any], *, deadline: float | None = None) -> Any:
+    """
+    校验入参并调用 Shipxy 工具。
+    deadline 为整个调用（含内部所有 Shipxy 请求）允许的最长秒数，超出时返回 timeout 错误。
+    """
     tool = get_tool(tool_name)
     from validation import validate_tool_input
 
@@ -429,7 +454,76 @@ def invoke_tool(api: ShipxyAPI, tool_name: str, values: dict[str, Any]) -> Any:
                     ],
                 )
     method: Callable[..., Any] = getattr(api, tool.method)
-    return _with_response_metadata(tool.name, method(**kwargs))
+    with request_deadline(deadline):
+        result = method(**kwargs)
+    return _with_response_metadata(tool.name, result)
+
+
+BATCH_TOOL_NAME = "invoke_batch"
+DEFAULT_BATCH_CONCURRENCY = 8
+MAX_BATCH_CONCURRENCY = 16
+MAX_BATCH_CALLS = 50
+# invoke_batch 不对应 ShipxyAPI 方法，不在 TOOLS 中，只用于能力目录
+BATCH_TOOL = ToolSpec(
+    BATCH_TOOL_NAME,
+    "invoke_batch",
+    "批量并发调用多个 Shipxy 工具",
+    (
+        p("calls", "list[dict]", "调用列表，每条为 {\"tool_name\": ..., \"arguments\": {...}}", required=True),
+        p("max_concurrency", "int", "本批次最大并发数", default=DEFAULT_BATCH_CONCURRENCY),
+    ),
+)
+
+
+def _validate_batch(calls: Any) -> list[dict[str, Any]]:
+    """逐条校验批量调用，返回带 index 的字段级错误；全部合法时返回空列表。"""
+    from validation import validate_tool_input
+
+    if not isinstance(calls, list) or not calls:
+        return [{"type": "invalid_request", "field": "calls", "message": "calls 必须是非空数组。", "received": calls, "expected": "[{tool_name, arguments}, ...]", "fix": {"strategy": "每条调用写成 {\"tool_name\": 工具名, \"arguments\": 参数对象}。"}}]
+    if len(calls) > MAX_BATCH_CALLS:
+        return [{"type": "invalid_request", "field": "calls", "message": f"单次批量调用最多 {MAX_BATCH_CALLS} 条。", "received": f"{len(calls)} 条", "expected": f"1 到 {MAX_BATCH_CALLS} 条", "fix": {"strategy": "拆分为多个批次提交。"}}]
+
+    errors: list[dict[str, Any]] = []
+    for index, call in enumerate(calls):
+        if not isinstance(call, dict) or not isinstance(call.get("tool_name"), str) or not isinstance(call.get("arguments", {}), dict):
+            errors.append({"type": "invalid_request", "index": index, "field": f"calls.{index}", "message": "每条调用必须是 {tool_name: str, arguments: object}。", "received": call, "fix": {"strategy": "每条调用写成 {\"tool_name\": 工具名, \"arguments\": 参数对象}。"}})
+            continue
+        validation = validate_tool_input(call["tool_name"], call.get("arguments") or {})
+        for error in validation.get("errors", []):
+            errors.append({**error, "index": index, "tool": call["tool_name"]})
+    return errors
+
+
+def invoke_batch(
+    api: ShipxyAPI,
+    calls: list[dict[str, Any]],
+    *,
+    deadline: float | None = None,
+    max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+) -> dict[str, Any]:
+    """
+    批量调用多个 Shipxy 工具。
+    先校验全部调用，任一条不合法时整批返回 invalid_request 且不发出任何请求；全部合法时以有界并发执行，
+    results 与 calls 一一对应、顺序一致，单条失败不影响其他调用。
+    deadline 为整批调用允许的最长秒数。
+    """
+    errors = _validate_batch(calls)
+    if errors:
+        return _invalid_request_result(BATCH_TOOL_NAME, errors)
+
+    workers = max(1, min(max_concurrency or DEFAULT_BATCH_CONCURRENCY, MAX_BATCH_CONCURRENCY))
+    with request_deadline(deadline):
+        outcomes = fan_out(
+            [lambda call=call: invoke_tool(api, call["tool_name"], call.get("arguments") or {}) for call in calls],
+            max_workers=workers,
+        )
+    results = [
+        outcome if not isinstance(outcome, Exception) else {"ok": False, "tool": call["tool_name"], "error": {"type": "shipxy_error", "message": str(outcome)}}
+        for call, outcome in zip(calls, outcomes)
+    ]
+    failed = sum(1 for result in results if isinstance(result, dict) and result.get("ok") is False)
+    return {"ok": True, "tool": BATCH_TOOL_NAME, "total": len(results), "succeeded": len(results) - failed, "failed": failed, "results": results}
 
 
 def model_to_data(value: Any) -> Any:
@@ -442,3 +536,9 @@ def model_to_data(value: Any) -> Any:
 
 def all_schemas() -> list[dict[str, Any]]:
     return [tool.schema() for tool in TOOLS]
+
+
+@lru_cache(maxsize=256)
+def describe_tool_capabilities(tool_name: str | None = None) -> dict[str, Any]:
+    """能力目录只依赖静态的 TOOLS 和 CAPABILITY_CATALOG，按 tool_name 缓存；返回共享的只读结构，修改时抛出 TypeError。"""
+    return freeze_catalog(describe_capabilities([*all_schemas(), BATCH_TOOL.schema()], tool_name))
@@ -3,6 +3,8 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Any
 
+from ship_service import MAX_AREA_SHIP_PAGES, MAX_MANY_SHIP_MMSIS, MAX_SNAPSHOT_WINDOW_HOURS
+
 
 def _is_missing(value: Any) -> bool:
     return value is None or value == ""
@@ -290,14 +292,14 @@ def validate_tool_input(tool_name: str, arguments: dict[str, Any] | None) -> dic
             continue
         if param.type == "list[int]":
             items = _normalize_mmsis(value)
-            if len(items) > 100:
+            if len(items) > MAX_MANY_SHIP_MMSIS:
                 errors.append(
                     _error(
                         param.name,
-                        "MMSI 列表最多包含 100 个元素。",
+                        f"MMSI 列表最多包含 {MAX_MANY_SHIP_MMSIS} 个元素。",
                         received=f"{len(items)} 个元素",
-                        expected="1 到 100 个 MMSI",
-                        strategy="请将请求拆分为多次调用。",
+                        expected=f"1 到 {MAX_MANY_SHIP_MMSIS} 个 MMSI",
+                        strategy="请将请求拆分为多次调用，或通过 SHIPXY_MAX_MANY_SHIP_MMSIS 调高上限；超过 100 个时服务端会自动分组并发查询。",
                     )
                 )
             for index, item in enumerate(items):
@@ -328,6 +330,31 @@ def validate_tool_input(tool_name: str, arguments: dict[str, Any] | None) -> dic
         if value is None or value < 1 or value > 100:
             errors.append(_error("max_results", "max_results 必须在 1 到 100 之间。", received=args.get("max_results"), expected="1 <= max_results <= 100"))
 
+    if "max_pages" in expected_fields and not _is_missing(args.get("max_pages")):
+        value = _as_int(args.get("max_pages"))
+        if value is None or value < 1 or value > MAX_AREA_SHIP_PAGES:
+            errors.append(
+                _error(
+                    "max_pages",
+                    f"max_pages 必须在 1 到 {MAX_AREA_SHIP_PAGES} 之间。",
+                    received=args.get("max_pages"),
+                    expected=f"1 <= max_pages <= {MAX_AREA_SHIP_PAGES}",
+                    strategy="区域过大时请缩小多边形范围。",
+                )
+            )
+
+    if "window_hours" in expected_fields and not _is_missing(args.get("window_hours")):
+        value = _as_int(args.get("window_hours"))
+        if value is None or value < 1 or value > MAX_SNAPSHOT_WINDOW_HOURS:
+            errors.append(
+                _error(
+                    "window_hours",
+                    f"window_hours 必须在 1 到 {MAX_SNAPSHOT_WINDOW_HOURS} 之间。",
+                    received=args.get("window_hours"),
+                    expected=f"1 <= window_hours <= {MAX_SNAPSHOT_WINDOW_HOURS}",
+                )
+            )
+
     if "output" in expected_fields and not _is_missing(args.get("output")):
         value = _as_int(args.get("output"))
         if value not in (0, 1):